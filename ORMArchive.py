@@ -0,0 +1,239 @@
+import contextlib
+import datetime
+import os
+import re
+
+from sqlalchemy import Column, Index, MetaData, Table, and_, delete, exists, func, insert, select, union_all
+
+import ORMEngine
+
+# Month partitions for append-only log tables (AdminLog, JobInteraction,
+# Answer). archive() moves the rows whose timestamp is older than a cut-off,
+# in short batches, into one SQLite file per month next to the database,
+# e.g. ORMTravelBookingDb.2024-01.archive.db, which holds that month of every
+# archived table of the schema. Each archive file is ATTACHed only while it is
+# written or read, so the live database stays small for scans, VACUUM and
+# backups.
+#
+# A month's batches are copied with INSERT OR REPLACE before they are deleted:
+# the live database runs in WAL mode, so a transaction spanning it and an
+# archive is not atomic across both files. If it is interrupted, running
+# archive() again finishes the move without duplicating rows.
+#
+# Archived rows are out of ordinary queries. including_archives() attaches the
+# months of a time range and returns a UNION ALL of them and the live table;
+# SQLite attaches at most MAX_ATTACHED files at once, so scan() reads wider
+# ranges one partition at a time.
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_ATTACHED = 10  # SQLite's default SQLITE_MAX_ATTACHED
+SUFFIX = '.archive.db'
+
+
+def register(model, timestamp):
+    """Allow archiving ``model`` by month of its ``timestamp`` column, which gets an index."""
+    table = model.__table__
+    table.info['archive_by'] = timestamp
+    Index(f'ix_{table.name}_{timestamp.lower()}', table.c[timestamp])
+    return model
+
+
+def _timestamp(table):
+    if 'archive_by' not in table.info:
+        raise ValueError(f'{table.name} is not registered with ORMArchive')
+    return table.info['archive_by']
+
+
+def _database(engine):
+    database = engine.url.database
+    if database in (None, '', ':memory:') or engine.url.query.get('mode') == 'memory':
+        raise ValueError('in-memory databases have no archive files')
+    return os.path.abspath(database)
+
+
+def archive_path(database, month, directory=None):
+    """Archive file of ``database`` (a file name) for ``month`` ('YYYY-MM')."""
+    stem = os.path.splitext(os.path.basename(database))[0]
+    return os.path.join(directory or os.path.dirname(database), f'{stem}.{month}{SUFFIX}')
+
+
+def months(engine, directory=None):
+    """Months ('YYYY-MM') that have an archive file for the database of ``engine``, oldest first."""
+    database = _database(engine)
+    stem = os.path.splitext(os.path.basename(database))[0]
+    pattern = re.compile(re.escape(stem) + r'\.(\d{4}-\d{2})' + re.escape(SUFFIX) + '$')
+    names = os.listdir(directory or os.path.dirname(database))
+    return sorted(match.group(1) for match in map(pattern.match, names) if match)
+
+
+def _month_start(moment):
+    return datetime.datetime(moment.year, moment.month, 1)
+
+
+def _next_month(start):
+    return datetime.datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def _bounds(month):
+    start = datetime.datetime.strptime(month, '%Y-%m')
+    return start, _next_month(start)
+
+
+def _alias(month):
+    return 'archive_' + month.replace('-', '_')
+
+
+def _archive_table(table, schema):
+    # Same name and columns in the attached file, without constraints
+    timestamp = _timestamp(table)
+    archived = Table(table.name, MetaData(schema=schema),
+                     *(Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False)
+                       for column in table.columns))
+    Index(f'ix_{table.name}_{timestamp.lower()}', archived.c[timestamp])
+    return archived
+
+
+def _idle(connection):
+    # ATTACH and DETACH fail inside a transaction
+    if connection.in_transaction():
+        connection.commit()
+
+
+def _migrate(connection, archived):
+    # Month files written before a column changed its storage type (see
+    # ORMTypes) are converted the first time they are read
+    with connection.begin():
+        if ORMEngine.migrate_column_types(connection, archived):
+            for index in archived.indexes:
+                index.create(connection, checkfirst=True)
+
+
+@contextlib.contextmanager
+def _attached(connection, path, alias):
+    _idle(connection)
+    connection.exec_driver_sql(f'ATTACH DATABASE ? AS {alias}', (path,))
+    _idle(connection)
+    try:
+        yield
+    finally:
+        _idle(connection)
+        connection.exec_driver_sql(f'DETACH DATABASE {alias}')
+        _idle(connection)
+
+
+def _cutoff(older_than):
+    if isinstance(older_than, datetime.timedelta):
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - older_than
+    return older_than
+
+
+def archive(engine, model, older_than, batch_size=DEFAULT_BATCH_SIZE, directory=None):
+    """Move rows of ``model`` stamped before ``older_than`` into their month's archive file.
+
+    ``older_than`` is a naive UTC datetime or a timedelta before now. Rows
+    move ``batch_size`` at a time, oldest first, each batch in its own short
+    transaction. Rows without a timestamp stay. Returns the number of rows
+    moved per month.
+    """
+    table = model.__table__
+    column = table.c[_timestamp(table)]
+    referenced = [other.name for other in table.metadata.tables.values()
+                  for foreign_key in other.foreign_keys if foreign_key.column.table is table]
+    if referenced:
+        raise ValueError(f'{table.name} is referenced by {", ".join(referenced)} and cannot be archived')
+    cutoff = _cutoff(older_than)
+    database = _database(engine)
+    primary_key, = table.primary_key.columns
+    names = [column.name for column in table.columns]
+    moved = {}
+    with engine.connect() as connection:
+        oldest = connection.scalar(select(func.min(column)))
+        start = oldest and _month_start(oldest)
+        while start is not None and start < cutoff:
+            end = _next_month(start)
+            in_month = and_(column >= start, column < min(end, cutoff))
+            if connection.scalar(select(exists().where(in_month))):
+                month = start.strftime('%Y-%m')
+                alias = _alias(month)
+                archived = _archive_table(table, alias)
+                with _attached(connection, archive_path(database, month, directory), alias):
+                    with connection.begin():
+                        ORMEngine.sync_schema_on(connection, archived.metadata)
+                    batch = select(primary_key).where(in_month).order_by(column).limit(batch_size)
+                    count = 0
+                    while True:
+                        with connection.begin():
+                            keys = connection.scalars(batch).all()
+                            if not keys:
+                                break
+                            connection.execute(insert(archived).prefix_with('OR REPLACE').from_select(
+                                names, select(table).where(primary_key.in_(keys))))
+                            connection.execute(delete(table).where(primary_key.in_(keys)))
+                        count += len(keys)
+                moved[month] = count
+            start = end
+    return moved
+
+
+def _selected_months(engine, since, until, directory):
+    selected = []
+    for month in months(engine, directory):
+        start, end = _bounds(month)
+        if (since is None or end > since) and (until is None or start < until):
+            selected.append(month)
+    return selected
+
+
+def _window(column, since, until):
+    conditions = []
+    if since is not None:
+        conditions.append(column >= since)
+    if until is not None:
+        conditions.append(column < until)
+    return conditions
+
+
+@contextlib.contextmanager
+def including_archives(connection, model, since=None, until=None, directory=None):
+    """Attach the archive months overlapping ``[since, until)`` and yield a subquery over them and the live table.
+
+    The subquery has the columns of the model's table and only rows inside
+    the window. Any transaction of ``connection`` is committed before the
+    archives are attached and again before they are detached. At most
+    MAX_ATTACHED months can be read at once, see scan() for wider ranges.
+    """
+    table = model.__table__
+    timestamp = _timestamp(table)
+    selected = _selected_months(connection.engine, since, until, directory)
+    if len(selected) > MAX_ATTACHED:
+        raise ValueError(f'{len(selected)} archive months overlap the range, at most {MAX_ATTACHED} can be '
+                         f'attached; narrow it or use scan()')
+    database = _database(connection.engine)
+    with contextlib.ExitStack() as stack:
+        branches = [select(table).where(*_window(table.c[timestamp], since, until))]
+        for month in selected:
+            alias = _alias(month)
+            stack.enter_context(_attached(connection, archive_path(database, month, directory), alias))
+            archived = _archive_table(table, alias)
+            _migrate(connection, archived)
+            branches.append(select(archived).where(*_window(archived.c[timestamp], since, until)))
+        yield union_all(*branches).subquery(table.name)
+
+
+def scan(connection, model, *where, since=None, until=None, directory=None, live=True):
+    """Yield the rows of ``model`` matching ``where`` inside ``[since, until)``, archive months first, then live.
+
+    Partitions are read one at a time, so any number of months can be
+    scanned. ``where`` may only refer to the columns of the model's table.
+    ``live=False`` reads the archive months only.
+    """
+    table = model.__table__
+    statement = select(table).where(*_window(table.c[_timestamp(table)], since, until), *where)
+    database = _database(connection.engine)
+    for month in _selected_months(connection.engine, since, until, directory):
+        alias = _alias(month)
+        with _attached(connection, archive_path(database, month, directory), alias):
+            _migrate(connection, _archive_table(table, alias))
+            yield from connection.execute(statement, execution_options={'schema_translate_map': {None: alias}}).all()
+    if live:
+        yield from connection.execute(statement)
@@ -0,0 +1,82 @@
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+import ORMEngine
+
+# Async counterparts of ORMEngine.get_engine / get_sessionmaker, backed by
+# aiosqlite. They share the pragma profile and schema sync of the sync engines
+# and are cached per URI in the same way.
+_engines = {}
+_sessionmakers = {}
+
+
+def async_uri(uri):
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.get_driver_name() != 'aiosqlite':
+        url = url.set(drivername='sqlite+aiosqlite')
+    return url.render_as_string(hide_password=False)
+
+
+async def get_async_engine(uri, metadata=None, pragmas=None, **kwargs):
+    uri = async_uri(uri)
+    engine = _engines.get(uri)
+    if engine is None:
+        pragmas = dict(ORMEngine.SQLITE_PRAGMAS if pragmas is None else pragmas)
+        if ORMEngine.is_memory_uri(uri):
+            kwargs.setdefault('poolclass', StaticPool)
+            for name in ORMEngine.FILE_ONLY_PRAGMAS:
+                pragmas.pop(name, None)
+        engine = create_async_engine(uri, **kwargs)
+        if pragmas:
+            ORMEngine.apply_pragmas(engine.sync_engine, pragmas)
+        if metadata is not None:
+            async with engine.begin() as connection:
+                await connection.run_sync(ORMEngine.sync_schema_on, metadata)
+        _engines[uri] = engine
+    return engine
+
+
+async def get_async_sessionmaker(schema, uri=None, **kwargs):
+    """Async session factory for a schema module such as ORMQuizDb."""
+    uri = async_uri(uri or schema.DATABASE_URI)
+    factory = _sessionmakers.get(uri)
+    if factory is None:
+        engine = await get_async_engine(uri, schema.Base.metadata, **kwargs)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        _sessionmakers[uri] = factory
+    return factory
+
+
+async def dispose_all():
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _sessionmakers.clear()
+
+
+async def seed(schema, session):
+    """Run the schema's seed function on an AsyncSession."""
+    await session.run_sync(schema.seed)
+
+
+async def crud_example(session):
+    """Async version of ORMQuizDb.crud_example."""
+    import ORMQuizDb as quiz
+
+    print("All Users:")
+    for name, email in await session.execute(select(quiz.User.name, quiz.User.email)):
+        print(name, email)
+
+    user_to_update = await session.get(quiz.User, 1)
+    user_to_update.name = 'Alicia'
+    await session.commit()
+
+    user_to_delete = await session.get(quiz.User, 3)
+    await session.delete(user_to_delete)
+    await session.commit()
+
+    print("\nUsers after update and delete:")
+    async for name, email in await session.stream(select(quiz.User.name, quiz.User.email)):
+        print(name, email)
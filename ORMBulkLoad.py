@@ -0,0 +1,185 @@
+import csv
+import datetime
+import decimal
+from contextlib import nullcontext
+from itertools import islice
+
+from sqlalchemy import insert, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def _table(target):
+    return getattr(target, '__table__', target)
+
+
+def _transaction(bind):
+    # Engines get their own transaction; sessions and connections keep the
+    # caller's, so the load commits (or rolls back) together with it.
+    if isinstance(bind, Engine):
+        return bind.begin()
+    if isinstance(bind, Session):
+        return nullcontext(bind.connection())
+    return nullcontext(bind)
+
+
+def dependency_order(targets):
+    """Order tables so that every table comes after the tables it references."""
+    tables = [_table(target) for target in targets]
+    rank = {}
+    for table in tables:
+        for position, sorted_table in enumerate(table.metadata.sorted_tables):
+            rank.setdefault(sorted_table, position)
+    return sorted(tables, key=lambda table: rank[table])
+
+
+def batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_load(bind, data, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+    """Insert rows for several tables through Core executemany in one transaction.
+
+    ``data`` maps a model or Table to an iterable of row dicts or tuples.
+    Tuples are matched positionally against ``columns[target]`` (all table
+    columns by default). Rows are consumed lazily, ``batch_size`` at a time,
+    and tables are loaded parents first. Returns the row count per table name.
+    """
+    columns = {_table(target): names for target, names in (columns or {}).items()}
+    rows_by_table = {_table(target): rows for target, rows in data.items()}
+    counts = {}
+    with _transaction(bind) as connection:
+        for table in dependency_order(rows_by_table):
+            names = columns.get(table) or [column.key for column in table.columns]
+            statement = insert(table)
+            count = 0
+            for batch in batches(rows_by_table[table], batch_size):
+                if not isinstance(batch[0], dict):
+                    batch = [dict(zip(names, row)) for row in batch]
+                connection.execute(statement, batch)
+                count += len(batch)
+            counts[table.name] = count
+    return counts
+
+
+def natural_key(target):
+    """Columns identifying a row for upsert(): ``table.info['natural_key']``, else the primary key."""
+    table = _table(target)
+    return tuple(table.info.get('natural_key') or (column.key for column in table.primary_key))
+
+
+def _upsert_statement(table, names, key):
+    # Imported here: the schema modules import this module, and importing them stays cheap
+    from sqlalchemy.dialects import sqlite
+
+    statement = sqlite.insert(table)
+    excluded = statement.excluded
+    # Primary keys are never rewritten, and rows whose values already match
+    # are skipped by the WHERE, so an unchanged row costs a lookup, not a write.
+    updated = [name for name in names if name not in key and not table.c[name].primary_key]
+    if not updated:
+        return statement.on_conflict_do_nothing(index_elements=list(key))
+    values = {name: excluded[name] for name in updated}
+    for column in table.columns:
+        # on_conflict_do_update() skips onupdate defaults; stamp changed rows too
+        if column.key not in values and column.onupdate is not None and column.onupdate.is_clause_element:
+            values[column.key] = column.onupdate.arg
+    return statement.on_conflict_do_update(
+        index_elements=list(key),
+        set_=values,
+        where=or_(*(table.c[name].is_distinct_from(excluded[name]) for name in updated)),
+    )
+
+
+def upsert(bind, data, keys=None, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+    """Insert rows, or update the rows that already exist, for several tables in one transaction.
+
+    Works like bulk_load(), but a row whose ``keys[target]`` columns (see
+    natural_key()) match an existing row updates that row instead; there must
+    be a unique index on exactly those columns. Columns missing from the rows
+    are left as they are. Re-running the same data is a no-op, so imports can
+    be repeated safely. Returns the number of rows inserted or changed per
+    table name.
+    """
+    columns = {_table(target): names for target, names in (columns or {}).items()}
+    keys = {_table(target): tuple(names) for target, names in (keys or {}).items()}
+    rows_by_table = {_table(target): rows for target, rows in data.items()}
+    counts = {}
+    with _transaction(bind) as connection:
+        for table in dependency_order(rows_by_table):
+            key = keys.get(table) or natural_key(table)
+            names = columns.get(table) or [column.key for column in table.columns]
+            statements = {}
+            count = 0
+            for batch in batches(rows_by_table[table], batch_size):
+                if not isinstance(batch[0], dict):
+                    batch = [dict(zip(names, row)) for row in batch]
+                shape = tuple(batch[0])
+                statement = statements.get(shape)
+                if statement is None:
+                    statement = statements[shape] = _upsert_statement(table, shape, key)
+                count += connection.execute(statement, batch).rowcount
+            counts[table.name] = count
+    return counts
+
+
+def value_parser(column, stored=False):
+    """Function turning a text field (CSV, JSON) into the Python type of ``column``.
+
+    Values that are not strings, such as raw SQLite integers, pass through.
+    With ``stored`` the fields hold values as SQLite stores them, e.g. dumped
+    by ORMExport: columns of a TypeDecorator (ORMTypes.Cents, SmallEnum) are
+    parsed as their stored type and then decoded.
+    """
+    if stored and isinstance(column.type, TypeDecorator):
+        parse = _parser(column.type.impl_instance)
+        decode = column.type.process_result_value
+        return lambda value: decode(parse(value), None)
+    return _parser(column.type)
+
+
+def _parser(type_):
+    try:
+        python_type = type_.python_type
+    except NotImplementedError:
+        return _unchanged
+    if python_type is bool:
+        parse = _parse_bool
+    elif python_type in (datetime.datetime, datetime.date, datetime.time):
+        parse = python_type.fromisoformat
+    elif python_type in (int, float, decimal.Decimal):
+        parse = python_type
+    else:
+        return _unchanged
+    return lambda value: parse(value) if isinstance(value, str) else value
+
+
+def _unchanged(value):
+    return value
+
+
+def _parse_bool(text):
+    return text.strip().lower() in ('1', 'true', 't', 'yes')
+
+
+def read_csv(target, path):
+    """Yield the rows of a CSV file with a header line as dicts typed for ``target``.
+
+    Header names must be column keys of the table; empty fields become NULL.
+    """
+    table = _table(target)
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        parsers = [value_parser(table.c[name]) for name in header]
+        for record in reader:
+            yield {name: parse(value) if value != '' else None
+                   for name, parse, value in zip(header, parsers, record)}
@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import Table, event, inspect
+from sqlalchemy.orm import loading
+from sqlalchemy.sql.util import find_tables
+from sqlalchemy.types import TypeEngine
+
+# Read-through cache for ORM SELECTs. Results are stored frozen, keyed on the
+# compiled SQL plus its parameters, together with the generation of every
+# table the compiled statement reads. Writes flushed through an attached
+# session bump the generation of the tables they touch, and of the tables a
+# trigger on them writes to (listed in table.info['trigger_writes'], see
+# ORMRatings), so invalidation is O(1) and stale entries are dropped when next
+# looked up or evicted.
+#
+# Writes that bypass the session (Core statements on a raw connection, other
+# processes) are not seen: call QueryCache.invalidate() or rely on the TTL.
+#
+# A miss costs more than running the statement uncached (the cache key, and
+# freezing and replaying the rows), and entity hits are merged into the
+# session, which costs about as much as loading them. Mark statements with
+# cached() that read rows of tables written far less often than they are read;
+# with cache_all, lookups on busy tables mostly miss and come out slower.
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 300.0
+
+
+class _LRU(OrderedDict):
+    # Per-statement side table of QueryCache, bounded like its entries. Used
+    # under QueryCache._lock: a lookup reorders the dict.
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        if value is not default:
+            self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+def cached(statement, enabled=True):
+    """Mark ``statement`` to be served from (or kept out of) the attached caches."""
+    return statement.execution_options(query_cache=enabled)
+
+
+class QueryCache:
+    """LRU cache of frozen ORM results, bounded by ``maxsize`` entries and ``ttl`` seconds."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires, table generations, frozen result)
+        self._generations = {}  # table name -> number of invalidations
+        # statement cache key -> (SQL, names of the tables it reads, returns entities); keyed
+        # per statement rather than per entry, and bounded by maxsize too
+        self._statements = _LRU(maxsize)
+        self._lock = threading.Lock()
+
+    def attach(self, target, cache_all=False):
+        """Serve SELECTs of sessions made by ``target`` (Session class, sessionmaker or session).
+
+        Only statements marked with ``cached()`` are cached unless
+        ``cache_all`` is set, in which case every plain ORM SELECT is, except
+        those marked ``cached(statement, False)``.
+        """
+        event.listen(target, 'do_orm_execute', lambda state: self._execute(state, cache_all))
+        event.listen(target, 'after_flush', self._after_flush)
+        event.listen(target, 'after_commit', self._after_end)
+        event.listen(target, 'after_soft_rollback', lambda session, transaction: self._after_end(session))
+        return target
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'size': len(self._entries),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._statements.clear()
+
+    def invalidate(self, *tables):
+        """Drop every entry reading one of ``tables`` (Table objects or names)."""
+        names = set()
+        for table in tables:
+            table = getattr(table, '__table__', table)
+            names.add(getattr(table, 'name', table))
+            names.update(getattr(table, 'info', {}).get('trigger_writes', ()))
+        with self._lock:
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def _generation(self, tables):
+        return tuple(self._generations.get(name, 0) for name in tables)
+
+    def _describe(self, state):
+        # The ORM adds eager-load joins at compile time, so look at the
+        # compiled Core statement rather than the one that was executed.
+        compiled = state.statement.compile(dialect=state.session.get_bind().dialect)
+        statement = getattr(getattr(compiled, 'compile_state', None), 'statement', state.statement)
+        tables = tuple(sorted({table.name for table in find_tables(statement, include_aliases=True)
+                               if isinstance(table, Table)}))
+        # Plain rows can be replayed as they are; entities must be merged
+        # into the session, which costs about as much as loading them.
+        entities = any(not isinstance(description['type'], TypeEngine)
+                       for description in state.statement.column_descriptions)
+        return str(compiled), tables, entities
+
+    def _execute(self, state, cache_all):
+        if state.is_insert or state.is_update or state.is_delete:
+            if state.is_orm_statement and getattr(state.statement, 'table', None) is not None:
+                self._pending(state.session).add(state.statement.table)
+            return None
+        options = state.execution_options
+        if not state.is_select or state.is_relationship_load or state.is_column_load:
+            return None
+        if not options.get('query_cache', cache_all):
+            return None
+        if 'yield_per' in options or options.get('stream_results'):
+            return None
+
+        cache_key = state.statement._generate_cache_key()
+        with self._lock:
+            described = self._statements.get(cache_key.key)
+        if described is None:
+            described = self._describe(state)
+            with self._lock:
+                self._statements[cache_key.key] = described
+        sql, tables, entities = described
+        # The SQL string is shared by every entry of the statement and hashes once;
+        # only the parameter values are formatted per call (repr: they may be lists).
+        parameters = state.parameters or {}
+        if cache_key.bindparams:
+            values = tuple(parameters.get(bindparam.key, bindparam.value) for bindparam in cache_key.bindparams)
+        else:
+            values = tuple(parameters[name] for name in sorted(parameters))
+        key = (sql, repr(values))
+        pending = state.session.info.get('query_cache_pending')
+        if pending and any(getattr(table, 'name', table) in tables for table in pending):
+            # The session has flushed but not committed writes to these tables
+            return None
+
+        with self._lock:
+            generation = self._generation(tables)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            elif entry is not None and entry[1] != generation:
+                del self._entries[key]
+                self.invalidations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                frozen = entry[2]
+            else:
+                self.misses += 1
+        if entry is None:
+            frozen = state.invoke_statement().freeze()
+            with self._lock:
+                # Stored with the generation read before the query ran, so a
+                # write that lands meanwhile makes the entry stale at once.
+                self._store(key, generation, frozen)
+        if not entities:
+            return frozen()
+        return loading.merge_frozen_result(state.session, state.statement, frozen, load=False)()
+
+    def _store(self, key, generation, frozen):
+        self._entries[key] = (self.clock() + self.ttl, generation, frozen)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _pending(self, session):
+        return session.info.setdefault('query_cache_pending', set())
+
+    def _after_flush(self, session, flush_context):
+        tables = self._pending(session)
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            tables.update(inspect(instance).mapper.tables)
+        self.invalidate(*tables)
+
+    def _after_end(self, session):
+        # Readers may have cached the pre-flush rows again before the commit
+        # (or the rollback) became visible, so invalidate once more.
+        tables = session.info.pop('query_cache_pending', None)
+        if tables:
+            self.invalidate(*tables)
@@ -0,0 +1,421 @@
+import argparse
+import importlib
+
+from sqlalchemy import inspect, select
+
+SCHEMAS = {
+    'ecommerce': 'ORMEcommerceDb',
+    'jobboard': 'ORMJobBoardDb',
+    'quiz': 'ORMQuizDb',
+    'travel': 'ORMTravelBookingDb',
+    'events': 'ORMEventManagementDb',
+}
+
+# schema -> (review model, rated model) pairs maintained by ORMRatings
+RATINGS = {
+    'ecommerce': ('Review', 'Product'),
+    'travel': ('Review', 'Tour'),
+}
+
+# schema -> model with an ORMSearch full-text index
+SEARCH = {
+    'ecommerce': 'Product',
+    'jobboard': 'JobPosting',
+    'travel': 'Tour',
+    'events': 'Events',
+}
+
+
+def load_schema(name):
+    return importlib.import_module(SCHEMAS[name])
+
+
+def cmd_seed(args):
+    for name in args.schemas or SCHEMAS:
+        module = load_schema(name)
+        session = module.get_session(args.uri or module.DATABASE_URI)
+        try:
+            module.seed(session)
+        finally:
+            session.close()
+        print(f"Seeded {name}")
+
+
+def cmd_crud(args):
+    module = load_schema('quiz')
+    session = module.get_session(args.uri or module.DATABASE_URI)
+    try:
+        module.crud_example(session)
+    finally:
+        session.close()
+
+
+def cmd_explain(args):
+    import ORMQueryPlans
+
+    failures = ORMQueryPlans.check_query_plans([SCHEMAS[name] for name in args.schemas])
+    for schema, label, plan, expected in failures:
+        print(f"{schema}: '{label}' does not use {' or '.join(expected)}")
+        for step in plan:
+            print(f"    {step}")
+    if failures:
+        raise SystemExit(1)
+    print('All hot queries use their indexes')
+
+
+def cmd_ratings(args):
+    import ORMRatings
+
+    drifted_total = 0
+    for name in args.schemas or RATINGS:
+        module = load_schema(name)
+        reviews, target = (getattr(module, model).__table__ for model in RATINGS[name])
+        with module.get_engine(args.uri or module.DATABASE_URI).begin() as connection:
+            if args.rebuild:
+                count = ORMRatings.rebuild_ratings(connection, reviews, target)
+                print(f"{name}: rebuilt rating aggregates of {count} {target.name}")
+            drifted = ORMRatings.check_ratings(connection, reviews, target)
+        for key, stored, actual in drifted:
+            print(f"{name}: {target.name} {key} stores {stored}, reviews give {actual}")
+        if not drifted:
+            print(f"{name}: rating aggregates are consistent")
+        drifted_total += len(drifted)
+    if drifted_total:
+        raise SystemExit(1)
+
+
+def cmd_grade(args):
+    import ORMGrading
+
+    module = load_schema('quiz')
+    with module.get_engine(args.uri or module.DATABASE_URI).begin() as connection:
+        quiz_ids = None
+        if args.quiz_codes:
+            quiz_ids = [quiz_id for (quiz_id,) in connection.execute(
+                select(module.Quiz.quiz_id).where(module.Quiz.quiz_code.in_(args.quiz_codes)))]
+        if not args.check:
+            print(f"Graded {ORMGrading.grade(connection, quiz_ids)} new or changed results")
+        drifted = ORMGrading.check_grades(connection, quiz_ids)
+    for quiz_id, student_id, stored, actual in drifted:
+        print(f"quiz {quiz_id} student {student_id}: stored score {stored}, answers give {actual}")
+    if drifted:
+        raise SystemExit(1)
+    print('All results match the answers')
+
+
+def cmd_inbox(args):
+    import ORMInbox
+
+    module = load_schema('jobboard')
+    with module.get_engine(args.uri or module.DATABASE_URI).begin() as connection:
+        if args.rebuild:
+            ORMInbox.rebuild_inbox(connection, module.Message)
+            print('Rebuilt the unread counters and conversations from the messages')
+        drifted = ORMInbox.check_inbox(connection, module.Message)
+    for table, key, stored, actual in drifted:
+        print(f"{table} {key}: stores {stored}, messages give {actual}")
+    if drifted:
+        raise SystemExit(1)
+    print('Unread counters and conversations match the messages')
+
+
+def cmd_search(args):
+    import ORMSearch
+
+    module = load_schema(args.schema)
+    model = getattr(module, SEARCH[args.schema])
+    uri = args.uri or module.DATABASE_URI
+    if args.rebuild:
+        with module.get_engine(uri).begin() as connection:
+            ORMSearch.rebuild(connection, model.__table__)
+        print(f"{args.schema}: rebuilt the full-text index of {model.__table__.name}")
+    if args.terms:
+        session = module.get_session(uri)
+        try:
+            columns = model.__table__.info['search_columns']
+            for item in ORMSearch.search(session, model, ' '.join(args.terms), limit=args.limit, prefix=args.prefix):
+                key = ', '.join(str(value) for value in inspect(item).identity)
+                print(f"{key}: " + ' | '.join(str(getattr(item, column)) for column in columns))
+        finally:
+            session.close()
+
+
+def cmd_sync(args):
+    import ORMBulkLoad
+
+    module = load_schema(args.schema)
+    model = getattr(module, args.model, None)
+    if model is None or not hasattr(model, '__table__'):
+        raise SystemExit(f"{args.schema} has no model {args.model}")
+    keys = {model: args.key} if args.key else None
+    counts = ORMBulkLoad.upsert(module.get_engine(args.uri or module.DATABASE_URI),
+                                {model: ORMBulkLoad.read_csv(model, args.file)},
+                                keys=keys, batch_size=args.batch_size)
+    print(f"{args.schema}: {counts[model.__table__.name]} {model.__table__.name} rows inserted or changed")
+
+
+def cmd_purge(args):
+    import datetime
+
+    import ORMSoftDelete
+
+    module = load_schema(args.schema)
+    model = getattr(module, args.model, None)
+    if model is None or not model.__table__.info.get('soft_delete'):
+        raise SystemExit(f"{args.schema} has no soft-delete model {args.model}")
+    purged = ORMSoftDelete.purge(module.get_engine(args.uri or module.DATABASE_URI), model,
+                                 datetime.timedelta(days=args.days), batch_size=args.batch_size,
+                                 archive=not args.no_archive)
+    table = model.__table__.name
+    archived = '' if args.no_archive else f' (copied to {table}_archive)'
+    print(f"{args.schema}: purged {purged} {table} rows deleted more than {args.days:g} days ago{archived}")
+
+
+def cmd_archive(args):
+    import datetime
+
+    import ORMArchive
+
+    module = load_schema(args.schema)
+    model = getattr(module, args.model, None)
+    if model is None or 'archive_by' not in model.__table__.info:
+        raise SystemExit(f"{args.schema} has no archivable model {args.model}")
+    engine = module.get_engine(args.uri or module.DATABASE_URI)
+    moved = ORMArchive.archive(engine, model, datetime.timedelta(days=args.days), batch_size=args.batch_size,
+                               directory=args.directory)
+    table = model.__table__.name
+    for month, count in moved.items():
+        path = ORMArchive.archive_path(engine.url.database, month, args.directory)
+        print(f"{args.schema}: moved {count} {table} rows of {month} to {path}")
+    if not moved:
+        print(f"{args.schema}: no {table} rows older than {args.days:g} days")
+
+
+def cmd_export(args):
+    import ORMExport
+
+    module = load_schema(args.schema)
+    model = getattr(module, args.model)
+    uri = args.uri or module.DATABASE_URI
+    module.get_engine(uri)
+    try:
+        shards = ORMExport.export_table(uri, model, args.directory, args.format, args.processes, args.shards)
+    except RuntimeError as exc:  # parquet without pyarrow
+        raise SystemExit(str(exc))
+    print(f"{args.schema}: wrote {sum(rows for _, rows in shards)} {model.__table__.name} rows "
+          f"to {len(shards)} {args.format} files in {args.directory}")
+
+
+def cmd_import(args):
+    import ORMExport
+
+    module = load_schema(args.schema)
+    model = getattr(module, args.model)
+    engine = module.get_engine(args.uri or module.DATABASE_URI)
+    count = ORMExport.import_files(engine, model, args.files, args.processes, upsert=args.upsert)
+    print(f"{args.schema}: loaded {count} {model.__table__.name} rows from {len(args.files)} files")
+
+
+def cmd_recommend(args):
+    import ORMRecommendations
+
+    module = load_schema('jobboard')
+    uri = args.uri or module.DATABASE_URI
+    with module.get_engine(uri).begin() as connection:
+        if args.check:
+            drifted = ORMRecommendations.check_recommendations(connection, args.user_ids or None, k=args.top)
+        else:
+            count = ORMRecommendations.refresh(connection, k=args.top, full=args.full)
+            print(f"Refreshed the recommendations of {count} users")
+            drifted = []
+    for user_id, rank, stored, actual in drifted:
+        print(f"user {user_id} rank {rank}: stored (job, score) {stored}, postings give {actual}")
+    if drifted:
+        raise SystemExit(1)
+    if args.check:
+        print('All recommendations are up to date')
+    session = module.get_session(uri)
+    try:
+        for user_id in args.user_ids:
+            jobs = ORMRecommendations.recommended_jobs(session, user_id, limit=args.limit)
+            print(f"user {user_id}: " + (', '.join(f'{job.job_id} {job.job_title}' for job in jobs) or 'nothing'))
+    finally:
+        session.close()
+
+
+def cmd_report(args):
+    import ORMColumnar
+    import ORMEngine
+    import ORMReports
+
+    module = load_schema(args.schema)
+    uri = args.uri or module.DATABASE_URI
+    module.get_engine(uri)
+    directory = args.directory or ORMColumnar.default_directory(module.get_engine(uri).url.database)
+    reader = ORMEngine.create_reader_engine(uri)
+    try:
+        with reader.connect() as connection:
+            if not args.no_export:
+                try:
+                    exported = ORMReports.export(connection, args.schema, directory, full=args.full,
+                                                 format=args.format)
+                except RuntimeError as exc:  # parquet without pyarrow
+                    raise SystemExit(str(exc))
+                for table, count in exported.items():
+                    print(f"{args.schema}: exported {count} {table} rows to {directory}")
+            drifted = ORMReports.check_reports(connection, args.schema, directory) if args.check else []
+    finally:
+        reader.dispose()
+    for name, row, expected in drifted:
+        print(f"{name}: snapshot {row}, live {expected}")
+    if drifted:
+        raise SystemExit(1)
+    if args.check:
+        print('All reports match the live tables')
+        return
+    for name, (report, _) in ORMReports.REPORTS[args.schema].items():
+        rows = report(directory)
+        print(f"\n{name} ({len(rows)} rows)")
+        for row in rows[:args.limit]:
+            print('  ' + '  '.join('' if value is None else f'{value:.2f}' if isinstance(value, float) else str(value)
+                                   for value in row))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Manage the ORM example databases.')
+    parser.add_argument('--uri', help='Override the database URI of the selected schema')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time every statement, log slow ones with their query plan and print the totals')
+    parser.add_argument('--slow-ms', type=float, default=100.0, help='Slow query threshold for --profile')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help='Create the tables and insert the sample rows')
+    seed.add_argument('schemas', nargs='*', metavar='schema',
+                      help=f"One or more of: {', '.join(SCHEMAS)} (default: all)")
+    seed.set_defaults(func=cmd_seed)
+
+    crud = commands.add_parser('crud', help='Run the quiz CRUD example')
+    crud.set_defaults(func=cmd_crud)
+
+    explain = commands.add_parser('explain', help='Check that the hot queries are served by indexes')
+    explain.add_argument('schemas', nargs='*', metavar='schema', help='Limit the check to these schemas')
+    explain.set_defaults(func=cmd_explain)
+
+    ratings = commands.add_parser('ratings', help='Check (or rebuild) the denormalized rating aggregates')
+    ratings.add_argument('schemas', nargs='*', metavar='schema', help=f"One or more of: {', '.join(RATINGS)}")
+    ratings.add_argument('--rebuild', action='store_true', help='Recompute the aggregates from the reviews first')
+    ratings.set_defaults(func=cmd_ratings)
+
+    grade = commands.add_parser('grade', help='Score quiz submissions into result')
+    grade.add_argument('quiz_codes', nargs='*', metavar='quiz_code', help='Limit grading to these quizzes')
+    grade.add_argument('--check', action='store_true', help='Only report results that disagree with the answers')
+    grade.set_defaults(func=cmd_grade)
+
+    inbox = commands.add_parser('inbox', help='Check (or rebuild) the unread counters and conversation summaries')
+    inbox.add_argument('--rebuild', action='store_true', help='Recompute them from the messages first')
+    inbox.set_defaults(func=cmd_inbox)
+
+    search = commands.add_parser('search', help='Full-text search (or re-index) a schema')
+    search.add_argument('schema', choices=SEARCH)
+    search.add_argument('terms', nargs='*', help='Words that must all appear')
+    search.add_argument('--limit', type=int, default=20)
+    search.add_argument('--prefix', action='store_true', help='Also match words starting with the terms')
+    search.add_argument('--rebuild', action='store_true', help='Re-index the existing rows first')
+    search.set_defaults(func=cmd_search)
+
+    sync = commands.add_parser('sync', help='Insert or update the rows of a CSV file, matched on their natural key')
+    sync.add_argument('schema', choices=SCHEMAS)
+    sync.add_argument('model', help='Model class name, e.g. Product')
+    sync.add_argument('file', help='CSV file whose header names the columns')
+    sync.add_argument('--key', nargs='+', metavar='column',
+                      help='Unique columns to match rows on (default: the natural key, else the primary key)')
+    sync.add_argument('--batch-size', type=int, default=10000)
+    sync.set_defaults(func=cmd_sync)
+
+    purge = commands.add_parser('purge', help='Archive and delete old soft-deleted rows in batches')
+    purge.add_argument('schema', choices=SCHEMAS)
+    purge.add_argument('model', help='Soft-delete model class name, e.g. Message')
+    purge.add_argument('--days', type=float, default=30.0, help='Only rows deleted at least this long ago')
+    purge.add_argument('--batch-size', type=int, default=1000)
+    purge.add_argument('--no-archive', action='store_true', help='Delete without copying to <table>_archive')
+    purge.set_defaults(func=cmd_purge)
+
+    archive = commands.add_parser('archive', help='Move old log rows into per-month archive databases')
+    archive.add_argument('schema', choices=SCHEMAS)
+    archive.add_argument('model', help='Archivable model class name, e.g. AdminLog')
+    archive.add_argument('--days', type=float, default=180.0, help='Only rows older than this many days')
+    archive.add_argument('--batch-size', type=int, default=5000)
+    archive.add_argument('--directory', help='Where the archive files go (default: next to the database)')
+    archive.set_defaults(func=cmd_archive)
+
+    export = commands.add_parser('export', help='Dump a table to sharded files with parallel readers')
+    export.add_argument('schema', choices=SCHEMAS)
+    export.add_argument('model', help='Model class name, e.g. JobInteraction')
+    export.add_argument('directory')
+    export.add_argument('--format', choices=('csv', 'jsonl', 'parquet'), default='csv')
+    export.add_argument('--processes', type=int, help='Reader processes (default: one per CPU)')
+    export.add_argument('--shards', type=int, help='Number of files (default: four per process)')
+    export.set_defaults(func=cmd_export)
+
+    load = commands.add_parser('import', help='Load shard files written by export, parsed in parallel')
+    load.add_argument('schema', choices=SCHEMAS)
+    load.add_argument('model', help='Model class name, e.g. JobInteraction')
+    load.add_argument('files', nargs='+')
+    load.add_argument('--processes', type=int, help='Parser processes (default: one per CPU)')
+    load.add_argument('--upsert', action='store_true', help='Update rows whose key already exists')
+    load.set_defaults(func=cmd_import)
+
+    recommend = commands.add_parser('recommend', help='Refresh (or check) the precomputed job recommendations')
+    recommend.add_argument('user_ids', nargs='*', type=int, metavar='user_id',
+                           help='Print the jobs recommended to these users')
+    recommend.add_argument('--full', action='store_true', help='Recompute every user, not only those with new activity')
+    recommend.add_argument('--check', action='store_true', help='Only report recommendations that are out of date')
+    recommend.add_argument('--top', type=int, default=20, help='Jobs kept per user')
+    recommend.add_argument('--limit', type=int, default=10, help='Jobs printed per user')
+    recommend.set_defaults(func=cmd_recommend)
+
+    report = commands.add_parser('report', help='Export sales or booking tables to column snapshots and report on them')
+    report.add_argument('schema', choices=('ecommerce', 'travel'))
+    report.add_argument('--directory', help='Snapshot directory (default: <database>.columnar next to the database)')
+    report.add_argument('--format', choices=('npy', 'parquet'), default='npy', help='Format of a new snapshot')
+    report.add_argument('--full', action='store_true', help='Rebuild the snapshot instead of exporting what changed')
+    report.add_argument('--no-export', action='store_true', help='Report on the snapshot as it is')
+    report.add_argument('--check', action='store_true', help='Only compare every report with the live SQL')
+    report.add_argument('--limit', type=int, default=10, help='Rows printed per report')
+    report.set_defaults(func=cmd_report)
+    return parser
+
+
+def print_profile(instrumentation, top=10):
+    data = instrumentation.as_dict()
+    print(f"\n{data['queries']} statements, {data['seconds'] * 1000:.1f} ms in SQLite")
+    ranked = sorted(data['statements'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+    for statement, stats in ranked[:top]:
+        print(f"{stats['seconds'] * 1000:9.2f} ms {stats['count']:7} x {stats['rows']:8} rows  {statement[:100]}")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    choices = RATINGS if args.command == 'ratings' else SCHEMAS
+    unknown = [name for name in getattr(args, 'schemas', ()) if name not in choices]
+    if unknown:
+        parser.error(f"unknown schema(s): {', '.join(unknown)}")
+    if not args.profile:
+        args.func(args)
+        return
+    import logging
+
+    import ORMInstrumentation
+
+    logging.basicConfig(format='%(message)s')
+    instrumentation = ORMInstrumentation.Instrumentation(slow_threshold=args.slow_ms / 1000).attach()
+    try:
+        args.func(args)
+    finally:
+        instrumentation.detach()
+        print_profile(instrumentation)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+import json
+import math
+import os
+import shutil
+
+import numpy as np
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric
+
+from ORMTypes import Cents, SmallEnum
+
+# Column snapshots of OLTP tables for reporting, outside the SQLite files.
+#
+# export() copies the registered columns of a table into a directory of
+# segments, one NumPy array per column (memory-mapped .npy files, or Parquet
+# when pyarrow is installed), and keeps a high-water mark in its manifest.
+# The next export only reads rows past the mark: rows with a higher primary
+# key are appended as a new segment, and for tables whose mark is an updated_at
+# style timestamp, rows stamped since the last export are rewritten in place.
+# Hard deletes are not seen; export(..., full=True) rebuilds the snapshot.
+#
+# Values are encoded for vectorized work: integers and booleans as int64 with
+# NULL_INT for NULL, floats, decimals and ORMTypes.Cents amounts as float64
+# with NaN, dates and datetimes as datetime64 with NaT, ORMTypes.SmallEnum
+# columns as their stored int8 codes, and everything else as int32 codes into
+# a per-column list of categories (NULL_CODE for NULL). Snapshot reads them
+# back and group_by() aggregates them with np.unique and np.bincount.
+#
+# The manifest is replaced atomically after the segment files are written, so
+# a Snapshot opened meanwhile sees the previous export (rows updated in place
+# excepted).
+
+FORMATS = ('npy', 'parquet')
+DEFAULT_CHUNK_SIZE = 50000
+MANIFEST = 'manifest.json'
+NULL_INT = np.iinfo(np.int64).min
+NULL_CODE = -1
+DTYPES = {'int': np.int64, 'float': np.float64, 'datetime': 'datetime64[us]', 'date': 'datetime64[D]',
+          'category': np.int32, 'enum': np.int8}
+
+
+def register(model, *columns, mark=None):
+    """Allow exporting ``columns`` of ``model`` (all by default).
+
+    ``mark`` names a timestamp the application bumps on every update, e.g.
+    ``updated_at``, best indexed: rows stamped since the last export are
+    re-read. Without it only new primary keys are picked up.
+    """
+    table = model.__table__
+    primary_key, = table.primary_key.columns
+    names = list(columns) or [column.name for column in table.columns]
+    # The primary key leads every segment, sorted, so updated rows can be found
+    names = [primary_key.name] + [name for name in names if name != primary_key.name]
+    table.info['columnar'] = {'columns': names, 'mark': mark}
+    return model
+
+
+def _spec(column):
+    # How the stored values of ``column`` are encoded, kept per column in the manifest
+    if isinstance(column.type, Cents):
+        return {'kind': 'float', 'scale': column.type.scale}
+    if isinstance(column.type, SmallEnum):
+        return {'kind': 'enum', 'categories': list(column.type.labels)}
+    kind = _kind(column)
+    return {'kind': kind, 'categories': []} if kind == 'category' else {'kind': kind}
+
+
+def _kind(column):
+    if isinstance(column.type, (Boolean, Integer)):
+        return 'int'
+    if isinstance(column.type, (Float, Numeric)):
+        return 'float'
+    if isinstance(column.type, DateTime):
+        return 'datetime'
+    if isinstance(column.type, Date):
+        return 'date'
+    return 'category'
+
+
+def _encode(spec, values):
+    kind, categories = spec['kind'], spec.get('categories')
+    if kind == 'int':
+        return np.fromiter((NULL_INT if value is None else value for value in values), np.int64, len(values))
+    if kind == 'float':
+        return np.array(values, dtype=np.float64) / 10 ** spec.get('scale', 0)
+    if kind == 'enum':
+        return np.nan_to_num(np.array(values, dtype=np.float64), nan=NULL_CODE).astype(np.int8)
+    if kind == 'datetime':
+        return np.array(values, dtype='datetime64[us]')
+    if kind == 'date':
+        return np.array(values, dtype='datetime64[D]')
+    codes = {category: code for code, category in enumerate(categories)}
+
+    def code(value):
+        if value is None:
+            return NULL_CODE
+        if value not in codes:
+            codes[value] = len(categories)
+            categories.append(value)
+        return codes[value]
+
+    return np.fromiter(map(code, values), np.int32, len(values))
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError('the parquet format needs pyarrow (pip install pyarrow)') from exc
+    return pyarrow
+
+
+def _segment_path(path, segment, format):
+    return os.path.join(path, segment if format == 'npy' else f'{segment}.parquet')
+
+
+def _write_segment(path, segment, format, arrays):
+    if format == 'npy':
+        os.makedirs(_segment_path(path, segment, format), exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, segment, f'{name}.npy'), array)
+    else:
+        pyarrow = _pyarrow()
+        pyarrow.parquet.write_table(pyarrow.table({name: pyarrow.array(array) for name, array in arrays.items()}),
+                                    _segment_path(path, segment, format))
+
+
+def _read_segment(path, segment, format, names, writable=False):
+    if format == 'npy':
+        return {name: np.load(os.path.join(path, segment, f'{name}.npy'), mmap_mode='r+' if writable else 'r')
+                for name in names}
+    data = _pyarrow().parquet.read_table(_segment_path(path, segment, format), columns=names)
+    return {name: np.array(data.column(name).to_numpy(), copy=writable) for name in names}
+
+
+def _manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _save_manifest(path, manifest):
+    temporary = os.path.join(path, MANIFEST + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+    os.replace(temporary, os.path.join(path, MANIFEST))
+
+
+def default_directory(database):
+    """Snapshot directory next to ``database`` (a file name): ORMEcommerceDb.db -> ORMEcommerceDb.columnar."""
+    return os.path.splitext(database)[0] + '.columnar'
+
+
+def snapshot_path(directory, model):
+    return os.path.join(directory, model.__table__.name)
+
+
+def export(connection, model, directory, format='npy', full=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Bring the snapshot of ``model`` in ``directory`` up to date; returns the number of rows read.
+
+    ``connection`` only reads, so it can come from
+    ORMEngine.create_reader_engine. The first export, or one with ``full``,
+    reads the whole table; the next ones only what changed past the
+    high-water mark. The format of an existing snapshot is kept.
+    """
+    table = model.__table__
+    if 'columnar' not in table.info:
+        raise ValueError(f'{table.name} is not registered with ORMColumnar')
+    path = snapshot_path(directory, model)
+    manifest = None if full else _manifest(path)
+    if manifest is None:
+        if format not in FORMATS:
+            raise ValueError(f'unknown format {format!r}, expected one of {", ".join(FORMATS)}')
+        if format == 'parquet':
+            _pyarrow()  # fail before reading anything
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        manifest = {'format': format, 'mark': table.info['columnar']['mark'], 'rows': 0, 'last_key': None,
+                    'high_water': None, 'segments': [], 'columns': {}}
+        for name in table.info['columnar']['columns']:
+            manifest['columns'][name] = _spec(table.c[name])
+    format, mark, columns = manifest['format'], manifest['mark'], manifest['columns']
+    primary_key, = table.primary_key.columns
+    names = list(columns)
+    quote = connection.dialect.identifier_preparer.quote
+    sql = f'SELECT {", ".join(quote(name) for name in names + ([mark] if mark else []))} FROM {quote(table.name)}'
+    parameters = ()
+    if manifest['last_key'] is not None:
+        sql += f' WHERE {quote(primary_key.name)} > ?'
+        parameters = (manifest['last_key'],)
+        if mark and manifest['high_water'] is not None:
+            # >= re-reads the rows stamped in the same tick as the mark, harmlessly
+            sql += f' OR {quote(mark)} >= ?'
+            parameters += (manifest['high_water'],)
+    sql += f' ORDER BY {quote(primary_key.name)}'
+
+    chunks = {name: [] for name in names}
+    high_water = manifest['high_water']
+    count = 0
+    for chunk in connection.exec_driver_sql(sql, parameters).partitions(chunk_size):
+        values = list(zip(*chunk))
+        for name, column in zip(names, values):
+            chunks[name].append(_encode(columns[name], column))
+        if mark:
+            stamps = [stamp for stamp in values[-1] if stamp is not None]
+            if stamps and (high_water is None or max(stamps) > high_water):
+                high_water = max(stamps)
+        count += len(chunk)
+    if count:
+        arrays = {name: np.concatenate(chunks[name]) for name in names}
+        keys = arrays[primary_key.name]
+        # Rows already in a segment are overwritten there, the rest form a new one
+        fresh = np.ones(len(keys), dtype=bool)
+        for segment in manifest['segments']:
+            stored = _read_segment(path, segment['name'], format, names, writable=True)
+            existing = stored[primary_key.name]
+            positions = np.searchsorted(existing, keys).clip(max=len(existing) - 1)
+            found = fresh & (existing[positions] == keys)
+            if not found.any():
+                continue
+            for name in names:
+                stored[name][positions[found]] = arrays[name][found]
+            if format == 'npy':
+                for array in stored.values():
+                    array.flush()
+            else:
+                _write_segment(path, segment['name'], format, stored)
+            fresh &= ~found
+        if fresh.any():
+            segment = f'{len(manifest["segments"]):05d}'
+            _write_segment(path, segment, format, {name: arrays[name][fresh] for name in names})
+            manifest['segments'].append({'name': segment, 'rows': int(fresh.sum())})
+            manifest['rows'] += int(fresh.sum())
+        last_key = int(keys[-1])
+        manifest['last_key'] = last_key if manifest['last_key'] is None else max(last_key, manifest['last_key'])
+        manifest['high_water'] = high_water
+    _save_manifest(path, manifest)
+    return count
+
+
+class Snapshot:
+    """Read side of an exported table: memory-mapped column arrays and their categories."""
+
+    def __init__(self, directory, model):
+        self.path = snapshot_path(directory, model)
+        self.manifest = _manifest(self.path)
+        if self.manifest is None:
+            raise FileNotFoundError(f'no snapshot of {model.__table__.name} in {directory}, run export() first')
+        self.rows = self.manifest['rows']
+        self._columns = {}
+
+    def column(self, name):
+        """Values of column ``name`` across all segments, in primary key order per segment."""
+        if name not in self._columns:
+            parts = [_read_segment(self.path, segment['name'], self.manifest['format'], [name])[name]
+                     for segment in self.manifest['segments']]
+            if not parts:
+                parts = [np.empty(0, DTYPES[self.manifest['columns'][name]['kind']])]
+            self._columns[name] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return self._columns[name]
+
+    def categories(self, name):
+        return self.manifest['columns'][name]['categories']
+
+    def decode(self, name, codes):
+        """Python values of ``codes`` (or integers, dates) of column ``name``; NULL becomes None."""
+        kind = self.manifest['columns'][name]['kind']
+        if kind in ('category', 'enum'):
+            categories = self.categories(name)
+            return [None if code == NULL_CODE else categories[code] for code in codes.tolist()]
+        if kind == 'int':
+            return [None if value == NULL_INT else value for value in codes.tolist()]
+        return codes.tolist()
+
+
+def group_by(keys, values=None, where=None):
+    """Count rows, and sum ``values``, per distinct combination of the ``keys`` arrays.
+
+    ``where`` is a boolean mask of the rows to take. NULL values add nothing,
+    as in SQL. Returns ``(key arrays, counts, sums)`` with one
+    entry per group; ``sums`` is None without ``values``.
+    """
+    if where is not None:
+        keys = [key[where] for key in keys]
+        values = None if values is None else values[where]
+    if values is not None:
+        values = np.where(values == NULL_INT, 0, values) if values.dtype == np.int64 else np.nan_to_num(values)
+    # Dense group number: the position of the row's keys in the product of the distinct values of every key
+    codes = np.zeros(len(keys[0]), dtype=np.int64)
+    uniques = []
+    for key in keys:
+        unique, inverse = np.unique(key, return_inverse=True)
+        uniques.append(unique)
+        codes = codes * len(unique) + inverse.ravel()
+    sizes = [len(unique) for unique in uniques]
+    space = math.prod(sizes)
+    if space <= 4 * len(codes) + 1024:
+        # Small enough to count straight into, no second sort
+        counts = np.bincount(codes, minlength=space)
+        groups = np.flatnonzero(counts)
+        counts = counts[groups]
+        sums = None if values is None else np.bincount(codes, weights=values, minlength=space)[groups]
+    else:
+        groups, codes = np.unique(codes, return_inverse=True)
+        counts = np.bincount(codes, minlength=len(groups))
+        sums = None if values is None else np.bincount(codes, weights=values, minlength=len(groups))
+    positions = np.unravel_index(groups, sizes)
+    return [unique[position] for unique, position in zip(uniques, positions)], counts, sums
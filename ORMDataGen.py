@@ -0,0 +1,219 @@
+import datetime
+import random
+
+import ORMBulkLoad
+import ORMEcommerceDb as ecommerce
+import ORMEventManagementDb as events
+import ORMJobBoardDb as jobboard
+import ORMQuizDb as quiz
+import ORMTravelBookingDb as travel
+
+# Seeded synthetic data for every schema. Row counts are the SIZES below
+# multiplied by `scale`; ids are assigned explicitly from 1, so generated rows
+# only reference rows that exist and the same (scale, seed) always produces
+# the same database.
+
+SIZES = {
+    'ecommerce': {'users': 2000, 'products': 2000, 'orders': 10000, 'reviews': 10000},
+    'jobboard': {'users': 2000, 'postings': 5000, 'messages': 50000, 'applications': 10000, 'interactions': 20000},
+    'quiz': {'teachers': 50, 'students': 2000, 'quizzes': 20, 'questions_per_quiz': 20, 'quizzes_per_student': 2},
+    'travel': {'users': 2000, 'tours': 500, 'bookings': 10000, 'reviews': 5000, 'admin_logs': 5000},
+    'events': {'admins': 10, 'users': 2000, 'events': 200, 'agenda_per_event': 3, 'invited_per_event': 50},
+}
+
+EPOCH = datetime.datetime(2024, 1, 1)
+WORDS = ('design build maintain scalable services with teams across product support customers deliver '
+         'features testing deployment pipelines databases remote hybrid office travel mentoring reviews '
+         'automation monitoring performance documentation').split()
+SKILLS = ['Python', 'Java', 'SQL', 'JavaScript', 'React', 'Go', 'Rust', 'C++', 'C#', 'Kubernetes',
+          'AWS', 'Docker', 'HTML', 'CSS', 'NoSQL', 'Spark', 'Django', 'Flask', 'Linux', 'Terraform']
+CITIES = ['New York', 'San Francisco', 'Austin', 'Seattle', 'Boston', 'Denver', 'Chicago', 'Remote']
+CATEGORIES = ['Electronics', 'Books', 'Home', 'Garden', 'Toys', 'Sports', 'Fashion', 'Beauty']
+TITLES = ['Python Developer', 'Java Engineer', 'Frontend Developer', 'Data Scientist', 'DevOps Engineer',
+          'Security Analyst', 'QA Engineer', 'Cloud Architect', 'Mobile Developer', 'Product Manager']
+
+
+def sizes(schema, scale=1.0):
+    """Row counts for ``schema`` at ``scale``; ratios such as per-quiz counts are not scaled."""
+    return {name: count if name.endswith(('_per_quiz', '_per_student', '_per_event')) else max(1, int(count * scale))
+            for name, count in SIZES[schema].items()}
+
+
+def _text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+def _moment(rng, days=365):
+    return EPOCH + datetime.timedelta(seconds=rng.randrange(days * 86400))
+
+
+def _ecommerce(rng, n):
+    prices = {product_id: round(rng.uniform(5, 2000), 2) for product_id in range(1, n['products'] + 1)}
+    lines_seed = rng.randrange(2 ** 32)
+
+    def lines(order_id):
+        # (product_id, quantity) of an order, drawn from its own generator so the
+        # orders (for their totals) and the order items can be generated apart
+        order_rng = random.Random(lines_seed + order_id)
+        products = order_rng.sample(range(1, n['products'] + 1), k=min(n['products'], order_rng.randint(1, 4)))
+        return [(product_id, order_rng.randint(1, 3)) for product_id in products]
+
+    def orders():
+        for order_id in range(1, n['orders'] + 1):
+            total = round(sum(quantity * prices[product_id] for product_id, quantity in lines(order_id)), 2)
+            yield {'order_id': order_id, 'user_id': rng.randint(1, n['users']), 'total_amount': total,
+                   'status': rng.choice(('PENDING', 'PAID', 'SHIPPED', 'DELIVERED')), 'created_at': _moment(rng)}
+
+    def order_items():
+        item_id = 0
+        for order_id in range(1, n['orders'] + 1):
+            for product_id, quantity in lines(order_id):
+                item_id += 1
+                yield {'order_item': item_id, 'order_id': order_id, 'product_id': product_id,
+                       'quantity': quantity, 'price': prices[product_id]}
+
+    return {
+        ecommerce.User: ({'user_id': i, 'name': f'User {i}', 'password': 'x', 'address': f'{i} Main St',
+                          'phone': f'555{i:07d}', 'role': 'customer'} for i in range(1, n['users'] + 1)),
+        ecommerce.Product: ({'product_id': i, 'name': f'{rng.choice(CATEGORIES)} item {i}', 'brand': f'Brand{i % 50}',
+                             'description': _text(rng, 12), 'price': prices[i], 'stock': rng.randint(50, 500),
+                             'category': rng.choice(CATEGORIES), 'sku': f'SKU{i:07d}'}
+                            for i in range(1, n['products'] + 1)),
+        ecommerce.Order: orders(),
+        ecommerce.OrderItem: order_items(),
+        ecommerce.Review: ({'review_id': i, 'user_id': rng.randint(1, n['users']),
+                            'product_id': rng.randint(1, n['products']), 'rating': rng.randint(1, 5),
+                            'comment': _text(rng, 8)} for i in range(1, n['reviews'] + 1)),
+    }
+
+
+def _jobboard(rng, n):
+    users = n['users']
+    return {
+        jobboard.Authentication: ({'authentication_id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+                                   'password_hash': 'x', 'role': 'employer' if i % 10 == 0 else 'job_seeker',
+                                   'stock': 0, 'deleted_at': None} for i in range(1, users + 1)),
+        jobboard.User: ({'user_id': i, 'authentication_id': i, 'name': f'User {i}',
+                         'skills': ', '.join(rng.sample(SKILLS, k=rng.randint(2, 6))),
+                         'work_experience': f'{rng.randint(0, 20)} years'} for i in range(1, users + 1)),
+        jobboard.JobPosting: ({'job_id': i, 'employer_id': rng.randrange(10, users + 1, 10) if users >= 10 else 1,
+                               'job_title': rng.choice(TITLES),
+                               'job_description': f"{_text(rng, 15)} {' '.join(rng.sample(SKILLS, k=3))}",
+                               'location': rng.choice(CITIES), 'category': rng.choice(('IT', 'Finance', 'Sales')),
+                               'industry': 'Software', 'min_salary': 50000 + 1000 * rng.randrange(50),
+                               'max_salary': 110000 + 1000 * rng.randrange(50), 'created_at': _moment(rng),
+                               'deleted_at': None} for i in range(1, n['postings'] + 1)),
+        jobboard.Message: ({'message_id': i, 'sender_id': rng.randint(1, users), 'recipient_id': rng.randint(1, users),
+                            'message': _text(rng, 10), 'is_read': rng.random() < 0.7, 'message_type': 'TEXT',
+                            'send_at': _moment(rng), 'deleted_at': None} for i in range(1, n['messages'] + 1)),
+        jobboard.Applications: ({'application_id': i, 'job_seeker_id': rng.randint(1, users),
+                                 'job_id': rng.randint(1, n['postings']),
+                                 'status': rng.choice(('PENDING', 'ACCEPTED', 'REJECTED')), 'resume': f'resume{i}.pdf',
+                                 'deleted_at': None} for i in range(1, n['applications'] + 1)),
+        jobboard.JobInteraction: ({'interaction_id': i, 'user_id': rng.randint(1, users),
+                                   'job_id': rng.randint(1, n['postings']), 'interaction_type': rng.randint(1, 3),
+                                   'interaction_date': _moment(rng), 'is_applied': rng.random() < 0.2}
+                                  for i in range(1, n['interactions'] + 1)),
+    }
+
+
+def _quiz(rng, n):
+    teachers, students = n['teachers'], n['students']
+    per_quiz = n['questions_per_quiz']
+    questions = n['quizzes'] * per_quiz
+    keys, options = {}, []
+    for question_id in range(1, questions + 1):
+        if question_id % 5 == 0:
+            keys[question_id] = f'answer {question_id}'
+            options.append({'question_id': question_id, 'option_text': keys[question_id], 'is_correct': True})
+            continue
+        correct = rng.randrange(4)
+        keys[question_id] = f'choice {correct}'
+        options += [{'question_id': question_id, 'option_text': f'choice {choice}', 'is_correct': choice == correct}
+                    for choice in range(4)]
+
+    def answers():
+        answer_id = 0
+        for student_id in range(teachers + 1, teachers + students + 1):
+            for quiz_id in rng.sample(range(1, n['quizzes'] + 1), k=min(n['quizzes'], n['quizzes_per_student'])):
+                for question_id in range((quiz_id - 1) * per_quiz + 1, quiz_id * per_quiz + 1):
+                    answer_id += 1
+                    text = keys[question_id] if rng.random() < 0.7 else f'choice {rng.randrange(4)}'
+                    yield {'answer_id': answer_id, 'question_id': question_id, 'student_id': student_id,
+                           'answer_text': rng.choice((text, text.upper(), f' {text} '))}
+
+    return {
+        quiz.User: ({'user_id': i, 'name': f'User {i}', 'email': f'user{i}@example.com', 'password': 'x',
+                     'role': 'teacher' if i <= teachers else 'student'} for i in range(1, teachers + students + 1)),
+        quiz.Quiz: ({'quiz_id': i, 'title': f'Quiz {i}', 'quiz_code': f'QZ{i:05d}',
+                     'teacher_id': rng.randint(1, teachers), 'duration': 30} for i in range(1, n['quizzes'] + 1)),
+        quiz.Question: ({'question_id': i, 'quiz_id': (i - 1) // per_quiz + 1, 'question_text': f'Question {i}',
+                         'question_type': 'short answer' if i % 5 == 0 else 'MCQ'} for i in range(1, questions + 1)),
+        quiz.Option: ({'option_id': i, **option} for i, option in enumerate(options, 1)),
+        quiz.Answer: answers(),
+    }
+
+
+def _travel(rng, n):
+    users, tours = n['users'], n['tours']
+    starts = {i: datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randrange(365)) for i in range(1, tours + 1)}
+    prices = {i: rng.randrange(50, 500) for i in range(1, tours + 1)}
+    bookings = [(i, rng.randint(1, users), rng.randint(1, tours), rng.randint(1, 4))
+                for i in range(1, n['bookings'] + 1)]
+    return {
+        travel.User: ({'user_id': i, 'username': f'user{i}', 'password_hash': 'x', 'email': f'user{i}@example.com',
+                       'first_name': 'First', 'last_name': f'Last{i}',
+                       'user_role': 'ADMIN' if i % 100 == 1 else 'USERS', 'deleted_at': None}
+                      for i in range(1, users + 1)),
+        travel.Tour: ({'tour_id': i, 'tour_name': f'Tour {i}', 'description': _text(rng, 12), 'price': prices[i],
+                       'start_date': starts[i], 'end_date': starts[i] + datetime.timedelta(days=7),
+                       'seats_available': rng.randint(200, 2000), 'deleted_at': None} for i in range(1, tours + 1)),
+        travel.Booking: ({'booking_id': i, 'user_id': user_id, 'tour_id': tour_id, 'seats_booked': seats,
+                          'travel_date': starts[tour_id], 'total_amount': prices[tour_id] * seats,
+                          'payment_status': 'SUCCESS', 'booking_date': _moment(rng)}
+                         for i, user_id, tour_id, seats in bookings),
+        travel.Payment: ({'payment_id': i, 'booking_id': i, 'amount': prices[tour_id] * seats,
+                          'payment_method': 'GCASH', 'payment_status': 'SUCCESS', 'transaction_id': f'TRANS{i:08d}'}
+                         for i, _, tour_id, seats in bookings),
+        travel.Review: ({'review_id': i, 'user_id': rng.randint(1, users), 'tour_id': rng.randint(1, tours),
+                         'rating': rng.randint(1, 5), 'comment': _text(rng, 8)} for i in range(1, n['reviews'] + 1)),
+        travel.AdminLog: ({'log_id': i, 'admin_id': rng.randrange(1, users + 1, 100),
+                           'action_type': rng.choice(('CREATE', 'UPDATE', 'DELETE')), 'description': _text(rng, 6),
+                           'timestamp': _moment(rng)} for i in range(1, n['admin_logs'] + 1)),
+    }
+
+
+def _events(rng, n):
+    per_event = n['invited_per_event']
+    return {
+        events.Admin: ({'admin_id': i, 'admin_username': f'admin{i}', 'admin_email': f'admin{i}@example.com',
+                        'admin_password': 'x'} for i in range(1, n['admins'] + 1)),
+        events.User: ({'user_id': i, 'user_gmail': f'user{i}@gmail.com', 'user_password': 'x',
+                       'user_lastname': f'Last{i}'} for i in range(1, n['users'] + 1)),
+        events.Events: ({'event_id': i, 'event_title': f'Event {i}', 'event_description': _text(rng, 12),
+                         'event_address': f'{i} Event St', 'event_planner': f'Planner {i % 20}',
+                         'event_status': 'active',
+                         'event_start': (EPOCH + datetime.timedelta(days=rng.randrange(365))).date()}
+                        for i in range(1, n['events'] + 1)),
+        events.Agenda: ({'agenda_id': (event_id - 1) * n['agenda_per_event'] + slot + 1, 'event_id': event_id,
+                         'agenda_time_start': f'{9 + slot}:00', 'agenda_time_end': f'{10 + slot}:00'}
+                        for event_id in range(1, n['events'] + 1) for slot in range(n['agenda_per_event'])),
+        events.Invited: ({'invitation_id': (event_id - 1) * per_event + guest + 1, 'event_id': event_id,
+                          'invitation_name': f'Guest {guest + 1}', 'attendee_type': 'VIP' if guest < 5 else 'Regular',
+                          'seat_number': f'A{guest + 1}' if guest < 5 else None}
+                         for event_id in range(1, n['events'] + 1) for guest in range(per_event)),
+    }
+
+
+GENERATORS = {
+    'ecommerce': _ecommerce,
+    'jobboard': _jobboard,
+    'quiz': _quiz,
+    'travel': _travel,
+    'events': _events,
+}
+
+
+def generate(schema, bind, scale=1.0, seed=0, batch_size=ORMBulkLoad.DEFAULT_BATCH_SIZE):
+    """Fill an empty database of ``schema`` (a key of SIZES); returns the row count per table."""
+    return ORMBulkLoad.bulk_load(bind, GENERATORS[schema](random.Random(seed), sizes(schema, scale)), batch_size)
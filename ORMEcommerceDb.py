@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime, timezone
+from sqlalchemy.orm import relationship
+
+import ORMBulkLoad
+import ORMEngine
+from ORMTypes import Cents, utc_now
+
+DATABASE_URI = 'sqlite:///ORMEcommerceDb.db'
 
 Base = declarative_base()
 
@@ -13,7 +18,9 @@ class User(Base):
     address = Column(String)
     phone = Column(String)
     role = Column(String)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now(), server_default=utc_now())
+    reviews = relationship('Review', back_populates='user', passive_deletes='all')
+    orders = relationship('Order', back_populates='user', passive_deletes='all')
 
 class Product(Base):
     __tablename__ = 'products'
@@ -21,79 +28,139 @@ class Product(Base):
     name = Column(String)
     brand = Column(String)
     description = Column(String)
-    price = Column(Float)
+    price = Column(Cents())
     stock = Column(Integer)
     category = Column(String)
     sku = Column(String)
     image_url = Column(String)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now(), server_default=utc_now())
+    # Maintained from reviews by triggers, see ORMRatings
+    rating_sum = Column(Integer, nullable=False, default=0, server_default='0')
+    rating_count = Column(Integer, nullable=False, default=0, server_default='0')
+    avg_rating = Column(Float)
+    reviews = relationship('Review', back_populates='product', passive_deletes='all')
+    order_items = relationship('OrderItem', back_populates='product', passive_deletes='all')
+    __table_args__ = (
+        Index('ix_products_category_price', category, price, product_id),
+        Index('uq_products_sku', sku, unique=True),
+        {'info': {'natural_key': ('sku',)}},
+    )
 
 class Review(Base):
     __tablename__ = 'reviews'
     review_id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'))
+    user_id = Column(Integer, ForeignKey('users.user_id'), index=True)
     product_id = Column(Integer, ForeignKey('products.product_id'))
     rating = Column(Integer)
     comment = Column(Text)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now(), server_default=utc_now())
+    user = relationship('User', back_populates='reviews')
+    product = relationship('Product', back_populates='reviews')
+    __table_args__ = (
+        # Covers the product page rating aggregate without touching the table
+        Index('ix_reviews_product_rating', product_id, rating),
+    )
 
 class OrderItem(Base):
     __tablename__ = 'order_items'
     order_item = Column(Integer, primary_key=True)
-    order_id = Column(Integer)
-    product_id = Column(Integer, ForeignKey('products.product_id'))
+    order_id = Column(Integer, ForeignKey('orders.order_id'))
+    product_id = Column(Integer, ForeignKey('products.product_id'), index=True)
     quantity = Column(Integer)
-    price = Column(Float)
+    price = Column(Cents())
+    order = relationship('Order', back_populates='items')
+    product = relationship('Product', back_populates='order_items')
+    __table_args__ = (
+        Index('ix_order_items_order_product', order_id, product_id, quantity, price),
+    )
 
 class Order(Base):
     __tablename__ = 'orders'
     order_id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.user_id'))
-    total_amount = Column(Float)
+    total_amount = Column(Cents())
     status = Column(String)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-
-engine = create_engine('sqlite:///ORMEcommerceDb.db')
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
-session = Session()
-
-session.add_all([
-    User(password='pass1', name='Alice', address='123 Main St', phone='1234567890', role='customer'),
-    User(password='pass2', name='Bob', address='456 Elm St', phone='0987654321', role='seller'),
-    User(password='pass3', name='Charlie', address='789 Maple St', phone='5432167890', role='customer'),
-    User(password='pass4', name='Diana', address='321 Oak St', phone='4567890123', role='admin'),
-    User(password='pass5', name='Ethan', address='654 Pine St', phone='6789012345', role='customer'),
-
-    Product(name='Laptop', brand='BrandA', description='Gaming Laptop', price=1200.00, stock=10,
-            category='Electronics', sku='LAP123', image_url='https://example.com/laptop.jpg'),
-    Product(name='Phone', brand='BrandB', description='Smartphone', price=700.00, stock=20,
-            category='Electronics', sku='PHO456', image_url='https://example.com/phone.jpg'),
-    Product(name='Tablet', brand='BrandC', description='Android Tablet', price=300.00, stock=15,
-            category='Electronics', sku='TAB789', image_url='https://example.com/tablet.jpg'),
-    Product(name='Headphones', brand='BrandD', description='Wireless Headphones', price=150.00, stock=25,
-            category='Electronics', sku='HEA012', image_url='https://example.com/headphones.jpg'),
-    Product(name='Smartwatch', brand='BrandE', description='Fitness Tracker', price=200.00, stock=30,
-            category='Electronics', sku='SMA345', image_url='https://example.com/smartwatch.jpg'),
-
-    Review(user_id=1, product_id=1, rating=5, comment='Excellent laptop!'),
-    Review(user_id=2, product_id=2, rating=4, comment='Very good phone.'),
-    Review(user_id=3, product_id=3, rating=3, comment='Average tablet.'),
-    Review(user_id=4, product_id=4, rating=5, comment='Love these headphones!'),
-    Review(user_id=5, product_id=5, rating=4, comment='Great smartwatch.'),
-
-    OrderItem(order_id=1, product_id=1, quantity=1, price=1200.00),
-    OrderItem(order_id=1, product_id=2, quantity=2, price=1400.00),
-    OrderItem(order_id=2, product_id=3, quantity=1, price=300.00),
-    OrderItem(order_id=2, product_id=4, quantity=3, price=450.00),
-    OrderItem(order_id=3, product_id=5, quantity=1, price=200.00),
-
-    Order(user_id=1, total_amount=2800.00, status='Completed'),
-    Order(user_id=3, total_amount=300.00, status='Pending'),
-    Order(user_id=2, total_amount=450.00, status='Shipped'),
-    Order(user_id=4, total_amount=150.00, status='Delivered'),
-    Order(user_id=5, total_amount=200.00, status='Cancelled'),
-])
-
-session.commit()
-session.close()
\ No newline at end of file
+    created_at = Column(DateTime, default=utc_now(), server_default=utc_now())
+    user = relationship('User', back_populates='orders')
+    items = relationship('OrderItem', back_populates='order', passive_deletes='all')
+    __table_args__ = (
+        Index('ix_orders_user_created', user_id, created_at),
+        Index('ix_orders_status_created', status, created_at),
+    )
+
+def _feature_ddl():
+    import ORMRatings
+    import ORMSearch
+
+    return [*ORMRatings.rating_triggers(Review.__table__, Product.__table__),
+            *ORMSearch.fts_ddl(Product.__table__, ['name', 'brand', 'description'])]
+
+ORMEngine.register_ddl(Base.metadata, _feature_ddl)
+
+def get_engine(uri=DATABASE_URI):
+    return ORMEngine.get_engine(uri, Base.metadata)
+
+def get_sessionmaker(uri=DATABASE_URI):
+    get_engine(uri)
+    return ORMEngine.get_sessionmaker(uri)
+
+def get_session(uri=DATABASE_URI):
+    return get_sessionmaker(uri)()
+
+def __getattr__(name):
+    # Backwards compatible, lazily built `engine` / `Session` module attributes.
+    if name == 'engine':
+        return get_engine()
+    if name == 'Session':
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def seed(session):
+    ORMBulkLoad.upsert(session, {
+        User: [
+            dict(user_id=1, password='pass1', name='Alice', address='123 Main St', phone='1234567890', role='customer'),
+            dict(user_id=2, password='pass2', name='Bob', address='456 Elm St', phone='0987654321', role='seller'),
+            dict(user_id=3, password='pass3', name='Charlie', address='789 Maple St', phone='5432167890', role='customer'),
+            dict(user_id=4, password='pass4', name='Diana', address='321 Oak St', phone='4567890123', role='admin'),
+            dict(user_id=5, password='pass5', name='Ethan', address='654 Pine St', phone='6789012345', role='customer'),
+        ],
+        Product: [
+            dict(product_id=1, name='Laptop', brand='BrandA', description='Gaming Laptop', price=1200.00, stock=10,
+                 category='Electronics', sku='LAP123', image_url='https://example.com/laptop.jpg'),
+            dict(product_id=2, name='Phone', brand='BrandB', description='Smartphone', price=700.00, stock=20,
+                 category='Electronics', sku='PHO456', image_url='https://example.com/phone.jpg'),
+            dict(product_id=3, name='Tablet', brand='BrandC', description='Android Tablet', price=300.00, stock=15,
+                 category='Electronics', sku='TAB789', image_url='https://example.com/tablet.jpg'),
+            dict(product_id=4, name='Headphones', brand='BrandD', description='Wireless Headphones', price=150.00, stock=25,
+                 category='Electronics', sku='HEA012', image_url='https://example.com/headphones.jpg'),
+            dict(product_id=5, name='Smartwatch', brand='BrandE', description='Fitness Tracker', price=200.00, stock=30,
+                 category='Electronics', sku='SMA345', image_url='https://example.com/smartwatch.jpg'),
+        ],
+        Review: [
+            dict(review_id=1, user_id=1, product_id=1, rating=5, comment='Excellent laptop!'),
+            dict(review_id=2, user_id=2, product_id=2, rating=4, comment='Very good phone.'),
+            dict(review_id=3, user_id=3, product_id=3, rating=3, comment='Average tablet.'),
+            dict(review_id=4, user_id=4, product_id=4, rating=5, comment='Love these headphones!'),
+            dict(review_id=5, user_id=5, product_id=5, rating=4, comment='Great smartwatch.'),
+        ],
+        OrderItem: [
+            dict(order_item=1, order_id=1, product_id=1, quantity=1, price=1200.00),
+            dict(order_item=2, order_id=1, product_id=2, quantity=2, price=1400.00),
+            dict(order_item=3, order_id=2, product_id=3, quantity=1, price=300.00),
+            dict(order_item=4, order_id=2, product_id=4, quantity=3, price=450.00),
+            dict(order_item=5, order_id=3, product_id=5, quantity=1, price=200.00),
+        ],
+        Order: [
+            dict(order_id=1, user_id=1, total_amount=2800.00, status='Completed'),
+            dict(order_id=2, user_id=3, total_amount=300.00, status='Pending'),
+            dict(order_id=3, user_id=2, total_amount=450.00, status='Shipped'),
+            dict(order_id=4, user_id=4, total_amount=150.00, status='Delivered'),
+            dict(order_id=5, user_id=5, total_amount=200.00, status='Cancelled'),
+        ],
+    })
+    session.commit()
+
+if __name__ == '__main__':
+    session = get_session()
+    seed(session)
+    session.close()
@@ -0,0 +1,202 @@
+import os
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+# Applied to every new SQLite connection. Callers can tune the profile per
+# engine with get_engine(..., pragmas={...}); pass pragmas={} to keep SQLite's
+# defaults. journal_mode and mmap_size are ignored for in-memory databases.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative values are KiB: 64 MiB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+FILE_ONLY_PRAGMAS = ('journal_mode', 'mmap_size')
+
+# Engines and session factories are built on first use and cached per URI, so
+# importing a schema module never opens a connection or touches the database.
+_engines = {}
+_sessionmakers = {}
+
+
+def is_memory_uri(uri):
+    url = make_url(uri)
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+
+def create_sqlite_engine(uri, pragmas=None, **kwargs):
+    pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+    connect_args = kwargs.setdefault('connect_args', {})
+    if is_memory_uri(uri):
+        # One shared connection, otherwise every checkout sees an empty database
+        kwargs.setdefault('poolclass', StaticPool)
+        connect_args.setdefault('check_same_thread', False)
+        for name in FILE_ONLY_PRAGMAS:
+            pragmas.pop(name, None)
+    else:
+        kwargs.setdefault('poolclass', QueuePool)
+        kwargs.setdefault('pool_size', 5)
+        kwargs.setdefault('max_overflow', 10)
+    engine = create_engine(uri, **kwargs)
+    if pragmas:
+        apply_pragmas(engine, pragmas)
+    return engine
+
+
+def read_only_uri(uri):
+    """SQLite URI opening the same database file with ``mode=ro``."""
+    url = make_url(uri)
+    return f'sqlite:///file:{os.path.abspath(url.database)}?mode=ro&uri=true'
+
+
+def create_reader_engine(uri, pragmas=None, **kwargs):
+    """Engine on a read-only connection to the database of ``uri``.
+
+    The database must already be in WAL mode (any engine from get_engine
+    switches it), so readers never wait for the writer. A read-only
+    connection cannot change the journal mode, so that pragma is skipped.
+    """
+    pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+    pragmas.pop('journal_mode', None)
+    return create_sqlite_engine(read_only_uri(uri), pragmas=pragmas, **kwargs)
+
+
+def apply_pragmas(engine, pragmas):
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items()]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def get_engine(uri, metadata=None, **kwargs):
+    engine = _engines.get(uri)
+    if engine is None:
+        if make_url(uri).get_backend_name() == 'sqlite':
+            engine = create_sqlite_engine(uri, **kwargs)
+        else:
+            engine = create_engine(uri, **kwargs)
+        if metadata is not None:
+            sync_schema(engine, metadata)
+        _engines[uri] = engine
+    return engine
+
+
+def register_ddl(metadata, *statements):
+    """Attach idempotent DDL (triggers, virtual tables...) that sync_schema runs after the tables.
+
+    A statement can also be a function returning statements, called on the
+    first sync, so schema modules do not import the feature modules building
+    them (and the table.info those set) until a database is opened.
+    """
+    metadata.info.setdefault('ddl', []).extend(statements)
+
+
+def registered_ddl(metadata):
+    """The DDL registered on ``metadata``, with the deferred statements built."""
+    ddl = metadata.info.setdefault('ddl', [])
+    ddl[:] = [statement for item in ddl for statement in ([item] if isinstance(item, str) else item())]
+    return ddl
+
+
+def sync_schema(engine, metadata):
+    with engine.begin() as connection:
+        sync_schema_on(connection, metadata)
+
+
+def sync_schema_on(connection, metadata):
+    # create_all() skips tables that already exist, including their columns and
+    # indexes, so columns and indexes added to a model later are created here
+    # for existing databases. Added columns must be nullable or have a
+    # constant server_default, as required by ALTER TABLE ... ADD COLUMN.
+    # Tables with columns whose storage type changed are rebuilt, see
+    # migrate_column_types().
+    statements = registered_ddl(metadata)
+    existing = {(table.schema, table.name) for table in metadata.sorted_tables
+                if inspect(connection).has_table(table.name, schema=table.schema)}
+    metadata.create_all(connection)
+    for table in metadata.sorted_tables:
+        if (table.schema, table.name) in existing:
+            present = {column['name'] for column in inspect(connection).get_columns(table.name, schema=table.schema)}
+            for column in table.columns:
+                if column.name not in present:
+                    ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                    name = connection.dialect.identifier_preparer.format_table(table)
+                    connection.exec_driver_sql(f'ALTER TABLE {name} ADD COLUMN {ddl}')
+            migrate_column_types(connection, table)
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def migrate_column_types(connection, table):
+    """Rebuild ``table`` if a column whose type has ``migrate_sql`` (see ORMTypes) is still declared otherwise.
+
+    SQLite cannot change the type of a column, so the table is copied into a
+    new one declared from the model, converting those columns with their
+    ``migrate_sql``, and swapped in; its indexes and triggers are dropped
+    with the old table and recreated by sync_schema. Runs inside the
+    caller's transaction, which needs foreign key enforcement off (SQLite's
+    default). Raises ValueError before dropping anything if a value does not
+    convert. Returns whether the table was rebuilt.
+    """
+    preparer = connection.dialect.identifier_preparer
+    schema = f'{preparer.quote_schema(table.schema)}.' if table.schema else ''
+    declared = {row[1]: row[2] for row in
+                connection.exec_driver_sql(f'PRAGMA {schema}table_info({preparer.quote(table.name)})')}
+    conversions = {}
+    for column in table.columns:
+        target = column.type.compile(dialect=connection.dialect)
+        if hasattr(column.type, 'migrate_sql') and declared.get(column.name, target).upper() != target.upper():
+            conversions[column.name] = column.type.migrate_sql(preparer.quote(column.name))
+    if not conversions:
+        return False
+    if connection.exec_driver_sql('PRAGMA foreign_keys').scalar():
+        raise RuntimeError(f'rebuilding {table.name} needs PRAGMA foreign_keys=OFF')
+    name = preparer.format_table(table)
+    rebuilt = f'{schema}{preparer.quote(table.name + "__rebuild")}'
+    ddl = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(ddl.replace(f'TABLE {name} (', f'TABLE {rebuilt} (', 1))
+    names = [preparer.quote(column.name) for column in table.columns]
+    expressions = [conversions.get(column.name, quoted) for column, quoted in zip(table.columns, names)]
+    connection.exec_driver_sql(f'INSERT INTO {rebuilt} ({", ".join(names)}) '
+                               f'SELECT {", ".join(expressions)} FROM {name}')
+    counted = ', '.join(f'count({preparer.quote(column)})' for column in conversions)
+    before = connection.exec_driver_sql(f'SELECT {counted} FROM {name}').one()
+    after = connection.exec_driver_sql(f'SELECT {counted} FROM {rebuilt}').one()
+    lost = [f'{column} ({old - new} values)' for column, old, new in zip(conversions, before, after) if old != new]
+    if lost:
+        raise ValueError(f'cannot convert {table.name}: {", ".join(lost)} match no value of the new type')
+    connection.exec_driver_sql(f'DROP TABLE {name}')
+    # Triggers on other tables still name the dropped table; the legacy rename does not re-check them
+    connection.exec_driver_sql('PRAGMA legacy_alter_table=ON')
+    try:
+        connection.exec_driver_sql(f'ALTER TABLE {rebuilt} RENAME TO {preparer.quote(table.name)}')
+    finally:
+        connection.exec_driver_sql('PRAGMA legacy_alter_table=OFF')
+    return True
+
+
+def get_sessionmaker(uri, metadata=None, **kwargs):
+    factory = _sessionmakers.get(uri)
+    if factory is None:
+        factory = sessionmaker(bind=get_engine(uri, metadata, **kwargs))
+        _sessionmakers[uri] = factory
+    return factory
+
+
+def dispose_all():
+    for engine in _engines.values():
+        engine.dispose()
+    _engines.clear()
+    _sessionmakers.clear()
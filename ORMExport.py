@@ -0,0 +1,179 @@
+import csv
+import decimal
+import importlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import func, select
+from sqlalchemy.types import TypeDecorator
+
+import ORMBulkLoad
+import ORMEngine
+
+# Parallel dump and load of one table through a pool of spawned processes.
+#
+# export_table() splits the integer primary key into equal ranges and has
+# each worker stream one range over its own read-only connection into a shard
+# file. Values are written as SQLite stores them (dates as ISO text, booleans
+# as 0/1), so nothing is decoded on the way out. import_files() parses the
+# shards in the workers into the column types and funnels the rows into one
+# writer: SQLite allows a single writer, so the inserts run in the parent as
+# one batched transaction (ORMBulkLoad), overlapped with the parsing.
+#
+# CSV writes NULL as an empty field and reads empty fields back as NULL.
+# Parquet needs pyarrow, which is optional.
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+DEFAULT_CHUNK_SIZE = 10000
+SHARDS_PER_PROCESS = 4
+
+def _pool(processes):
+    return ProcessPoolExecutor(max_workers=processes or os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError('the parquet format needs pyarrow (pip install pyarrow)') from exc
+    return pyarrow
+
+
+def _arrow_type(column):
+    # Name of the pyarrow type holding the raw SQLite values of ``column``
+    type_ = column.type.impl_instance if isinstance(column.type, TypeDecorator) else column.type
+    try:
+        python_type = type_.python_type
+    except NotImplementedError:
+        return 'string'
+    if python_type in (int, bool):
+        return 'int64'
+    if python_type in (float, decimal.Decimal):
+        return 'float64'
+    if python_type is bytes:
+        return 'binary'
+    return 'string'
+
+
+def key_ranges(connection, table, shards):
+    """Split the integer primary key of ``table`` into at most ``shards`` half-open ``(low, high)`` ranges."""
+    primary_key, = table.primary_key.columns
+    low, high = connection.execute(select(func.min(primary_key), func.max(primary_key))).one()
+    if low is None:
+        return []
+    step = max(1, -(-(high - low + 1) // shards))
+    return [(start, min(start + step, high + 1)) for start in range(low, high + 1, step)]
+
+
+def _write_shard(uri, sql, low, high, names, arrow_types, path, format, chunk_size):
+    engine = ORMEngine.create_reader_engine(uri)
+    count = 0
+    with engine.connect() as connection:
+        chunks = connection.exec_driver_sql(sql, (low, high)).partitions(chunk_size)
+        if format == 'parquet':
+            pyarrow = _pyarrow()
+            schema = pyarrow.schema([(name, getattr(pyarrow, kind)()) for name, kind in zip(names, arrow_types)])
+            with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+                for chunk in chunks:
+                    writer.write_table(pyarrow.Table.from_pylist([dict(zip(names, row)) for row in chunk], schema))
+                    count += len(chunk)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as file:
+                if format == 'csv':
+                    writer = csv.writer(file)
+                    writer.writerow(names)
+                for chunk in chunks:
+                    if format == 'csv':
+                        writer.writerows(['' if value is None else value for value in row] for row in chunk)
+                    else:
+                        file.writelines(json.dumps(dict(zip(names, row))) + '\n' for row in chunk)
+                    count += len(chunk)
+    engine.dispose()
+    return path, count
+
+
+def export_table(uri, model, directory, format='csv', processes=None, shards=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Dump the table of ``model`` into shard files in ``directory``, one primary key range per shard.
+
+    Ranges are read concurrently by ``processes`` workers (one per CPU by
+    default). Returns ``(path, rows)`` for every shard, in key order.
+    """
+    if format not in FORMATS:
+        raise ValueError(f'unknown format {format!r}, expected one of {", ".join(FORMATS)}')
+    table = model.__table__
+    processes = processes or os.cpu_count()
+    if format == 'parquet':
+        _pyarrow()  # fail before starting the workers
+    arrow_types = [_arrow_type(column) for column in table.columns]
+    engine = ORMEngine.create_sqlite_engine(uri)
+    with engine.connect() as connection:
+        ranges = key_ranges(connection, table, shards or processes * SHARDS_PER_PROCESS)
+    engine.dispose()
+
+    primary_key, = table.primary_key.columns
+    names = [column.name for column in table.columns]
+    quote = engine.dialect.identifier_preparer.quote
+    sql = (f'SELECT {", ".join(quote(name) for name in names)} FROM {quote(table.name)} '
+           f'WHERE {quote(primary_key.name)} >= ? AND {quote(primary_key.name)} < ? ORDER BY {quote(primary_key.name)}')
+    os.makedirs(directory, exist_ok=True)
+    with _pool(processes) as pool:
+        futures = [pool.submit(_write_shard, uri, sql, low, high, names, arrow_types,
+                               os.path.join(directory, f'{table.name}-{number:05d}.{format}'), format, chunk_size)
+                   for number, (low, high) in enumerate(ranges)]
+        return [future.result() for future in futures]
+
+
+def _records(path):
+    # (column names, iterator of value lists) of one shard file
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            names = next(reader, [])
+            records = list(reader)
+        return names, ([None if value == '' else value for value in record] for record in records)
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        names = list(records[0]) if records else []
+        return names, ([record[name] for name in names] for record in records)
+    if path.endswith('.parquet'):
+        data = _pyarrow().parquet.read_table(path)
+        return data.column_names, (list(record.values()) for record in data.to_pylist())
+    raise ValueError(f'unknown file type: {path}')
+
+
+def _read_shard(module, table_name, path):
+    table = importlib.import_module(module).Base.metadata.tables[table_name]
+    names, records = _records(path)
+    if not names:
+        return []
+    if sorted(names) != sorted(column.name for column in table.columns):
+        raise ValueError(f'{path} does not hold exactly the columns of {table_name}')
+    # Rows come back in table column order, whatever the order in the file
+    order = [names.index(column.name) for column in table.columns]
+    parsers = [ORMBulkLoad.value_parser(column, stored=True) for column in table.columns]
+    return [tuple(None if record[position] is None else parse(record[position])
+                  for position, parse in zip(order, parsers))
+            for record in records]
+
+
+def import_files(bind, model, paths, processes=None, upsert=False, batch_size=ORMBulkLoad.DEFAULT_BATCH_SIZE):
+    """Parse shard files in parallel and insert their rows through a single writer.
+
+    Files must hold every column of the table, as export_table() writes them.
+    ``bind`` is an engine, connection or session, as for ORMBulkLoad; with
+    ``upsert`` existing rows are updated instead of rejected. Files are
+    parsed by ``processes`` workers while the parent inserts the shards
+    already parsed, in one transaction. Returns the number of rows loaded
+    (for ``upsert``, inserted or changed).
+    """
+    table = model.__table__
+    names = [column.key for column in table.columns]
+    with _pool(processes) as pool:
+        shards = pool.map(_read_shard, [model.__module__] * len(paths), [table.name] * len(paths), paths)
+        rows = (row for shard in shards for row in shard)
+        load = ORMBulkLoad.upsert if upsert else ORMBulkLoad.bulk_load
+        return load(bind, {table: rows}, batch_size=batch_size, columns={table: names})[table.name]
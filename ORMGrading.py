@@ -0,0 +1,143 @@
+import contextlib
+
+from sqlalchemy import (Column, Integer, MetaData, Table, and_, case, cast, exists, func, literal_column, or_, select,
+                        type_coerce, union_all)
+from sqlalchemy.dialects.sqlite import insert
+
+import ORMArchive
+import ORMBulkLoad
+from ORMQuizDb import Answer, Option, Question, Quiz, Result
+
+# Whole quizzes are graded in one INSERT ... SELECT ... ON CONFLICT DO UPDATE:
+# every answer is checked against the correct options of its question, the
+# distinct correctly answered questions are counted per (quiz, student) and
+# the percentage is upserted into result, relying on uq_result_quiz_student.
+#
+# Answers store text, so a choice or short answer is correct when it equals
+# the text of a correct option after trimming and lower-casing. Questions
+# without a correct option (free text nobody keyed) are not graded and do not
+# count towards the total; unanswered questions count as wrong.
+#
+# A submission is scored from all of its answers, including those
+# ORMArchive.archive() moved into month files: once there are any, grade()
+# and check_grades() copy the archived answers of the quizzes they grade into
+# a temporary table and read it together with the live one.
+
+
+# Archived answers being graded, per connection
+ARCHIVED = Table('answer_archived', MetaData(),
+                 *(Column(column.name, column.type) for column in Answer.__table__.columns), prefixes=['TEMPORARY'])
+
+
+def normalize(expression):
+    return func.lower(func.trim(expression))
+
+
+def _is_correct(answers):
+    return exists().where(
+        Option.question_id == answers.c.question_id,
+        Option.is_correct == True,
+        normalize(Option.option_text) == normalize(answers.c.answer_text),
+    )
+
+
+@contextlib.contextmanager
+def all_answers(connection, quiz_ids=None):
+    """Yield the answer table, or a subquery of it and the archived answers of ``quiz_ids`` if there are any.
+
+    The archive months are read on a connection of their own, as ATTACH
+    cannot run inside a transaction, so the caller's transaction stays open.
+    """
+    try:
+        months = ORMArchive.months(connection.engine)
+    except ValueError:  # in-memory databases have no archive files
+        months = []
+    if not months:
+        yield Answer.__table__
+        return
+    where = []
+    if quiz_ids is not None:
+        where.append(Answer.question_id.in_(
+            connection.scalars(select(Question.question_id).where(Question.quiz_id.in_(quiz_ids))).all()))
+    connection.exec_driver_sql(f'DROP TABLE IF EXISTS temp.{ARCHIVED.name}')
+    ARCHIVED.create(connection)
+    try:
+        with connection.engine.connect() as reader:
+            ORMBulkLoad.bulk_load(connection, {ARCHIVED: ORMArchive.scan(reader, Answer, *where, live=False)})
+        yield union_all(select(Answer.__table__), select(ARCHIVED)).subquery(Answer.__tablename__)
+    finally:
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS temp.{ARCHIVED.name}')
+
+
+def gradable_totals(quiz_ids=None):
+    """Subquery of ``(quiz_id, total)``: the number of gradable questions per quiz."""
+    statement = (
+        select(Question.quiz_id, func.count().label('total'))
+        .where(exists().where(Option.question_id == Question.question_id, Option.is_correct == True))
+        .group_by(Question.quiz_id)
+    )
+    if quiz_ids is not None:
+        statement = statement.where(Question.quiz_id.in_(quiz_ids))
+    return statement.subquery('totals')
+
+
+def scores(quiz_ids=None, answers=Answer.__table__):
+    """SELECT of ``(quiz_id, student_id, score, submitted_At)`` for every submission.
+
+    ``answers`` is the answer table or a subquery with its columns, see
+    all_answers(). check_grades() compares against the same SELECT, so both skip
+    answers without a student.
+    """
+    totals = gradable_totals(quiz_ids)
+    correct = func.count(func.distinct(case((_is_correct(answers), answers.c.question_id))))
+    return (
+        select(
+            Question.quiz_id,
+            answers.c.student_id,
+            # Percentage in hundredths, as Result.score stores it (ORMTypes.Cents)
+            type_coerce(cast(func.round(correct * literal_column('10000.0') / totals.c.total), Integer),
+                        Result.score.type).label('score'),
+            func.max(answers.c.submitted_At).label('submitted_At'),
+        )
+        .select_from(answers)
+        .join(Question, Question.question_id == answers.c.question_id)
+        .join(totals, totals.c.quiz_id == Question.quiz_id)
+        # Answers left without a student have nobody to grade, and NULL never conflicts on uq_result_quiz_student
+        .where(answers.c.student_id.is_not(None))
+        .group_by(Question.quiz_id, answers.c.student_id)
+    )
+
+
+def grade(connection, quiz_ids=None):
+    """Score every submission of ``quiz_ids`` (all quizzes by default) and upsert the results.
+
+    ``quiz_ids`` is a list or a SELECT of quiz ids. Returns the number of
+    result rows inserted or changed.
+    """
+    with all_answers(connection, quiz_ids) as answers:
+        statement = insert(Result).from_select(['quiz_id', 'student_id', 'score', 'submitted_At'],
+                                               scores(quiz_ids, answers))
+        statement = statement.on_conflict_do_update(
+            index_elements=[Result.quiz_id, Result.student_id],
+            set_={'score': statement.excluded.score, 'submitted_At': statement.excluded.submitted_At},
+            where=or_(Result.score.is_distinct_from(statement.excluded.score),
+                      Result.submitted_At.is_distinct_from(statement.excluded.submitted_At)),
+        )
+        return connection.execute(statement).rowcount
+
+
+def grade_codes(connection, quiz_codes):
+    """Grade the quizzes with the given ``quiz_code`` values."""
+    return grade(connection, select(Quiz.quiz_id).where(Quiz.quiz_code.in_(quiz_codes)))
+
+
+def check_grades(connection, quiz_ids=None):
+    """Return ``(quiz_id, student_id, stored, actual)`` for every result that disagrees with the answers."""
+    with all_answers(connection, quiz_ids) as answers:
+        actual = scores(quiz_ids, answers).subquery()
+        statement = (
+            select(actual.c.quiz_id, actual.c.student_id, Result.score, actual.c.score)
+            .outerjoin(Result, and_(Result.quiz_id == actual.c.quiz_id, Result.student_id == actual.c.student_id))
+            .where(Result.score.is_distinct_from(actual.c.score))
+        )
+        return [tuple(row) for row in connection.execute(statement)]
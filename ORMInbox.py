@@ -0,0 +1,188 @@
+from sqlalchemy import select, update
+
+# Inbox badge and conversation list, materialized from the message table.
+#
+# counters holds the number of live unread messages per recipient (user_id,
+# unread); conversations holds one row per participant of each conversation
+# (user_id, peer_id) with its latest live message and the messages from the
+# peer the user has not read. SQLite triggers keep both current for every
+# write path, inside the writing transaction: inserts, is_read updates, soft
+# deletes and restores (deleted_at), and hard deletes. Messages without a
+# sender or recipient are left out of the conversations.
+#
+# A message is unread when is_read = 0 and deleted_at IS NULL, the same rows
+# ix_message_live_unread covers. Conversations whose messages are all deleted
+# keep their row, with a NULL last_message_id.
+
+UNREAD = '{r}.is_read = 0 AND {r}.deleted_at IS NULL AND {r}.recipient_id IS NOT NULL'
+PAIR = '{r}.deleted_at IS NULL AND {r}.sender_id IS NOT NULL AND {r}.recipient_id IS NOT NULL'
+VIEWS = ('((user_id = {r}.sender_id AND peer_id = {r}.recipient_id) '
+         'OR (user_id = {r}.recipient_id AND peer_id = {r}.sender_id))')
+
+
+def _tables(model):
+    return model.__table__.info['inbox']
+
+
+def _add_unread(r, m, counters, conversations):
+    unread = UNREAD.format(r=r)
+    return (f"INSERT INTO {counters} (user_id, unread) SELECT {r}.recipient_id, 1 WHERE {unread} "
+            f"ON CONFLICT (user_id) DO UPDATE SET unread = unread + 1; "
+            f"UPDATE {conversations} SET unread = unread + 1 "
+            f"WHERE user_id = {r}.recipient_id AND peer_id = {r}.sender_id AND {unread};")
+
+
+def _remove_unread(r, m, counters, conversations):
+    unread = UNREAD.format(r=r)
+    return (f"UPDATE {counters} SET unread = unread - 1 WHERE user_id = {r}.recipient_id AND {unread}; "
+            f"UPDATE {conversations} SET unread = unread - 1 "
+            f"WHERE user_id = {r}.recipient_id AND peer_id = {r}.sender_id AND {unread};")
+
+
+def _ensure(r, m, counters, conversations):
+    # Both participants' rows, so the unread and latest updates have a row to hit
+    pair = PAIR.format(r=r)
+    return (f"INSERT OR IGNORE INTO {conversations} (user_id, peer_id, unread) "
+            f"SELECT {r}.sender_id, {r}.recipient_id, 0 WHERE {pair}; "
+            f"INSERT OR IGNORE INTO {conversations} (user_id, peer_id, unread) "
+            f"SELECT {r}.recipient_id, {r}.sender_id, 0 WHERE {pair};")
+
+
+def _newer(r, m, counters, conversations):
+    return (f"UPDATE {conversations} SET last_message_id = {r}.message_id, last_send_at = {r}.send_at "
+            f"WHERE {VIEWS.format(r=r)} AND {PAIR.format(r=r)} AND (last_message_id IS NULL "
+            f"OR (coalesce({r}.send_at, ''), {r}.message_id) > (coalesce(last_send_at, ''), last_message_id));")
+
+
+def _recompute(r, m, counters, conversations, where='1'):
+    # Latest live message of the conversation, through ix_message_live_conversation
+    return (f"UPDATE {conversations} SET (last_message_id, last_send_at) = ("
+            f"SELECT message_id, send_at FROM {m} WHERE deleted_at IS NULL "
+            f"AND ((sender_id = {conversations}.user_id AND recipient_id = {conversations}.peer_id) "
+            f"OR (sender_id = {conversations}.peer_id AND recipient_id = {conversations}.user_id)) "
+            f"ORDER BY send_at DESC, message_id DESC LIMIT 1) "
+            f"WHERE {VIEWS.format(r=r)} AND {where};")
+
+
+def inbox_ddl(messages, counters, conversations):
+    """Triggers keeping ``counters`` and ``conversations`` in step with ``messages``, and their backfill.
+
+    The backfill only fills a summary table that is still empty, so tables
+    added to an existing database start out correct.
+    """
+    messages.info['inbox'] = (counters, conversations)
+    # Lets ORMCache drop cached summaries when only messages are written
+    messages.info.setdefault('trigger_writes', set()).update((counters.name, conversations.name))
+    names = (messages.name, counters.name, conversations.name)
+    prefix = f'trg_{messages.name}_inbox'
+    unread_changed = ' OR '.join((f"({UNREAD.format(r='OLD')}) IS NOT ({UNREAD.format(r='NEW')})",
+                                  'OLD.sender_id IS NOT NEW.sender_id', 'OLD.recipient_id IS NOT NEW.recipient_id'))
+    latest_changed = ' OR '.join(f'OLD.{column} IS NOT NEW.{column}'
+                                 for column in ('deleted_at', 'sender_id', 'recipient_id', 'send_at'))
+    moved = 'OLD.sender_id IS NOT NEW.sender_id OR OLD.recipient_id IS NOT NEW.recipient_id'
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_insert AFTER INSERT ON {messages.name} "
+        f"BEGIN {_ensure('NEW', *names)} {_newer('NEW', *names)} {_add_unread('NEW', *names)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_unread AFTER UPDATE OF is_read, deleted_at, sender_id, recipient_id "
+        f"ON {messages.name} WHEN {unread_changed} "
+        f"BEGIN {_ensure('NEW', *names)} {_remove_unread('OLD', *names)} {_add_unread('NEW', *names)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_latest AFTER UPDATE OF deleted_at, sender_id, recipient_id, send_at "
+        f"ON {messages.name} WHEN {latest_changed} "
+        f"BEGIN {_ensure('NEW', *names)} {_recompute('OLD', *names)} "
+        f"{_recompute('NEW', *names, where=f'({moved})')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_delete AFTER DELETE ON {messages.name} WHEN OLD.deleted_at IS NULL "
+        f"BEGIN {_remove_unread('OLD', *names)} {_recompute('OLD', *names)} END",
+        f"INSERT INTO {counters.name} (user_id, unread) SELECT * FROM ({_actual_counters(messages.name)}) "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {counters.name})",
+        f"INSERT INTO {conversations.name} (user_id, peer_id, last_message_id, last_send_at, unread) "
+        f"SELECT * FROM ({_actual_conversations(messages.name)}) WHERE NOT EXISTS (SELECT 1 FROM {conversations.name})",
+    ]
+
+
+def _actual_counters(m):
+    return (f"SELECT recipient_id, count(*) FROM {m} WHERE {UNREAD.format(r=m)} "
+            f"GROUP BY recipient_id")
+
+
+def _actual_conversations(m):
+    pair = PAIR.format(r=m)
+    return (f"SELECT user_id, peer_id, message_id, send_at, unread FROM ("
+            f"SELECT user_id, peer_id, message_id, send_at, "
+            f"row_number() OVER (PARTITION BY user_id, peer_id ORDER BY send_at DESC, message_id DESC) AS position, "
+            f"sum(unread) OVER (PARTITION BY user_id, peer_id) AS unread FROM ("
+            f"SELECT sender_id AS user_id, recipient_id AS peer_id, message_id, send_at, 0 AS unread "
+            f"FROM {m} WHERE {pair} UNION ALL "
+            f"SELECT recipient_id, sender_id, message_id, send_at, is_read = 0 FROM {m} WHERE {pair})"
+            f") WHERE position = 1")
+
+
+def rebuild_inbox(connection, model):
+    """Recompute the unread counters and conversations of ``model`` from its messages."""
+    messages = model.__table__
+    counters, conversations = _tables(model)
+    connection.execute(counters.delete())
+    connection.execute(conversations.delete())
+    connection.exec_driver_sql(f"INSERT INTO {counters.name} (user_id, unread) {_actual_counters(messages.name)}")
+    connection.exec_driver_sql(f"INSERT INTO {conversations.name} (user_id, peer_id, last_message_id, last_send_at, "
+                               f"unread) {_actual_conversations(messages.name)}")
+
+
+def check_inbox(connection, model):
+    """Return ``(table, key, stored, actual)`` for every counter or conversation that disagrees with the messages.
+
+    Counters compare ``unread``; conversations compare ``(last_message_id,
+    unread)``. Zero counters and conversations without live messages count
+    as missing rows.
+    """
+    messages = model.__table__
+    counters, conversations = _tables(model)
+    drifted = []
+    stored = {user_id: unread for user_id, unread in connection.execute(
+        select(counters.c.user_id, counters.c.unread).where(counters.c.unread != 0))}
+    actual = dict(connection.exec_driver_sql(_actual_counters(messages.name)).all())
+    for key in sorted(stored.keys() | actual.keys()):
+        if stored.get(key) != actual.get(key):
+            drifted.append((counters.name, key, stored.get(key), actual.get(key)))
+    stored = {(user_id, peer_id): (last, unread) for user_id, peer_id, last, unread in connection.execute(
+        select(conversations.c.user_id, conversations.c.peer_id, conversations.c.last_message_id,
+               conversations.c.unread)
+        .where((conversations.c.last_message_id.is_not(None)) | (conversations.c.unread != 0)))}
+    actual = {(user_id, peer_id): (last, unread) for user_id, peer_id, last, _, unread in
+              connection.exec_driver_sql(_actual_conversations(messages.name))}
+    for key in sorted(stored.keys() | actual.keys()):
+        if stored.get(key) != actual.get(key):
+            drifted.append((conversations.name, key, stored.get(key), actual.get(key)))
+    return drifted
+
+
+def unread_count(session, model, user_id):
+    """Live unread messages of ``user_id``: one primary key lookup. ``session`` may be a connection."""
+    counters, _ = _tables(model)
+    return session.execute(select(counters.c.unread).where(counters.c.user_id == user_id)).scalar() or 0
+
+
+def conversations(session, model, user_id, limit=None):
+    """``(peer_id, last_message_id, last_send_at, unread)`` of the conversations of ``user_id``, latest first."""
+    _, table = _tables(model)
+    return session.execute(
+        select(table.c.peer_id, table.c.last_message_id, table.c.last_send_at, table.c.unread)
+        .where(table.c.user_id == user_id, table.c.last_message_id.is_not(None))
+        .order_by(table.c.last_send_at.desc(), table.c.last_message_id.desc())
+        .limit(limit)
+    ).all()
+
+
+def mark_conversation_read(session, model, user_id, peer_id):
+    """Mark every live message from ``peer_id`` to ``user_id`` read in one UPDATE; returns the rows changed.
+
+    The triggers take the counts off both summaries as part of the same
+    statement.
+    """
+    statement = (
+        update(model)
+        .where(model.recipient_id == user_id, model.sender_id == peer_id, model.is_read == False,
+               model.deleted_at.is_(None))
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    return session.execute(statement).rowcount
@@ -0,0 +1,276 @@
+import contextlib
+import contextvars
+import functools
+import logging
+import re
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Opt-in statement metrics from the before/after_cursor_execute engine events.
+# Nothing is hooked until attach() is called, and detach() removes every
+# listener again, so a disabled Instrumentation costs nothing per statement.
+#
+# Statements are grouped by their SQL text with literals and IN/VALUES lists
+# collapsed. Row-returning statements are timed until their cursor is closed,
+# counting only the time spent inside fetch calls, so latency and row counts
+# include fetching; SQLite steps through most of a result while fetching.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+DEFAULT_SLOW_THRESHOLD = 0.1
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ROWS = re.compile(r'\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+_request = contextvars.ContextVar('orm_instrumentation_request', default=None)
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize(statement):
+    """Collapse literals and placeholder lists so executions of one query share a key."""
+    statement = _SPACE.sub(' ', statement).strip()
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _PLACEHOLDERS.sub('(?, ...)', statement)
+    return _ROWS.sub('(?, ...), ...', statement)
+
+
+class StatementStats:
+    __slots__ = ('count', 'seconds', 'max_seconds', 'rows', 'slow', 'buckets')
+
+    def __init__(self, buckets):
+        self.count = self.rows = self.slow = 0
+        self.seconds = self.max_seconds = 0.0
+        self.buckets = [0] * (len(buckets) + 1)
+
+    def as_dict(self, bounds):
+        cumulative, total = {}, 0
+        for bound, count in zip((*bounds, float('inf')), self.buckets):
+            total += count
+            cumulative[bound] = total
+        return {
+            'count': self.count,
+            'seconds': self.seconds,
+            'max_seconds': self.max_seconds,
+            'rows': self.rows,
+            'slow': self.slow,
+            'buckets': cumulative,
+        }
+
+
+class _TimedCursor:
+    """DBAPI cursor proxy that adds fetch time and fetched rows to the statement's figures."""
+
+    def __init__(self, instrumentation, cursor, statement, parameters, dbapi_connection, elapsed, scopes):
+        self._instrumentation = instrumentation
+        self._cursor = cursor
+        self._statement = statement
+        self._parameters = parameters
+        self._dbapi_connection = dbapi_connection
+        self._elapsed = elapsed
+        self._scopes = scopes
+        self._rows = 0
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        rows = method(*args)
+        self._elapsed += time.perf_counter() - start
+        return rows
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._fetch(self._cursor.fetchmany, *args)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        self._rows += len(rows)
+        return rows
+
+    def close(self):
+        if not self._done:
+            self._done = True
+            self._instrumentation._record(self._statement, self._parameters, self._dbapi_connection,
+                                          self._elapsed, self._rows, self._scopes)
+        self._cursor.close()
+
+
+class Instrumentation:
+    """Per-statement latency histograms, row counts, query counts and a slow-query log.
+
+    ``attach()`` hooks every engine (or only ``target``, an Engine) and every
+    session; per-session counts land in ``session.info``, per-request counts
+    in the scope opened with ``request()``.
+    """
+
+    def __init__(self, slow_threshold=DEFAULT_SLOW_THRESHOLD, buckets=DEFAULT_BUCKETS, explain_slow=True,
+                 slow_log=logger):
+        self.slow_threshold = slow_threshold
+        self.buckets = tuple(buckets)
+        self.explain_slow = explain_slow
+        self.slow_log = slow_log
+        self.statements = {}
+        self.requests = {}
+        self._sessions = weakref.WeakKeyDictionary()  # Connection -> info dict of the session using it
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def attach(self, target=Engine, sessions=Session):
+        self._listen(target, 'before_cursor_execute', self._before)
+        self._listen(target, 'after_cursor_execute', self._after)
+        if sessions is not None:
+            self._listen(sessions, 'after_begin', self._after_begin)
+        return self
+
+    def detach(self):
+        for target, name, function in self._listeners:
+            event.remove(target, name, function)
+        self._listeners.clear()
+
+    def _listen(self, target, name, function):
+        event.listen(target, name, function)
+        self._listeners.append((target, name, function))
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.requests.clear()
+
+    @contextlib.contextmanager
+    def request(self, name):
+        """Count the statements run inside the block, aggregated per request ``name``."""
+        scope = {'name': name, 'queries': 0, 'seconds': 0.0, 'rows': 0}
+        token = _request.set(scope)
+        try:
+            yield scope
+        finally:
+            _request.reset(token)
+            with self._lock:
+                totals = self.requests.setdefault(name, {'count': 0, 'queries': 0, 'max_queries': 0,
+                                                         'seconds': 0.0, 'rows': 0})
+                totals['count'] += 1
+                totals['queries'] += scope['queries']
+                totals['max_queries'] = max(totals['max_queries'], scope['queries'])
+                totals['seconds'] += scope['seconds']
+                totals['rows'] += scope['rows']
+
+    def _after_begin(self, session, transaction, connection):
+        self._sessions[connection] = session.info
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context, which a statement that raises simply drops
+        if context is not None:
+            context._instrumentation_start = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_instrumentation_start', None)
+        if start is None:
+            return  # attached while this statement was running
+        elapsed = time.perf_counter() - start
+        scopes = (self._sessions.get(conn), _request.get())
+        dbapi_connection = conn.connection.dbapi_connection
+        if cursor.description is not None and not executemany and not context.is_crud:
+            context.cursor = _TimedCursor(self, cursor, statement, parameters, dbapi_connection, elapsed, scopes)
+        else:
+            self._record(statement, parameters, dbapi_connection, elapsed, max(cursor.rowcount, 0), scopes)
+
+    def _record(self, statement, parameters, dbapi_connection, elapsed, rows, scopes):
+        key = normalize(statement)
+        slow = elapsed >= self.slow_threshold
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = StatementStats(self.buckets)
+            stats.count += 1
+            stats.seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            stats.rows += rows
+            stats.slow += slow
+            position = 0
+            while position < len(self.buckets) and elapsed > self.buckets[position]:
+                position += 1
+            stats.buckets[position] += 1
+        session_info, request = scopes
+        if session_info is not None:
+            session_info['queries'] = session_info.get('queries', 0) + 1
+            session_info['query_seconds'] = session_info.get('query_seconds', 0.0) + elapsed
+        if request is not None:
+            request['queries'] += 1
+            request['seconds'] += elapsed
+            request['rows'] += rows
+        if slow:
+            self._log_slow(statement, parameters, dbapi_connection, elapsed, rows)
+
+    def _log_slow(self, statement, parameters, dbapi_connection, elapsed, rows):
+        plan = []
+        if self.explain_slow and not statement.lstrip().upper().startswith(('PRAGMA', 'BEGIN', 'COMMIT')):
+            if isinstance(parameters, list):
+                parameters = parameters[0] if parameters else ()
+            try:
+                cursor = dbapi_connection.cursor()
+                cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+                plan = [row[-1] for row in cursor.fetchall()]
+                cursor.close()
+            except Exception as exc:
+                plan = [f'EXPLAIN QUERY PLAN failed: {exc}']
+        self.slow_log.warning('slow query (%.1f ms, %d rows): %s%s', elapsed * 1000, rows, statement,
+                              ''.join(f'\n    {step}' for step in plan))
+
+    def as_dict(self):
+        with self._lock:
+            statements = {key: stats.as_dict(self.buckets) for key, stats in self.statements.items()}
+            requests = {name: dict(totals) for name, totals in self.requests.items()}
+        return {
+            'queries': sum(stats['count'] for stats in statements.values()),
+            'seconds': sum(stats['seconds'] for stats in statements.values()),
+            'statements': statements,
+            'requests': requests,
+        }
+
+    def prometheus(self, prefix='orm'):
+        """Totals in the Prometheus text exposition format."""
+        data = self.as_dict()
+        lines = [
+            f'# HELP {prefix}_query_duration_seconds Statement latency, including fetching rows.',
+            f'# TYPE {prefix}_query_duration_seconds histogram',
+        ]
+        for statement, stats in data['statements'].items():
+            label = f'statement="{_escape(statement)}"'
+            for bound, count in stats['buckets'].items():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_query_duration_seconds_bucket{{{label},le="{le}"}} {count}')
+            lines.append(f'{prefix}_query_duration_seconds_sum{{{label}}} {stats["seconds"]}')
+            lines.append(f'{prefix}_query_duration_seconds_count{{{label}}} {stats["count"]}')
+        for name, kind, help_text in (('rows', 'counter', 'Rows fetched or affected.'),
+                                      ('slow', 'counter', 'Executions over the slow query threshold.')):
+            lines += [f'# HELP {prefix}_query_{name}_total {help_text}', f'# TYPE {prefix}_query_{name}_total {kind}']
+            lines += [f'{prefix}_query_{name}_total{{statement="{_escape(statement)}"}} {stats[name]}'
+                      for statement, stats in data['statements'].items()]
+        lines += [f'# HELP {prefix}_request_queries_total Statements run per request name.',
+                  f'# TYPE {prefix}_request_queries_total counter']
+        lines += [f'{prefix}_request_queries_total{{request="{_escape(name)}"}} {totals["queries"]}'
+                  for name, totals in data['requests'].items()]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
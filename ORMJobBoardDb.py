@@ -1,18 +1,34 @@
 from datetime import datetime, timezone
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Index, null
+from sqlalchemy.orm import declarative_base, relationship
+
+import ORMArchive
+import ORMBulkLoad
+import ORMEngine
+import ORMSoftDelete
+from ORMTypes import SmallEnum, utc_now
+
+DATABASE_URI = 'sqlite:///ORMJobBoardDb.Db'
 
 Base = declarative_base()
 
 class User(Base):
     __tablename__ = 'user'
     user_id = Column(Integer, primary_key=True)
-    authentication_id = Column(Integer, ForeignKey('authentication.authentication_id'))
+    authentication_id = Column(Integer, ForeignKey('authentication.authentication_id'), index=True)
     name = Column(String)
     birthdate = Column(DateTime(timezone=True))
     skills = Column(Text)
     work_experience = Column(Text)
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now(), onupdate=utc_now())
+    authentication = relationship('Authentication', back_populates='user')
+    sent_messages = relationship('Message', back_populates='sender', foreign_keys='Message.sender_id',
+                                 passive_deletes='all')
+    received_messages = relationship('Message', back_populates='recipient', foreign_keys='Message.recipient_id',
+                                     passive_deletes='all')
+    applications = relationship('Applications', back_populates='job_seeker', passive_deletes='all')
+    job_postings = relationship('JobPosting', back_populates='employer', passive_deletes='all')
+    interactions = relationship('JobInteraction', back_populates='user', passive_deletes='all')
 
 class Authentication(Base):
     __tablename__ = 'authentication'
@@ -20,39 +36,74 @@ class Authentication(Base):
     username = Column(String)
     email = Column(String)
     password_hash = Column(String)
-    role = Column(Enum('admin', 'employer', 'job_seeker'))
+    role = Column(SmallEnum('admin', 'employer', 'job_seeker'))
     stock = Column(Integer)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    deleted_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now())
+    updated_at = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now(), onupdate=utc_now())
+    deleted_at = Column(DateTime(timezone=True), default=null())
+    user = relationship('User', back_populates='authentication', uselist=False, passive_deletes='all')
 
 class Message(Base):
     __tablename__ = 'message'
     message_id = Column(Integer, primary_key=True)
-    sender_id = Column(Integer, ForeignKey('user.user_id'))
+    sender_id = Column(Integer, ForeignKey('user.user_id'), index=True)
     recipient_id = Column(Integer, ForeignKey('user.user_id'))
     message = Column(Text)
     is_read = Column(Boolean)
-    message_type = Column(Enum('TEXT', 'IMAGE', 'FILE'))
-    send_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    deleted_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+    message_type = Column(SmallEnum('TEXT', 'IMAGE', 'FILE'))
+    send_at = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now())
+    deleted_at = Column(DateTime(timezone=True), default=null())
+    sender = relationship('User', back_populates='sent_messages', foreign_keys=[sender_id])
+    recipient = relationship('User', back_populates='received_messages', foreign_keys=[recipient_id])
+    __table_args__ = (
+        Index('ix_message_recipient_read', recipient_id, is_read),
+        Index('ix_message_live_recipient_sent', recipient_id, send_at, message_id, sqlite_where=deleted_at.is_(None)),
+        # Unread badge count only has to walk the unread rows
+        Index('ix_message_live_unread', recipient_id, sqlite_where=(is_read == False) & deleted_at.is_(None)),
+        # Latest message of a conversation, for the ORMInbox triggers
+        Index('ix_message_live_conversation', sender_id, recipient_id, send_at, message_id,
+              sqlite_where=deleted_at.is_(None)),
+    )
+
+class InboxCounter(Base):
+    # Maintained from message by triggers, see ORMInbox
+    __tablename__ = 'inbox_counter'
+    user_id = Column(Integer, ForeignKey('user.user_id'), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0, server_default='0')
+
+class Conversation(Base):
+    # One row per participant of a conversation, maintained by ORMInbox triggers
+    __tablename__ = 'conversation'
+    user_id = Column(Integer, ForeignKey('user.user_id'), primary_key=True)
+    peer_id = Column(Integer, ForeignKey('user.user_id'), primary_key=True)
+    last_message_id = Column(Integer)
+    last_send_at = Column(DateTime(timezone=True))
+    unread = Column(Integer, nullable=False, default=0, server_default='0')
+    __table_args__ = (
+        Index('ix_conversation_user_latest', user_id, last_send_at, last_message_id),
+    )
 
 class Applications(Base):
     __tablename__ = 'applications'
     application_id = Column(Integer, primary_key=True)
-    job_seeker_id = Column(Integer, ForeignKey('user.user_id'))
+    job_seeker_id = Column(Integer, ForeignKey('user.user_id'), index=True)
     job_id = Column(Integer, ForeignKey('job_posting.job_id'))
     resume = Column(Text)
-    status = Column(Enum('PENDING', 'ACCEPTED', 'REJECTED'))
+    status = Column(SmallEnum('PENDING', 'ACCEPTED', 'REJECTED'))
     skills = Column(Text)
     work_experience = Column(Text)
-    applied_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    deleted_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+    applied_at = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now())
+    deleted_at = Column(DateTime(timezone=True), default=null())
+    job_seeker = relationship('User', back_populates='applications')
+    job = relationship('JobPosting', back_populates='applications')
+    __table_args__ = (
+        Index('ix_applications_job_status', job_id, status),
+    )
 
 class JobPosting(Base):
     __tablename__ = 'job_posting'
     job_id = Column(Integer, primary_key=True)
-    employer_id = Column(Integer, ForeignKey('user.user_id'))
+    employer_id = Column(Integer, ForeignKey('user.user_id'), index=True)
     job_title = Column(String)
     job_description = Column(Text)
     location = Column(String)
@@ -60,97 +111,176 @@ class JobPosting(Base):
     industry = Column(String)
     min_salary = Column(Integer)
     max_salary = Column(Integer)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    deleted_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now())
+    updated_at = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now(), onupdate=utc_now())
+    deleted_at = Column(DateTime(timezone=True), default=null())
+    employer = relationship('User', back_populates='job_postings')
+    applications = relationship('Applications', back_populates='job', passive_deletes='all')
+    interactions = relationship('JobInteraction', back_populates='job', passive_deletes='all')
+    __table_args__ = (
+        Index('ix_job_posting_live_category', category, created_at, sqlite_where=deleted_at.is_(None)),
+        Index('ix_job_posting_live_created', created_at, job_id, sqlite_where=deleted_at.is_(None)),
+    )
 
 class JobInteraction(Base):
     __tablename__ = 'job_interaction'
     interaction_id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('user.user_id'))
-    job_id = Column(Integer, ForeignKey('job_posting.job_id'))
+    job_id = Column(Integer, ForeignKey('job_posting.job_id'), index=True)
     interaction_type = Column(Integer)
-    interaction_date = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+    interaction_date = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now())
     is_applied = Column(Boolean)
+    user = relationship('User', back_populates='interactions')
+    job = relationship('JobPosting', back_populates='interactions')
+    __table_args__ = (
+        Index('ix_job_interaction_user_job', user_id, job_id),
+    )
+
+class Skill(Base):
+    __tablename__ = 'skill'
+    skill_id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    __table_args__ = (
+        Index('uq_skill_name', name, unique=True),
+        {'info': {'natural_key': ('name',)}},
+    )
+
+class UserSkill(Base):
+    # User.skills split into rows by ORMRecommendations.sync_skills
+    __tablename__ = 'user_skill'
+    user_id = Column(Integer, ForeignKey('user.user_id'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skill.skill_id'), primary_key=True, index=True)
+
+class Recommendation(Base):
+    # Top-K jobs per user, precomputed by ORMRecommendations.refresh
+    __tablename__ = 'recommendation'
+    user_id = Column(Integer, ForeignKey('user.user_id'), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey('job_posting.job_id'), nullable=False)
+    score = Column(Float)
+    job = relationship('JobPosting')
+
+class RecommendationRefresh(Base):
+    __tablename__ = 'recommendation_refresh'
+    refresh_id = Column(Integer, primary_key=True)
+    last_interaction_id = Column(Integer)
+    users = Column(Integer)
+    refreshed_at = Column(DateTime(timezone=True), default=utc_now(), server_default=utc_now())
+
+def _feature_ddl():
+    import ORMInbox
+    import ORMSearch
+
+    return [*ORMSearch.fts_ddl(JobPosting.__table__, ['job_title', 'job_description', 'location']),
+            *ORMInbox.inbox_ddl(Message.__table__, InboxCounter.__table__, Conversation.__table__)]
+
+ORMEngine.register_ddl(Base.metadata, _feature_ddl)
+ORMSoftDelete.register(Authentication)
+ORMSoftDelete.register(Message, created='send_at')
+ORMSoftDelete.register(Applications, created='applied_at')
+ORMSoftDelete.register(JobPosting)
+ORMArchive.register(JobInteraction, 'interaction_date')
+
+def get_engine(uri=DATABASE_URI):
+    # The tables are created the first time the engine is requested
+    return ORMEngine.get_engine(uri, Base.metadata, connect_args={"check_same_thread": False})
+
+def get_sessionmaker(uri=DATABASE_URI):
+    get_engine(uri)
+    return ORMEngine.get_sessionmaker(uri)
+
+def get_session(uri=DATABASE_URI):
+    return get_sessionmaker(uri)()
+
+def __getattr__(name):
+    # Backwards compatible, lazily built `engine` / `Session` module attributes.
+    if name == 'engine':
+        return get_engine()
+    if name == 'Session':
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-engine = create_engine('sqlite:///ORMJobBoardDb.Db', connect_args={"check_same_thread": False})
-
-# Ensure the database tables are created
-Base.metadata.create_all(engine)
-
-Session = sessionmaker(bind=engine)
-session = Session()
-
-# Adding data with correct datetime objects
-session.add_all([
-    User(user_id=1, authentication_id=1, name='Xavier', birthdate=datetime(1990, 1, 1, tzinfo=timezone.utc),
-         skills='Python, SQL', work_experience='5 years'),
-    User(user_id=2, authentication_id=2, name='Taay', birthdate=datetime(1988, 2, 1, tzinfo=timezone.utc),
-         skills='Java, NoSQL', work_experience='7 years'),
-    User(user_id=3, authentication_id=3, name='Walter', birthdate=datetime(1992, 3, 1, tzinfo=timezone.utc),
-         skills='JavaScript, React', work_experience='4 years'),
-    User(user_id=4, authentication_id=4, name='Fierci', birthdate=datetime(1985, 4, 1, tzinfo=timezone.utc),
-         skills='HTML, CSS', work_experience='6 years'),
-    User(user_id=5, authentication_id=5, name='Idanan', birthdate=datetime(1975, 5, 1, tzinfo=timezone.utc),
-         skills='C++, C#', work_experience='10 years'),
-
-    Authentication(authentication_id=1, username='Xavier', email='xavier@gmail.com', password_hash='hashedpw1',
-                   role='job_seeker', stock=0),
-    Authentication(authentication_id=2, username='Taay', email='taay@gmail.com', password_hash='hashedpw2',
-                   role='employer', stock=0),
-    Authentication(authentication_id=3, username='Walter', email='walter@gmail.com', password_hash='hashedpw3',
-                   role='job_seeker', stock=0),
-    Authentication(authentication_id=4, username='Fierci', email='fierci@gmail.com', password_hash='hashedpw4',
-                   role='employer', stock=0),
-    Authentication(authentication_id=5, username='Idanan', email='idanan@gmail.com', password_hash='hashedpw5',
-                   role='job_seeker', stock=0),
-
-    Message(message_id=1, sender_id=1, recipient_id=2, message='Hello!', is_read=False, message_type='TEXT'),
-    Message(message_id=2, sender_id=2, recipient_id=3, message='Job opportunity for you!', is_read=False,
-            message_type='TEXT'),
-    Message(message_id=3, sender_id=3, recipient_id=4, message='Interested in the job!', is_read=True,
-            message_type='TEXT'),
-    Message(message_id=4, sender_id=4, recipient_id=5, message='Please send your resume.', is_read=False,
-            message_type='TEXT'),
-    Message(message_id=5, sender_id=5, recipient_id=1, message='Can we schedule an interview?', is_read=False,
-            message_type='TEXT'),
-
-    Applications(application_id=1, job_seeker_id=1, job_id=1, resume='Xavier_Resume.pdf', status='PENDING',
+def seed(session):
+    # Adding data with correct datetime objects
+    ORMBulkLoad.upsert(session, {
+        User: [
+            dict(user_id=1, authentication_id=1, name='Xavier', birthdate=datetime(1990, 1, 1, tzinfo=timezone.utc),
+                 skills='Python, SQL', work_experience='5 years'),
+            dict(user_id=2, authentication_id=2, name='Taay', birthdate=datetime(1988, 2, 1, tzinfo=timezone.utc),
+                 skills='Java, NoSQL', work_experience='7 years'),
+            dict(user_id=3, authentication_id=3, name='Walter', birthdate=datetime(1992, 3, 1, tzinfo=timezone.utc),
+                 skills='JavaScript, React', work_experience='4 years'),
+            dict(user_id=4, authentication_id=4, name='Fierci', birthdate=datetime(1985, 4, 1, tzinfo=timezone.utc),
+                 skills='HTML, CSS', work_experience='6 years'),
+            dict(user_id=5, authentication_id=5, name='Idanan', birthdate=datetime(1975, 5, 1, tzinfo=timezone.utc),
+                 skills='C++, C#', work_experience='10 years'),
+        ],
+        Authentication: [
+            dict(authentication_id=1, username='Xavier', email='xavier@gmail.com', password_hash='hashedpw1',
+                 role='job_seeker', stock=0),
+            dict(authentication_id=2, username='Taay', email='taay@gmail.com', password_hash='hashedpw2',
+                 role='employer', stock=0),
+            dict(authentication_id=3, username='Walter', email='walter@gmail.com', password_hash='hashedpw3',
+                 role='job_seeker', stock=0),
+            dict(authentication_id=4, username='Fierci', email='fierci@gmail.com', password_hash='hashedpw4',
+                 role='employer', stock=0),
+            dict(authentication_id=5, username='Idanan', email='idanan@gmail.com', password_hash='hashedpw5',
+                 role='job_seeker', stock=0),
+        ],
+        Message: [
+            dict(message_id=1, sender_id=1, recipient_id=2, message='Hello!', is_read=False, message_type='TEXT'),
+            dict(message_id=2, sender_id=2, recipient_id=3, message='Job opportunity for you!', is_read=False,
+                 message_type='TEXT'),
+            dict(message_id=3, sender_id=3, recipient_id=4, message='Interested in the job!', is_read=True,
+                 message_type='TEXT'),
+            dict(message_id=4, sender_id=4, recipient_id=5, message='Please send your resume.', is_read=False,
+                 message_type='TEXT'),
+            dict(message_id=5, sender_id=5, recipient_id=1, message='Can we schedule an interview?', is_read=False,
+                 message_type='TEXT'),
+        ],
+        Applications: [
+            dict(application_id=1, job_seeker_id=1, job_id=1, resume='Xavier_Resume.pdf', status='PENDING',
                  skills='Python', work_experience='5 years'),
-    Applications(application_id=2, job_seeker_id=2, job_id=2, resume='Taay_Resume.pdf', status='ACCEPTED',
+            dict(application_id=2, job_seeker_id=2, job_id=2, resume='Taay_Resume.pdf', status='ACCEPTED',
                  skills='Java', work_experience='7 years'),
-    Applications(application_id=3, job_seeker_id=3, job_id=3, resume='Walter_Resume.pdf', status='REJECTED',
+            dict(application_id=3, job_seeker_id=3, job_id=3, resume='Walter_Resume.pdf', status='REJECTED',
                  skills='JavaScript', work_experience='4 years'),
-    Applications(application_id=4, job_seeker_id=4, job_id=4, resume='Fierci_Resume.pdf', status='PENDING',
+            dict(application_id=4, job_seeker_id=4, job_id=4, resume='Fierci_Resume.pdf', status='PENDING',
                  skills='HTML', work_experience='6 years'),
-    Applications(application_id=5, job_seeker_id=5, job_id=5, resume='Idanan_Resume.pdf', status='ACCEPTED',
+            dict(application_id=5, job_seeker_id=5, job_id=5, resume='Idanan_Resume.pdf', status='ACCEPTED',
                  skills='C++', work_experience='10 years'),
+        ],
+        JobPosting: [
+            dict(job_id=1, employer_id=2, job_title='Python Developer',
+                 job_description='Develop applications using Python.', location='New York', category='IT',
+                 industry='Software', min_salary=70000, max_salary=100000),
+            dict(job_id=2, employer_id=4, job_title='Java Developer', job_description='Develop applications using Java.',
+                 location='San Francisco', category='IT', industry='Software', min_salary=80000, max_salary=120000),
+            dict(job_id=3, employer_id=2, job_title='Frontend Developer',
+                 job_description='Work on the UI of the application.', location='Austin', category='IT',
+                 industry='Software', min_salary=60000, max_salary=90000),
+            dict(job_id=4, employer_id=4, job_title='Full Stack Developer',
+                 job_description='Work on both frontend and backend.', location='Seattle', category='IT',
+                 industry='Software', min_salary=90000, max_salary=130000),
+            dict(job_id=5, employer_id=2, job_title='Data Scientist', job_description='Analyze data and create reports.',
+                 location='Chicago', category='IT', industry='Software', min_salary=80000, max_salary=110000),
+        ],
+        JobInteraction: [
+            dict(interaction_id=1, user_id=1, job_id=1, interaction_type=1,
+                 interaction_date=datetime(2024, 1, 1, tzinfo=timezone.utc), is_applied=True),
+            dict(interaction_id=2, user_id=2, job_id=2, interaction_type=1,
+                 interaction_date=datetime(2024, 1, 2, tzinfo=timezone.utc), is_applied=False),
+            dict(interaction_id=3, user_id=3, job_id=3, interaction_type=1,
+                 interaction_date=datetime(2024, 1, 3, tzinfo=timezone.utc), is_applied=True),
+            dict(interaction_id=4, user_id=4, job_id=4, interaction_type=1,
+                 interaction_date=datetime(2024, 1, 4, tzinfo=timezone.utc), is_applied=True),
+            dict(interaction_id=5, user_id=5, job_id=5, interaction_type=1,
+                 interaction_date=datetime(2024, 1, 5, tzinfo=timezone.utc), is_applied=False),
+        ],
+    })
+    session.commit()
 
-    JobPosting(job_id=1, employer_id=2, job_title='Python Developer',
-               job_description='Develop applications using Python.', location='New York', category='IT',
-               industry='Software', min_salary=70000, max_salary=100000),
-    JobPosting(job_id=2, employer_id=4, job_title='Java Developer', job_description='Develop applications using Java.',
-               location='San Francisco', category='IT', industry='Software', min_salary=80000, max_salary=120000),
-    JobPosting(job_id=3, employer_id=2, job_title='Frontend Developer',
-               job_description='Work on the UI of the application.', location='Austin', category='IT',
-               industry='Software', min_salary=60000, max_salary=90000),
-    JobPosting(job_id=4, employer_id=4, job_title='Full Stack Developer',
-               job_description='Work on both frontend and backend.', location='Seattle', category='IT',
-               industry='Software', min_salary=90000, max_salary=130000),
-    JobPosting(job_id=5, employer_id=2, job_title='Data Scientist', job_description='Analyze data and create reports.',
-               location='Chicago', category='IT', industry='Software', min_salary=80000, max_salary=110000),
-
-    JobInteraction(interaction_id=1, user_id=1, job_id=1, interaction_type=1, interaction_date=datetime.now(timezone.utc),
-                   is_applied=True),
-    JobInteraction(interaction_id=2, user_id=2, job_id=2, interaction_type=1, interaction_date=datetime.now(timezone.utc),
-                   is_applied=False),
-    JobInteraction(interaction_id=3, user_id=3, job_id=3, interaction_type=1, interaction_date=datetime.now(timezone.utc),
-                   is_applied=True),
-    JobInteraction(interaction_id=4, user_id=4, job_id=4, interaction_type=1, interaction_date=datetime.now(timezone.utc),
-                   is_applied=True),
-    JobInteraction(interaction_id=5, user_id=5, job_id=5, interaction_type=1, interaction_date=datetime.now(timezone.utc),
-                   is_applied=False)
-])
-
-session.commit()
-session.close()
\ No newline at end of file
+if __name__ == '__main__':
+    session = get_session()
+    seed(session)
+    session.close()
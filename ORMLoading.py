@@ -0,0 +1,38 @@
+from sqlalchemy.orm import joinedload, lazyload, raiseload, selectinload, subqueryload
+
+# Relationships are declared with the default lazy='select' strategy; callers
+# choose how to load them per query instead of paying for it on every query.
+# Collections are declared with passive_deletes='all': deleting a parent
+# leaves the rows pointing at it alone, as before the relationships existed,
+# instead of loading them and setting their foreign key to NULL.
+STRATEGIES = {
+    'selectin': selectinload,
+    'joined': joinedload,
+    'subquery': subqueryload,
+    'lazy': lazyload,
+    'raise': raiseload,
+}
+
+
+def loader(strategy, *path):
+    """Loader option applying ``strategy`` along a relationship path.
+
+    ``loader('selectin', Quiz.questions, Question.options)`` loads quizzes with
+    their questions and options in one extra IN query per level (per 500 parent
+    rows); 'joined' and 'subquery' keep a fixed statement count for any number
+    of rows. ``loader('raise', '*')`` turns any other lazy load into an error.
+    """
+    factory = STRATEGIES[strategy]
+    option = factory(path[0])
+    for attribute in path[1:]:
+        option = getattr(option, factory.__name__)(attribute)
+    return option
+
+
+def with_loading(statement, strategy, *paths):
+    """Apply ``loader(strategy, *path)`` to ``statement`` for every path.
+
+    Each path is a relationship attribute or a tuple of them.
+    """
+    return statement.options(*(loader(strategy, *(path if isinstance(path, tuple) else (path,)))
+                               for path in paths))
@@ -0,0 +1,154 @@
+import base64
+import datetime
+import decimal
+import json
+from collections import namedtuple
+
+from sqlalchemy import and_, bindparam, inspect, or_, select, tuple_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+import ORMEcommerceDb as ecommerce
+import ORMJobBoardDb as jobboard
+import ORMTravelBookingDb as travel
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'previous_cursor'])
+
+DEFAULT_PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'d': value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {'dec': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return datetime.date.fromisoformat(value['d'])
+        if 'dec' in value:
+            return decimal.Decimal(value['dec'])
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    payload = json.dumps({'v': [_encode_value(value) for value in values], 'd': direction},
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return [_decode_value(value) for value in payload['v']], payload['d']
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor(f'malformed pagination cursor: {token!r}') from exc
+
+
+def _sort_keys(model, order_by):
+    """Normalise ``order_by`` to ``[(column, descending)]`` ending with the primary key."""
+    keys = []
+    for expression in order_by:
+        descending = False
+        if isinstance(expression, UnaryExpression):
+            descending = expression.modifier is operators.desc_op
+            expression = expression.element
+        keys.append((expression, descending))
+    names = {column.key for column, _ in keys}
+    for column in inspect(model).primary_key:
+        if column.key not in names:
+            keys.append((getattr(model, column.key), keys[-1][1] if keys else False))
+    return keys
+
+
+def _seek(keys, values, forward):
+    # Rows strictly after (or before, when paging backwards) the cursor row in
+    # the sort order. A uniform direction compiles to a row-value comparison
+    # SQLite can drive straight off the composite index.
+    values = [bindparam(None, value, type_=column.type) for (column, _), value in zip(keys, values)]
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        columns = tuple_(*(column for column, _ in keys))
+        greater = directions.pop() != forward
+        return columns > tuple_(*values) if greater else columns < tuple_(*values)
+    clauses = []
+    for position, (column, descending) in enumerate(keys):
+        equal = [keys[i][0] == values[i] for i in range(position)]
+        step = column < values[position] if descending == forward else column > values[position]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def paginate(session, model, order_by, cursor=None, page_size=DEFAULT_PAGE_SIZE, where=None):
+    """Return one ``Page`` of ``model`` rows using keyset (seek) pagination.
+
+    ``order_by`` lists model attributes, optionally ``.desc()``; the primary
+    key is appended as a tiebreaker, so sort columns must not be NULL. Pass
+    the ``next_cursor`` or ``previous_cursor`` of a page to move forward or
+    back. Unlike OFFSET, the cost of a page does not depend on its depth as
+    long as an index matches ``where`` followed by the sort keys.
+    """
+    keys = _sort_keys(model, order_by)
+    statement = select(model)
+    if where is not None:
+        statement = statement.where(*(where if isinstance(where, (list, tuple)) else (where,)))
+
+    forward = True
+    if cursor is not None:
+        values, direction = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise InvalidCursor('pagination cursor does not match the sort keys')
+        forward = direction == 'next'
+        statement = statement.where(_seek(keys, values, forward))
+
+    ordering = [column.desc() if descending == forward else column.asc() for column, descending in keys]
+    statement = statement.order_by(*ordering).limit(page_size + 1)
+    items = list(session.scalars(statement))
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if not forward:
+        items.reverse()
+
+    def cursor_for(item, direction):
+        return encode_cursor([getattr(item, column.key) for column, _ in keys], direction)
+
+    next_cursor = previous_cursor = None
+    if items:
+        if has_more or not forward:
+            next_cursor = cursor_for(items[-1], 'next')
+        if cursor is not None and (has_more or forward):
+            previous_cursor = cursor_for(items[0], 'previous')
+    return Page(items, next_cursor, previous_cursor)
+
+
+def job_postings(session, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Newest live job postings first (ix_job_posting_live_created)."""
+    return paginate(session, jobboard.JobPosting, [jobboard.JobPosting.created_at.desc()], cursor, page_size)
+
+
+def products(session, category, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Products of one category, cheapest first (ix_products_category_price)."""
+    return paginate(session, ecommerce.Product, [ecommerce.Product.price], cursor, page_size,
+                    where=ecommerce.Product.category == category)
+
+
+def tours(session, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Live tours by start date (ix_tours_live_start_date)."""
+    return paginate(session, travel.Tour, [travel.Tour.start_date], cursor, page_size)
+
+
+def inbox(session, recipient_id, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Live messages received by a user, newest first (ix_message_live_recipient_sent)."""
+    return paginate(session, jobboard.Message, [jobboard.Message.send_at.desc()], cursor, page_size,
+                    where=jobboard.Message.recipient_id == recipient_id)
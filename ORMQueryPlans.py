@@ -0,0 +1,148 @@
+import datetime
+
+from sqlalchemy import create_engine, func, select, tuple_
+
+import ORMEcommerceDb as ecommerce
+import ORMEngine
+import ORMEventManagementDb as events
+import ORMJobBoardDb as jobboard
+import ORMQuizDb as quiz
+import ORMTravelBookingDb as travel
+
+# (label, statement, indexes that satisfy it) for the joins and lookups that
+# run on every request. Each schema's statements are checked against a fresh
+# in-memory copy of that schema, so only the declared indexes are in play.
+# Queries on soft-delete tables carry the deleted_at IS NULL that
+# ORMSoftDelete adds to ORM queries, which the partial indexes rely on.
+HOT_QUERIES = {
+    ecommerce: [
+        ('product rating aggregate',
+         select(func.avg(ecommerce.Review.rating), func.count()).where(ecommerce.Review.product_id == 1),
+         ('ix_reviews_product_rating',)),
+        ('items of an order',
+         select(ecommerce.OrderItem).where(ecommerce.OrderItem.order_id == 1),
+         ('ix_order_items_order_product',)),
+        ('order history of a user',
+         select(ecommerce.Order).where(ecommerce.Order.user_id == 1).order_by(ecommerce.Order.created_at.desc()),
+         ('ix_orders_user_created',)),
+        ('keyset page of a category by price',
+         select(ecommerce.Product)
+         .where(ecommerce.Product.category == 'Electronics',
+                tuple_(ecommerce.Product.price, ecommerce.Product.product_id) > tuple_(100.0, 5))
+         .order_by(ecommerce.Product.price, ecommerce.Product.product_id).limit(51),
+         ('ix_products_category_price',)),
+    ],
+    jobboard: [
+        ('unread messages of a user',
+         select(func.count()).select_from(jobboard.Message)
+         .where(jobboard.Message.recipient_id == 1, jobboard.Message.is_read == False,
+                jobboard.Message.deleted_at.is_(None)),
+         ('ix_message_live_unread', 'ix_message_recipient_read')),
+        ('applications for a job',
+         select(jobboard.Applications).where(jobboard.Applications.job_id == 1),
+         ('ix_applications_job_status',)),
+        ('live postings in a category',
+         select(jobboard.JobPosting)
+         .where(jobboard.JobPosting.category == 'IT', jobboard.JobPosting.deleted_at.is_(None))
+         .order_by(jobboard.JobPosting.created_at.desc()),
+         ('ix_job_posting_live_category',)),
+        ('interactions of a user with a job',
+         select(jobboard.JobInteraction)
+         .where(jobboard.JobInteraction.user_id == 1, jobboard.JobInteraction.job_id == 1),
+         ('ix_job_interaction_user_job',)),
+        ('keyset page of newest postings',
+         select(jobboard.JobPosting)
+         .where(jobboard.JobPosting.deleted_at.is_(None),
+                tuple_(jobboard.JobPosting.created_at, jobboard.JobPosting.job_id)
+                < tuple_(datetime.datetime(2024, 1, 1), 100))
+         .order_by(jobboard.JobPosting.created_at.desc(), jobboard.JobPosting.job_id.desc()).limit(51),
+         ('ix_job_posting_live_created',)),
+        ('keyset page of an inbox',
+         select(jobboard.Message)
+         .where(jobboard.Message.recipient_id == 1, jobboard.Message.deleted_at.is_(None),
+                tuple_(jobboard.Message.send_at, jobboard.Message.message_id)
+                < tuple_(datetime.datetime(2024, 1, 1), 100))
+         .order_by(jobboard.Message.send_at.desc(), jobboard.Message.message_id.desc()).limit(51),
+         ('ix_message_live_recipient_sent',)),
+        ('conversations of a user, latest first',
+         select(jobboard.Conversation)
+         .where(jobboard.Conversation.user_id == 1, jobboard.Conversation.last_message_id.is_not(None))
+         .order_by(jobboard.Conversation.last_send_at.desc(), jobboard.Conversation.last_message_id.desc()),
+         ('ix_conversation_user_latest',)),
+        ('unread messages of a conversation',
+         select(jobboard.Message.message_id)
+         .where(jobboard.Message.recipient_id == 1, jobboard.Message.sender_id == 2,
+                jobboard.Message.is_read == False, jobboard.Message.deleted_at.is_(None)),
+         ('ix_message_live_conversation', 'ix_message_live_unread', 'ix_message_recipient_read')),
+        ('recommended jobs of a user',
+         select(jobboard.JobPosting)
+         .join(jobboard.Recommendation, jobboard.Recommendation.job_id == jobboard.JobPosting.job_id)
+         .where(jobboard.Recommendation.user_id == 1, jobboard.JobPosting.deleted_at.is_(None))
+         .order_by(jobboard.Recommendation.rank),
+         ('sqlite_autoindex_recommendation_1',)),
+    ],
+    quiz: [
+        ('answers to a question',
+         select(quiz.Answer).where(quiz.Answer.question_id == 1),
+         ('ix_answer_question_student',)),
+        ('answers of a student',
+         select(quiz.Answer).where(quiz.Answer.student_id == 1),
+         ('ix_answer_student_question',)),
+        ('correct options of a question',
+         select(quiz.Option.option_text).where(quiz.Option.question_id == 1, quiz.Option.is_correct == True),
+         ('ix_option_question_correct',)),
+        ('questions of a quiz',
+         select(quiz.Question).where(quiz.Question.quiz_id == 1),
+         ('ix_question_quiz_id',)),
+    ],
+    travel: [
+        ('bookings of a user',
+         select(travel.Booking).where(travel.Booking.user_id == 1),
+         ('ix_bookings_user_date',)),
+        ('bookings of a tour',
+         select(travel.Booking).where(travel.Booking.tour_id == 1),
+         ('ix_bookings_tour_travel_date',)),
+        ('payments of a booking',
+         select(travel.Payment).where(travel.Payment.booking_id == 1),
+         ('ix_payments_booking_id',)),
+        ('tour rating aggregate',
+         select(func.avg(travel.Review.rating), func.count()).where(travel.Review.tour_id == 1),
+         ('ix_reviews_tour_rating',)),
+        ('keyset page of tours by start date',
+         select(travel.Tour)
+         .where(travel.Tour.deleted_at.is_(None),
+                tuple_(travel.Tour.start_date, travel.Tour.tour_id) > tuple_(datetime.date(2024, 1, 1), 5))
+         .order_by(travel.Tour.start_date, travel.Tour.tour_id).limit(51),
+         ('ix_tours_live_start_date',)),
+    ],
+    events: [
+        ('agenda of an event',
+         select(events.Agenda).where(events.Agenda.event_id == 1),
+         ('ix_agenda_event_id',)),
+        ('guests of an event',
+         select(events.Invited).where(events.Invited.event_id == 1),
+         ('ix_invited_event_seat',)),
+    ],
+}
+
+
+def explain(connection, statement):
+    sql = statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+    return [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+
+
+def check_query_plans(schemas=None):
+    """Return ``(schema, label, plan, expected)`` for every hot query that misses its indexes."""
+    failures = []
+    for module, queries in HOT_QUERIES.items():
+        if schemas and module.__name__ not in schemas:
+            continue
+        engine = create_engine('sqlite://')
+        ORMEngine.sync_schema(engine, module.Base.metadata)
+        with engine.connect() as connection:
+            for label, statement, expected in queries:
+                plan = explain(connection, statement)
+                if not any(name in step for step in plan for name in expected):
+                    failures.append((module.__name__, label, plan, expected))
+        engine.dispose()
+    return failures
@@ -1,7 +1,14 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Enum, DateTime, Boolean, ForeignKey, DECIMAL
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime, timezone
+from sqlalchemy.orm import relationship
+
+import ORMArchive
+import ORMBulkLoad
+import ORMEngine
+from ORMStreaming import stream
+from ORMTypes import Cents, SmallEnum, utc_now
+
+DATABASE_URI = 'sqlite:///ORMQuizDb.sqlite'
 
 Base = declarative_base()
 
@@ -11,9 +18,12 @@ class User(Base):
     name = Column(String, nullable=False)
     email = Column(String, nullable=False)
     password = Column(String, nullable=False)
-    role = Column(Enum('teacher', 'student', name='user_roles'), nullable=False)
-    createdAt = Column(DateTime, default=datetime.now(timezone.utc))
-    updatedAt = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    role = Column(SmallEnum('teacher', 'student'), nullable=False)
+    createdAt = Column(DateTime, default=utc_now(), server_default=utc_now())
+    updatedAt = Column(DateTime, default=utc_now(), server_default=utc_now(), onupdate=utc_now())
+    quizzes = relationship('Quiz', back_populates='teacher', passive_deletes='all')
+    answers = relationship('Answer', back_populates='student', passive_deletes='all')
+    results = relationship('Result', back_populates='student', passive_deletes='all')
 
 class Quiz(Base):
     __tablename__ = 'quiz'
@@ -21,20 +31,26 @@ class Quiz(Base):
     title = Column(String, nullable=False)
     description = Column(Text)
     quiz_code = Column(String, unique=True)
-    teacher_id = Column(Integer, ForeignKey('user.user_id'))
+    teacher_id = Column(Integer, ForeignKey('user.user_id'), index=True)
     duration = Column(Integer)
-    createdAt = Column(DateTime, default=datetime.now(timezone.utc))
-    updatedAt = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
-    teacher = relationship("User")
+    createdAt = Column(DateTime, default=utc_now(), server_default=utc_now())
+    updatedAt = Column(DateTime, default=utc_now(), server_default=utc_now(), onupdate=utc_now())
+    teacher = relationship("User", back_populates='quizzes')
+    questions = relationship('Question', back_populates='quiz', passive_deletes='all')
+    results = relationship('Result', back_populates='quiz', passive_deletes='all')
+    __table_args__ = {'info': {'natural_key': ('quiz_code',)}}
 
 class Question(Base):
     __tablename__ = 'question'
     question_id = Column(Integer, primary_key=True)
-    quiz_id = Column(Integer, ForeignKey('quiz.quiz_id'))
+    quiz_id = Column(Integer, ForeignKey('quiz.quiz_id'), index=True)
     question_text = Column(Text, nullable=False)
-    question_type = Column(Enum('MCQ', 'true or false', 'short answer', 'multimedia', name='question_types'))
-    createdAt = Column(DateTime, default=datetime.now(timezone.utc))
-    updatedAt = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    question_type = Column(SmallEnum('MCQ', 'true or false', 'short answer', 'multimedia'))
+    createdAt = Column(DateTime, default=utc_now(), server_default=utc_now())
+    updatedAt = Column(DateTime, default=utc_now(), server_default=utc_now(), onupdate=utc_now())
+    quiz = relationship('Quiz', back_populates='questions')
+    options = relationship('Option', back_populates='question', passive_deletes='all')
+    answers = relationship('Answer', back_populates='question', passive_deletes='all')
 
 class Option(Base):
     __tablename__ = 'option'
@@ -42,6 +58,10 @@ class Option(Base):
     question_id = Column(Integer, ForeignKey('question.question_id'))
     option_text = Column(String, nullable=False)
     is_correct = Column(Boolean)
+    question = relationship('Question', back_populates='options')
+    __table_args__ = (
+        Index('ix_option_question_correct', question_id, is_correct),
+    )
 
 class Answer(Base):
     __tablename__ = 'answer'
@@ -49,94 +69,104 @@ class Answer(Base):
     question_id = Column(Integer, ForeignKey('question.question_id'))
     student_id = Column(Integer, ForeignKey('user.user_id'))
     answer_text = Column(Text)
-    submitted_At = Column(DateTime, default=datetime.now(timezone.utc))
+    submitted_At = Column(DateTime, default=utc_now(), server_default=utc_now())
+    question = relationship('Question', back_populates='answers')
+    student = relationship('User', back_populates='answers')
+    __table_args__ = (
+        Index('ix_answer_question_student', question_id, student_id),
+        Index('ix_answer_student_question', student_id, question_id),
+    )
 
 class Result(Base):
     __tablename__ = 'result'
     result_id = Column(Integer, primary_key=True)
     quiz_id = Column(Integer, ForeignKey('quiz.quiz_id'))
     student_id = Column(Integer, ForeignKey('user.user_id'))
-    score = Column(DECIMAL(5, 2))
-    submitted_At = Column(DateTime, default=datetime.now(timezone.utc))
-
-engine = create_engine('sqlite:///ORMQuizDb.sqlite')
-Base.metadata.create_all(engine)
-
-Session = sessionmaker(bind=engine)
-session = Session()
-
-def add_dummy_data():
-    users = [
-        User(name='Alice', email='alice@example.com', password='password', role='student'),
-        User(name='Bob', email='bob@example.com', password='password', role='teacher'),
-        User(name='Charlie', email='charlie@example.com', password='password', role='student'),
-        User(name='David', email='david@example.com', password='password', role='teacher'),
-        User(name='Eve', email='eve@example.com', password='password', role='student')
-    ]
-    session.add_all(users)
-    session.commit()
-
-    quizzes = [
-        Quiz(title='Math Quiz 1', description='Basic Math Quiz', quiz_code='MATH101', teacher_id=2, duration=30),
-        Quiz(title='Science Quiz 1', description='Basic Science Quiz', quiz_code='SCI101', teacher_id=4, duration=30),
-        Quiz(title='History Quiz 1', description='World History Quiz', quiz_code='HIST101', teacher_id=2, duration=30),
-        Quiz(title='Geography Quiz 1', description='Geography Basics Quiz', quiz_code='GEOG101', teacher_id=4, duration=30),
-        Quiz(title='Literature Quiz 1', description='Basic Literature Quiz', quiz_code='LIT101', teacher_id=2, duration=30),
-    ]
-    session.add_all(quizzes)
-    session.commit()
-
-    questions = [
-        Question(quiz_id=1, question_text='What is 2 + 2?', question_type='MCQ'),
-        Question(quiz_id=1, question_text='Is the Earth flat?', question_type='true or false'),
-        Question(quiz_id=2, question_text='What is H2O commonly known as?', question_type='short answer'),
-        Question(quiz_id=2, question_text='What is the capital of France?', question_type='MCQ'),
-        Question(quiz_id=3, question_text='Who was the first President of the USA?', question_type='short answer'),
-    ]
-    session.add_all(questions)
+    score = Column(Cents())
+    submitted_At = Column(DateTime, default=utc_now(), server_default=utc_now())
+    quiz = relationship('Quiz', back_populates='results')
+    student = relationship('User', back_populates='results')
+    __table_args__ = (
+        # One result per student and quiz; ORMGrading upserts against it
+        Index('uq_result_quiz_student', quiz_id, student_id, unique=True),
+        Index('ix_result_student', student_id),
+    )
+
+# ORMGrading reads the archived answers back when it regrades
+ORMArchive.register(Answer, 'submitted_At')
+
+def get_engine(uri=DATABASE_URI):
+    return ORMEngine.get_engine(uri, Base.metadata)
+
+def get_sessionmaker(uri=DATABASE_URI):
+    get_engine(uri)
+    return ORMEngine.get_sessionmaker(uri)
+
+def get_session(uri=DATABASE_URI):
+    return get_sessionmaker(uri)()
+
+def __getattr__(name):
+    # Backwards compatible, lazily built `engine` / `Session` module attributes.
+    if name == 'engine':
+        return get_engine()
+    if name == 'Session':
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def add_dummy_data(session):
+    ORMBulkLoad.upsert(session, {
+        User: [
+            dict(user_id=1, name='Alice', email='alice@example.com', password='password', role='student'),
+            dict(user_id=2, name='Bob', email='bob@example.com', password='password', role='teacher'),
+            dict(user_id=3, name='Charlie', email='charlie@example.com', password='password', role='student'),
+            dict(user_id=4, name='David', email='david@example.com', password='password', role='teacher'),
+            dict(user_id=5, name='Eve', email='eve@example.com', password='password', role='student'),
+        ],
+        Quiz: [
+            dict(quiz_id=1, title='Math Quiz 1', description='Basic Math Quiz', quiz_code='MATH101', teacher_id=2, duration=30),
+            dict(quiz_id=2, title='Science Quiz 1', description='Basic Science Quiz', quiz_code='SCI101', teacher_id=4, duration=30),
+            dict(quiz_id=3, title='History Quiz 1', description='World History Quiz', quiz_code='HIST101', teacher_id=2, duration=30),
+            dict(quiz_id=4, title='Geography Quiz 1', description='Geography Basics Quiz', quiz_code='GEOG101', teacher_id=4, duration=30),
+            dict(quiz_id=5, title='Literature Quiz 1', description='Basic Literature Quiz', quiz_code='LIT101', teacher_id=2, duration=30),
+        ],
+        Question: [
+            dict(question_id=1, quiz_id=1, question_text='What is 2 + 2?', question_type='MCQ'),
+            dict(question_id=2, quiz_id=1, question_text='Is the Earth flat?', question_type='true or false'),
+            dict(question_id=3, quiz_id=2, question_text='What is H2O commonly known as?', question_type='short answer'),
+            dict(question_id=4, quiz_id=2, question_text='What is the capital of France?', question_type='MCQ'),
+            dict(question_id=5, quiz_id=3, question_text='Who was the first President of the USA?', question_type='short answer'),
+        ],
+        Option: [
+            dict(option_id=1, question_id=1, option_text='3', is_correct=False),
+            dict(option_id=2, question_id=1, option_text='4', is_correct=True),
+            dict(option_id=3, question_id=1, option_text='5', is_correct=False),
+            dict(option_id=4, question_id=2, option_text='True', is_correct=False),
+            dict(option_id=5, question_id=2, option_text='False', is_correct=True),
+            dict(option_id=6, question_id=4, option_text='London', is_correct=False),
+            dict(option_id=7, question_id=4, option_text='Paris', is_correct=True),
+            dict(option_id=8, question_id=4, option_text='Berlin', is_correct=False),
+            dict(option_id=9, question_id=5, option_text='George Washington', is_correct=True),
+            dict(option_id=10, question_id=5, option_text='Abraham Lincoln', is_correct=False),
+        ],
+        Answer: [
+            dict(answer_id=1, question_id=1, student_id=1, answer_text='4'),
+            dict(answer_id=2, question_id=2, student_id=3, answer_text='False'),
+            dict(answer_id=3, question_id=3, student_id=1, answer_text='Water'),
+            dict(answer_id=4, question_id=4, student_id=1, answer_text='Paris'),
+            dict(answer_id=5, question_id=5, student_id=3, answer_text='George Washington'),
+        ],
+    })
+    import ORMGrading
+
+    ORMGrading.grade(session.connection())
     session.commit()
 
-    options = [
-        Option(question_id=1, option_text='3', is_correct=False),
-        Option(question_id=1, option_text='4', is_correct=True),
-        Option(question_id=1, option_text='5', is_correct=False),
-        Option(question_id=2, option_text='True', is_correct=False),
-        Option(question_id=2, option_text='False', is_correct=True),
-        Option(question_id=4, option_text='London', is_correct=False),
-        Option(question_id=4, option_text='Paris', is_correct=True),
-        Option(question_id=4, option_text='Berlin', is_correct=False),
-        Option(question_id=5, option_text='George Washington', is_correct=True),
-        Option(question_id=5, option_text='Abraham Lincoln', is_correct=False),
-    ]
-    session.add_all(options)
-    session.commit()
+seed = add_dummy_data
 
-    answers = [
-        Answer(question_id=1, student_id=1, answer_text='4'),
-        Answer(question_id=2, student_id=3, answer_text='False'),
-        Answer(question_id=3, student_id=1, answer_text='Water'),
-        Answer(question_id=4, student_id=1, answer_text='Paris'),
-        Answer(question_id=5, student_id=3, answer_text='George Washington')
-    ]
-    session.add_all(answers)
-    session.commit()
-
-    results = [
-        Result(quiz_id=1, student_id=1, score=80.00),
-        Result(quiz_id=2, student_id=3, score=90.00),
-        Result(quiz_id=3, student_id=1, score=85.00),
-        Result(quiz_id=4, student_id=2, score=75.00),
-        Result(quiz_id=5, student_id=3, score=95.00)
-    ]
-    session.add_all(results)
-    session.commit()
-
-add_dummy_data()
-
-def crud_example():
+def crud_example(session):
     print("All Users:")
-    for user in session.query(User).all():
-        print(user.name, user.email)
+    for name, email in stream(session, User, columns=('name', 'email')):
+        print(name, email)
 
     user_to_update = session.query(User).filter_by(user_id=1).first()
     user_to_update.name = 'Alicia'
@@ -147,9 +177,11 @@ def crud_example():
     session.commit()
 
     print("\nUsers after update and delete:")
-    for user in session.query(User).all():
-        print(user.name, user.email)
-
-crud_example()
-
-session.close()
\ No newline at end of file
+    for name, email in stream(session, User, columns=('name', 'email')):
+        print(name, email)
+
+if __name__ == '__main__':
+    session = get_session()
+    add_dummy_data(session)
+    crud_example(session)
+    session.close()
@@ -0,0 +1,80 @@
+from sqlalchemy import func, select, update
+
+# Review rows roll up into rating_sum / rating_count / avg_rating on the
+# reviewed row (Product, Tour). SQLite triggers keep them current for every
+# write path, ORM flushes and Core bulk inserts alike, inside the writing
+# transaction; rebuild_ratings recomputes them from scratch. Rows reviewed
+# before the triggers existed are backfilled when the schema is synced.
+
+TOLERANCE = 1e-9
+
+
+def _link(reviews, target):
+    pk = list(target.primary_key)[0]
+    fk = next(column for column in reviews.columns
+              if any(key.column is pk for key in column.foreign_keys))
+    return fk.name, pk.name
+
+
+def rating_triggers(reviews, target):
+    fk, pk = _link(reviews, target)
+    add = ("UPDATE {t} SET rating_sum = rating_sum + {r}.rating, rating_count = rating_count + 1, "
+           "avg_rating = CAST(rating_sum + {r}.rating AS REAL) / (rating_count + 1) "
+           "WHERE {pk} = {r}.{fk} AND {r}.rating IS NOT NULL;")
+    remove = ("UPDATE {t} SET rating_sum = rating_sum - {r}.rating, rating_count = rating_count - 1, "
+              "avg_rating = CASE WHEN rating_count > 1 "
+              "THEN CAST(rating_sum - {r}.rating AS REAL) / (rating_count - 1) END "
+              "WHERE {pk} = {r}.{fk} AND {r}.rating IS NOT NULL;")
+    names = dict(t=target.name, pk=pk, fk=fk)
+    rated = f"FROM {reviews.name} WHERE {reviews.name}.{fk} = {target.name}.{pk} AND rating IS NOT NULL"
+    # Lets ORMCache drop cached target rows when only the reviews are written
+    reviews.info.setdefault('trigger_writes', set()).add(target.name)
+    prefix = f'trg_{reviews.name}_{target.name}_rating'
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_insert AFTER INSERT ON {reviews.name} "
+        f"BEGIN {add.format(r='NEW', **names)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_update AFTER UPDATE OF rating, {fk} ON {reviews.name} "
+        f"BEGIN {remove.format(r='OLD', **names)} {add.format(r='NEW', **names)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_delete AFTER DELETE ON {reviews.name} "
+        f"BEGIN {remove.format(r='OLD', **names)} END",
+        # Backfill: rows reviewed before the columns and triggers existed still count 0
+        f"UPDATE {target.name} SET rating_sum = (SELECT sum(rating) {rated}), "
+        f"rating_count = (SELECT count(*) {rated}), avg_rating = (SELECT avg(rating) {rated}) "
+        f"WHERE rating_count = 0 AND EXISTS (SELECT 1 {rated})",
+    ]
+
+
+def _actual(reviews, target):
+    fk, pk = _link(reviews, target)
+    correlated = reviews.c[fk] == target.c[pk]
+    return (
+        select(func.coalesce(func.sum(reviews.c.rating), 0)).where(correlated).scalar_subquery(),
+        select(func.count(reviews.c.rating)).where(correlated).scalar_subquery(),
+        select(func.avg(reviews.c.rating)).where(correlated).scalar_subquery(),
+    )
+
+
+def rebuild_ratings(connection, reviews, target):
+    """Recompute every aggregate of ``target`` from ``reviews``; returns the rows updated."""
+    rating_sum, rating_count, avg_rating = _actual(reviews, target)
+    result = connection.execute(update(target).values(rating_sum=rating_sum, rating_count=rating_count,
+                                                      avg_rating=avg_rating))
+    return result.rowcount
+
+
+def check_ratings(connection, reviews, target):
+    """Return ``(pk, stored, actual)`` for each row whose aggregates have drifted."""
+    _, pk = _link(reviews, target)
+    rating_sum, rating_count, avg_rating = _actual(reviews, target)
+    rows = connection.execute(select(
+        target.c[pk], target.c.rating_sum, target.c.rating_count, target.c.avg_rating,
+        rating_sum, rating_count, avg_rating,
+    ))
+    drifted = []
+    for key, *values in rows:
+        stored, actual = tuple(values[:3]), tuple(values[3:])
+        same_avg = (stored[2] is None and actual[2] is None) or (
+            stored[2] is not None and actual[2] is not None and abs(stored[2] - actual[2]) <= TOLERANCE)
+        if stored[:2] != actual[:2] or not same_avg:
+            drifted.append((key, stored, actual))
+    return drifted
@@ -0,0 +1,265 @@
+import re
+
+import numpy as np
+from sqlalchemy import case, delete, func, insert, select, true, union, update
+
+import ORMBulkLoad
+from ORMJobBoardDb import (JobInteraction, JobPosting, Recommendation, RecommendationRefresh, Skill, User,
+                           UserSkill)
+
+# Job recommendations are precomputed into the recommendation table, K rows
+# per user, so serving them is one primary key range scan.
+#
+# refresh() scores users against every live posting with NumPy. A user is
+# described by the skills in user_skill (User.skills split into rows by
+# sync_skills) and by the postings they viewed or applied to: the share of
+# their interactions per category and industry and the mean salary they
+# looked at, weighted so that an application counts APPLIED_WEIGHT times. A
+# posting is described by the skills named in its title or description, its
+# category, industry and salary midpoint. The score adds the cosine of the two
+# skill vectors to the weighted category, industry and salary affinities;
+# postings the user already applied to are left out.
+#
+# Each refresh records the highest interaction_id it has seen. The next one
+# only recomputes the users with newer interactions or with User.updated_at
+# after that refresh, so interactions must get increasing ids (SQLite
+# assigns them so unless the highest row is deleted). Postings feed every
+# user, so after postings change run a full refresh.
+
+DEFAULT_K = 20
+BLOCK_SIZE = 1024
+APPLIED_WEIGHT = 3
+CATEGORY_WEIGHT = 0.5
+INDUSTRY_WEIGHT = 0.25
+SALARY_WEIGHT = 0.25
+SALARY_SCALE = 20000.0
+TOLERANCE = 1e-6
+
+
+def parse_skills(text):
+    """Distinct skill names of a comma-separated ``skills`` text, in their first spelling."""
+    names = {}
+    for name in (text or '').split(','):
+        name = ' '.join(name.split())
+        if name:
+            names.setdefault(name.casefold(), name)
+    return list(names.values())
+
+
+def _skill_ids(connection):
+    return {name.casefold(): skill_id for skill_id, name in connection.execute(select(Skill.skill_id, Skill.name))}
+
+
+def _in(column, user_ids):
+    return true() if user_ids is None else column.in_(user_ids)
+
+
+def sync_skills(connection, user_ids=None):
+    """Rewrite the user_skill rows of ``user_ids`` (a list or SELECT, every user by default) from User.skills.
+
+    Skill names not seen before are added to skill. Returns the number of
+    user_skill rows written.
+    """
+    parsed = [(user_id, parse_skills(skills))
+              for user_id, skills in connection.execute(select(User.user_id, User.skills)
+                                                        .where(_in(User.user_id, user_ids)))]
+    known = _skill_ids(connection)
+    new = {name.casefold(): name for _, names in parsed for name in names if name.casefold() not in known}
+    if new:
+        ORMBulkLoad.bulk_load(connection, {Skill: [{'name': name} for name in new.values()]})
+        known = _skill_ids(connection)
+    connection.execute(delete(UserSkill).where(_in(UserSkill.user_id, user_ids)))
+    rows = ((user_id, known[name.casefold()]) for user_id, names in parsed for name in names)
+    return ORMBulkLoad.bulk_load(connection, {UserSkill: rows})[UserSkill.__tablename__]
+
+
+def _skill_pattern(names):
+    # Whole-word match of any skill; names such as C++ and C# end in symbols
+    alternatives = '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(rf'(?<![\w+#])({alternatives})(?![\w+#])', re.IGNORECASE)
+
+
+def _codes(values):
+    # Small integer code per distinct value, None included
+    vocabulary = {}
+    return np.array([vocabulary.setdefault(value, len(vocabulary)) for value in values], dtype=np.intp), len(vocabulary)
+
+
+def _midpoints(low, high):
+    low, high = np.array(low, dtype=np.float64), np.array(high, dtype=np.float64)
+    return np.where(np.isnan(low), high, np.where(np.isnan(high), low, (low + high) / 2))
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _jobs(connection, skill_columns):
+    rows = connection.execute(
+        select(JobPosting.job_id, JobPosting.job_title, JobPosting.job_description, JobPosting.category,
+               JobPosting.industry, JobPosting.min_salary, JobPosting.max_salary)
+        .where(JobPosting.deleted_at.is_(None)).order_by(JobPosting.job_id)).all()
+    skills = np.zeros((len(rows), len(skill_columns)), dtype=np.float32)
+    if skill_columns:
+        pattern = _skill_pattern(skill_columns)
+        for position, row in enumerate(rows):
+            for name in pattern.findall(f'{row.job_title or ""} {row.job_description or ""}'):
+                skills[position, skill_columns[name.casefold()]] = 1
+    return {
+        'ids': np.array([row.job_id for row in rows], dtype=np.int64),
+        'skills': _unit_rows(skills),
+        'categories': _codes(row.category for row in rows),
+        'industries': _codes(row.industry for row in rows),
+        'salary': _midpoints([row.min_salary for row in rows], [row.max_salary for row in rows]),
+    }
+
+
+def _positions(ids, sorted_ids):
+    # Index of every id in sorted_ids, and whether it is there at all
+    positions = np.searchsorted(sorted_ids, ids).clip(max=max(len(sorted_ids) - 1, 0))
+    return positions, (sorted_ids[positions] == ids) if len(sorted_ids) else np.zeros(len(ids), dtype=bool)
+
+
+def _array(connection, statement, width):
+    # Rows as an int64 matrix; tuples first, numpy probes Row objects key by key
+    rows = list(map(tuple, connection.execute(statement)))
+    return np.array(rows, dtype=np.int64).reshape(-1, width)
+
+
+def _users(connection, user_ids, jobs, skill_ids):
+    users = _array(connection, select(User.user_id).where(_in(User.user_id, user_ids)).order_by(User.user_id), 1)[:, 0]
+    skills = np.zeros((len(users), len(skill_ids)), dtype=np.float32)
+    pairs = _array(connection, select(UserSkill.user_id, UserSkill.skill_id).where(_in(UserSkill.user_id, user_ids)), 2)
+    rows, found = _positions(pairs[:, 0], users)
+    columns, known = _positions(pairs[:, 1], skill_ids)
+    skills[rows[found & known], columns[found & known]] = 1
+
+    weight = func.sum(case((JobInteraction.is_applied == True, APPLIED_WEIGHT), else_=1))
+    applied = func.coalesce(func.max(JobInteraction.is_applied), 0)
+    interactions = _array(connection, select(JobInteraction.user_id, JobInteraction.job_id, weight, applied)
+                          .where(_in(JobInteraction.user_id, user_ids))
+                          .group_by(JobInteraction.user_id, JobInteraction.job_id), 4)
+    rows, found = _positions(interactions[:, 0], users)
+    job_positions, live = _positions(interactions[:, 1], jobs['ids'])
+    keep = found & live
+    rows, job_positions, weights = rows[keep], job_positions[keep], interactions[keep, 2].astype(np.float64)
+
+    features = {'ids': users, 'skills': _unit_rows(skills)}
+    for name in ('categories', 'industries'):
+        codes, size = jobs[name]
+        shares = np.zeros((len(users), size), dtype=np.float32)
+        np.add.at(shares, (rows, codes[job_positions]), weights)
+        totals = shares.sum(axis=1, keepdims=True)
+        features[name] = np.divide(shares, totals, out=shares, where=totals > 0)
+    salary = jobs['salary'][job_positions]
+    priced = ~np.isnan(salary)
+    total = np.bincount(rows[priced], weights[priced] * salary[priced], minlength=len(users))
+    count = np.bincount(rows[priced], weights[priced], minlength=len(users))
+    features['salary'] = np.divide(total, count, out=np.full(len(users), np.nan), where=count > 0)
+    applied = interactions[keep, 3] != 0
+    features['applied'] = (rows[applied], job_positions[applied])
+    return features
+
+
+def scores(connection, user_ids=None, k=DEFAULT_K):
+    """Score ``user_ids`` (a list or SELECT, every user by default) against the live postings.
+
+    Returns ``(users, rows)``: the ids of the users scored and an iterator of
+    ``(user_id, rank, job_id, score)`` for their top ``k`` postings, best first.
+    """
+    skills = connection.execute(select(Skill.skill_id, Skill.name).order_by(Skill.skill_id)).all()
+    skill_ids = np.array([skill_id for skill_id, _ in skills], dtype=np.int64)
+    skill_columns = {name.casefold(): position for position, (_, name) in enumerate(skills)}
+    jobs = _jobs(connection, skill_columns)
+    users = _users(connection, user_ids, jobs, skill_ids)
+    return users['ids'], _top_k(users, jobs, min(k, len(jobs['ids'])))
+
+
+def _top_k(users, jobs, k):
+    if k == 0:
+        return
+    applied_rows, applied_jobs = users['applied']
+    job_categories, _ = jobs['categories']
+    job_industries, _ = jobs['industries']
+    for start in range(0, len(users['ids']), BLOCK_SIZE):
+        stop = start + BLOCK_SIZE
+        block = users['skills'][start:stop] @ jobs['skills'].T
+        block += CATEGORY_WEIGHT * users['categories'][start:stop][:, job_categories]
+        block += INDUSTRY_WEIGHT * users['industries'][start:stop][:, job_industries]
+        gap = np.abs(users['salary'][start:stop, None] - jobs['salary'][None, :])
+        block += SALARY_WEIGHT * np.nan_to_num(np.exp(-gap / SALARY_SCALE))
+        inside = (applied_rows >= start) & (applied_rows < stop)
+        block[applied_rows[inside] - start, applied_jobs[inside]] = -np.inf
+
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        # Best first; equal scores in posting order
+        order = np.lexsort((top, -top_scores), axis=1)
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        job_ids = jobs['ids'][top]
+        for user_id, ranked_jobs, ranked_scores in zip(users['ids'][start:stop].tolist(), job_ids.tolist(),
+                                                       top_scores.tolist()):
+            for rank, (job_id, score) in enumerate(zip(ranked_jobs, ranked_scores), 1):
+                if score == -np.inf:
+                    break
+                yield user_id, rank, job_id, score
+
+
+def refresh(connection, k=DEFAULT_K, full=False):
+    """Recompute the recommendations of users with new interactions or skills since the last refresh.
+
+    The first refresh, and ``full=True``, recompute every user. Runs in the
+    transaction of ``connection``. Returns the number of users refreshed.
+    """
+    last = connection.execute(select(RecommendationRefresh.last_interaction_id, RecommendationRefresh.refreshed_at)
+                              .order_by(RecommendationRefresh.refresh_id.desc()).limit(1)).first()
+    user_ids = None
+    if last is not None and not full:
+        user_ids = union(
+            select(JobInteraction.user_id).where(JobInteraction.interaction_id > last.last_interaction_id),
+            select(User.user_id).where(User.updated_at > last.refreshed_at),
+        )
+    # Stamped now, so users edited while this refresh runs are picked up by the next one
+    refresh_id = connection.execute(insert(RecommendationRefresh).values(
+        last_interaction_id=select(func.coalesce(func.max(JobInteraction.interaction_id), 0)).scalar_subquery()
+    )).inserted_primary_key[0]
+
+    sync_skills(connection, user_ids)
+    users, rows = scores(connection, user_ids, k)
+    connection.execute(delete(Recommendation).where(_in(Recommendation.user_id, user_ids)))
+    ORMBulkLoad.bulk_load(connection, {Recommendation: rows})
+    connection.execute(update(RecommendationRefresh).where(RecommendationRefresh.refresh_id == refresh_id)
+                       .values(users=len(users)))
+    return len(users)
+
+
+def recommended_jobs(session, user_id, limit=None):
+    """Live postings recommended to ``user_id``, best first."""
+    statement = (
+        select(JobPosting)
+        .join(Recommendation, Recommendation.job_id == JobPosting.job_id)
+        .where(Recommendation.user_id == user_id)
+        .order_by(Recommendation.rank)
+        .limit(limit)
+    )
+    return session.scalars(statement).all()
+
+
+def check_recommendations(connection, user_ids=None, k=DEFAULT_K):
+    """Return ``(user_id, rank, stored, actual)`` for every rank whose ``(job_id, score)`` is out of date.
+
+    Scores equal within TOLERANCE match whatever their posting, so ties do
+    not count as drift.
+    """
+    stored = {(user_id, rank): (job_id, score) for user_id, rank, job_id, score in connection.execute(
+        select(Recommendation.user_id, Recommendation.rank, Recommendation.job_id, Recommendation.score)
+        .where(_in(Recommendation.user_id, user_ids)))}
+    _, rows = scores(connection, user_ids, k)
+    actual = {(user_id, rank): (job_id, score) for user_id, rank, job_id, score in rows}
+    drifted = []
+    for key in sorted(stored.keys() | actual.keys()):
+        before, after = stored.get(key), actual.get(key)
+        if before is None or after is None or abs(before[1] - after[1]) > TOLERANCE:
+            drifted.append((*key, before, after))
+    return drifted
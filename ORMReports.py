@@ -0,0 +1,151 @@
+import itertools
+import math
+
+import numpy as np
+from sqlalchemy import func, select
+
+import ORMColumnar
+import ORMEcommerceDb as ecommerce
+import ORMTravelBookingDb as travel
+
+# Sales and booking reports over ORMColumnar snapshots instead of GROUP BY on
+# the live databases. Every report has a vectorized version, which reads the
+# snapshot in a directory, and the same report as live SQL, which
+# check_reports() compares it with. Both return the same rows, in group order
+# (categories in the order the export first met them, so check_reports()
+# sorts both sides).
+#
+# Orders have no updated_at, so their status changes only reach the snapshot
+# with a full export; bookings are re-read when their updated_at moves.
+
+ORMColumnar.register(ecommerce.Order, 'status', 'total_amount', 'created_at')
+ORMColumnar.register(ecommerce.OrderItem, 'order_id', 'product_id', 'quantity', 'price')
+ORMColumnar.register(travel.Booking, 'tour_id', 'total_amount', 'payment_status', 'booking_date', mark='updated_at')
+ORMColumnar.register(travel.Payment, 'booking_id', 'amount', 'payment_status', 'payment_date')
+
+# schema -> models its reports read
+TABLES = {
+    'ecommerce': (ecommerce.Order, ecommerce.OrderItem),
+    'travel': (travel.Booking, travel.Payment),
+}
+
+
+def _sorted(rows):
+    return sorted(rows, key=lambda row: [(value is None, value) for value in row])
+
+
+def _text(dates):
+    # 'YYYY-MM-DD' or 'YYYY-MM' per the unit of ``dates``, None for NaT
+    return [None if text == 'NaT' else text for text in np.datetime_as_string(dates).tolist()]
+
+
+def _amount(column):
+    # Sum of an ORMTypes.Cents column in currency units, 0 for no rows
+    return func.total(column) / column.type.factor
+
+
+def _equals(snapshot, name, value):
+    categories = snapshot.categories(name)
+    code = categories.index(value) if value in categories else ORMColumnar.NULL_CODE - 1
+    return snapshot.column(name) == code
+
+
+def revenue_by_status_day(directory):
+    """``(status, day, orders, revenue)`` of every status and day an order was placed."""
+    orders = ORMColumnar.Snapshot(directory, ecommerce.Order)
+    (status, day), counts, sums = ORMColumnar.group_by(
+        [orders.column('status'), orders.column('created_at').astype('datetime64[D]')], orders.column('total_amount'))
+    return list(zip(orders.decode('status', status), _text(day), counts.tolist(), sums.tolist()))
+
+
+def live_revenue_by_status_day(connection):
+    day = func.date(ecommerce.Order.created_at)
+    return connection.execute(
+        select(ecommerce.Order.status, day, func.count(), _amount(ecommerce.Order.total_amount))
+        .group_by(ecommerce.Order.status, day)).all()
+
+
+def quantity_by_product(directory):
+    """``(product_id, order lines, units)`` of every product ordered."""
+    items = ORMColumnar.Snapshot(directory, ecommerce.OrderItem)
+    (product,), counts, sums = ORMColumnar.group_by([items.column('product_id')], items.column('quantity'))
+    return list(zip(items.decode('product_id', product), counts.tolist(), sums.astype(np.int64).tolist()))
+
+
+def live_quantity_by_product(connection):
+    return connection.execute(
+        select(ecommerce.OrderItem.product_id, func.count(), func.coalesce(func.sum(ecommerce.OrderItem.quantity), 0))
+        .group_by(ecommerce.OrderItem.product_id)).all()
+
+
+def revenue_by_tour_month(directory):
+    """``(tour_id, month, bookings, revenue)`` of the paid bookings, by month booked."""
+    bookings = ORMColumnar.Snapshot(directory, travel.Booking)
+    (tour, month), counts, sums = ORMColumnar.group_by(
+        [bookings.column('tour_id'), bookings.column('booking_date').astype('datetime64[M]')],
+        bookings.column('total_amount'), where=_equals(bookings, 'payment_status', 'SUCCESS'))
+    return list(zip(bookings.decode('tour_id', tour), _text(month), counts.tolist(), sums.tolist()))
+
+
+def live_revenue_by_tour_month(connection):
+    month = func.strftime('%Y-%m', travel.Booking.booking_date)
+    return connection.execute(
+        select(travel.Booking.tour_id, month, func.count(), _amount(travel.Booking.total_amount))
+        .where(travel.Booking.payment_status == 'SUCCESS')
+        .group_by(travel.Booking.tour_id, month)).all()
+
+
+def payment_success_by_month(directory):
+    """``(month, payments, succeeded, success rate)`` by month paid."""
+    payments = ORMColumnar.Snapshot(directory, travel.Payment)
+    (month,), counts, sums = ORMColumnar.group_by([payments.column('payment_date').astype('datetime64[M]')],
+                                                 _equals(payments, 'payment_status', 'SUCCESS').astype(np.int64))
+    succeeded = sums.astype(np.int64)
+    return list(zip(_text(month), counts.tolist(), succeeded.tolist(), (succeeded / counts).tolist()))
+
+
+def live_payment_success_by_month(connection):
+    month = func.strftime('%Y-%m', travel.Payment.payment_date)
+    return [(month, count, succeeded, succeeded / count) for month, count, succeeded in connection.execute(
+        select(month, func.count(), func.count().filter(travel.Payment.payment_status == 'SUCCESS'))
+        .group_by(month))]
+
+
+# schema -> report name -> (snapshot report, live report)
+REPORTS = {
+    'ecommerce': {
+        'revenue by status and day': (revenue_by_status_day, live_revenue_by_status_day),
+        'units by product': (quantity_by_product, live_quantity_by_product),
+    },
+    'travel': {
+        'revenue by tour and month': (revenue_by_tour_month, live_revenue_by_tour_month),
+        'payment success by month': (payment_success_by_month, live_payment_success_by_month),
+    },
+}
+
+
+def export(connection, schema, directory, full=False, format='npy'):
+    """Export the tables of the reports of ``schema``; returns the rows read per table."""
+    return {model.__table__.name: ORMColumnar.export(connection, model, directory, format=format, full=full)
+            for model in TABLES[schema]}
+
+
+def _close(value, expected):
+    if isinstance(value, float) and isinstance(expected, (int, float)):
+        return math.isclose(value, expected, rel_tol=1e-9, abs_tol=1e-6)
+    return value == expected
+
+
+def _same(row, other):
+    return (row is not None and other is not None and len(row) == len(other)
+            and all(map(_close, row, other)))
+
+
+def check_reports(connection, schema, directory):
+    """Return ``(report, snapshot row, live row)`` for every row where the snapshot and the live SQL disagree."""
+    drifted = []
+    for name, (report, live) in REPORTS[schema].items():
+        for row, expected in itertools.zip_longest(_sorted(report(directory)), _sorted(live(connection))):
+            if not _same(row, expected):
+                drifted.append((name, row, expected))
+    return drifted
@@ -0,0 +1,138 @@
+import random
+import time
+from collections import namedtuple
+
+from sqlalchemy import and_, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+import ORMEcommerceDb as ecommerce
+import ORMEventManagementDb as events
+import ORMTravelBookingDb as travel
+
+# One line of a reservation: take `quantity` units from `column` of the row
+# whose primary key is `key`.
+Item = namedtuple('Item', ['column', 'key', 'quantity'])
+
+DEFAULT_RETRIES = 8
+
+
+class ReservationError(Exception):
+    pass
+
+
+class InsufficientCapacity(ReservationError):
+    def __init__(self, item):
+        super().__init__(f'not enough {item.column.key} on {item.column.table.name} {item.key} '
+                         f'for {item.quantity}')
+        self.item = item
+
+
+class SeatTaken(ReservationError):
+    pass
+
+
+def tour_seats(tour_id, seats):
+    return Item(travel.Tour.seats_available, tour_id, seats)
+
+
+def product_stock(product_id, quantity):
+    return Item(ecommerce.Product.stock, product_id, quantity)
+
+
+def _merge(items):
+    # Same row twice in one request becomes one UPDATE; a stable order keeps
+    # the statements of concurrent requests in the same sequence.
+    totals = {}
+    for item in items:
+        key = (item.column.table.name, item.column.key, item.key)
+        column, _, quantity = totals.get(key, (item.column, item.key, 0))
+        totals[key] = Item(column, item.key, quantity + item.quantity)
+    return [totals[key] for key in sorted(totals)]
+
+
+def take(connection, item):
+    """Conditionally decrement one item; raises InsufficientCapacity instead of overselling."""
+    if item.quantity <= 0:
+        raise ValueError('reservation quantity must be positive')
+    pk = list(item.column.table.primary_key)[0]
+    result = connection.execute(
+        update(item.column.table)
+        .where(and_(pk == item.key, item.column >= item.quantity))
+        .values({item.column: item.column - item.quantity})
+    )
+    if result.rowcount != 1:
+        raise InsufficientCapacity(item)
+
+
+def _is_busy(exc):
+    message = str(exc.orig).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def _retrying(engine, work, retries):
+    # work(connection) in its own transaction; a busy database is retried with jittered backoff
+    for attempt in range(retries + 1):
+        try:
+            with engine.begin() as connection:
+                return work(connection)
+        except OperationalError as exc:
+            if attempt == retries or not _is_busy(exc):
+                raise
+            time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+
+
+def reserve(engine, items, then=None, retries=DEFAULT_RETRIES):
+    """Take every item in a single transaction, or none of them.
+
+    Each item is one ``UPDATE ... SET col = col - :n WHERE pk = :key AND col >= :n``,
+    so concurrent reservations never oversell and never need a read first.
+    ``then(connection)`` runs in the same transaction afterwards, e.g. to insert
+    the booking or order rows. A busy database is retried with jittered backoff.
+    """
+    items = _merge(items)
+
+    def take_all(connection):
+        for item in items:
+            take(connection, item)
+        return then(connection) if then is not None else None
+    return _retrying(engine, take_all, retries)
+
+
+def release(engine, items, retries=DEFAULT_RETRIES):
+    """Give reserved units back, e.g. after a failed payment. Retried like reserve()."""
+    items = _merge(items)
+
+    def give_back(connection):
+        for item in items:
+            pk = list(item.column.table.primary_key)[0]
+            connection.execute(update(item.column.table).where(pk == item.key)
+                               .values({item.column: item.column + item.quantity}))
+    _retrying(engine, give_back, retries)
+
+
+def book_tour(engine, user_id, tour_id, seats, **booking):
+    """Reserve seats on a tour and record the booking; returns the new booking id."""
+    def insert_booking(connection):
+        values = dict(booking, user_id=user_id, tour_id=tour_id, seats_booked=seats)
+        return connection.execute(travel.Booking.__table__.insert().values(values)).inserted_primary_key[0]
+    return reserve(engine, [tour_seats(tour_id, seats)], then=insert_booking)
+
+
+def assign_seat(engine, invitation_id, seat_number, retries=DEFAULT_RETRIES):
+    """Give an invited guest a seat unless they already have one or it is taken.
+
+    ix_invited_event_seat makes seat numbers unique per event, so two guests
+    racing for the same seat cannot both get it. Retried like reserve().
+    """
+    invited = events.Invited.__table__
+    statement = (
+        update(invited)
+        .where(invited.c.invitation_id == invitation_id, invited.c.seat_number.is_(None))
+        .values(seat_number=seat_number)
+    )
+    try:
+        result = _retrying(engine, lambda connection: connection.execute(statement), retries)
+    except IntegrityError as exc:
+        raise SeatTaken(f'seat {seat_number} is already taken') from exc
+    if result.rowcount != 1:
+        raise SeatTaken(f'invitation {invitation_id} already has a seat')
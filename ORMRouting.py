@@ -0,0 +1,122 @@
+import contextlib
+import itertools
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+import ORMEngine
+
+# Read/write splitting for SQLite. A RoutingSession sends flushes, DML and
+# anything that is not a SELECT to the primary engine and SELECTs to one of
+# several read-only engines (mode=ro connections to the same WAL database), so
+# reads never queue behind the writer's connection pool.
+#
+# Once the current transaction has written, every statement goes to the
+# primary until it commits or rolls back, so a session always reads its own
+# writes. Readers see what was committed when their read transaction began;
+# use session.using('primary') where that is not fresh enough, and
+# session.using('reader') to force a read to a replica.
+
+DEFAULT_READERS = 2
+ROUTES = ('primary', 'reader')
+
+_factories = {}
+_lock = threading.Lock()
+
+
+class RoutingSession(Session):
+    """Session whose ``bind`` is the primary engine; SELECTs go to one of ``readers``."""
+
+    def __init__(self, readers=None, **kwargs):
+        super().__init__(**kwargs)
+        self.primary = self.bind
+        self.readers = readers or Readers([])
+        self._reader = None
+        self._route = None
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._route == 'primary' or self._flushing or not self.readers.engines:
+            return self.primary
+        if self._route == 'reader' or (not self._wrote and getattr(clause, 'is_select', False)):
+            if self._reader is None:
+                # One reader per transaction, so its reads share a snapshot
+                self._reader = self.readers.next()
+            return self._reader
+        return self.primary
+
+    @contextlib.contextmanager
+    def using(self, route):
+        """Send every statement in the block to ``'primary'`` or to a ``'reader'``."""
+        if route not in ROUTES:
+            raise ValueError(f'route must be one of {ROUTES}, not {route!r}')
+        previous, self._route = self._route, route
+        try:
+            yield self
+        finally:
+            self._route = previous
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _note_write(state):
+    if not state.is_select:
+        state.session._wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_flush(session, flush_context):
+    session._wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _reset_route(session, transaction):
+    if transaction.parent is None:
+        session._wrote = False
+        session._reader = None
+
+
+class Readers:
+    """Round-robin over the read-only engines of one database."""
+
+    def __init__(self, engines):
+        self.engines = engines
+        self._cycle = itertools.cycle(engines)
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            return next(self._cycle)
+
+    def dispose(self):
+        for engine in self.engines:
+            engine.dispose()
+
+
+def routing_sessionmaker(uri, metadata=None, readers=DEFAULT_READERS, reader_pool_size=1, **kwargs):
+    """Session factory writing through ``get_engine(uri)`` and reading through ``readers`` mode=ro engines.
+
+    Each reader engine keeps up to ``reader_pool_size`` connections. With
+    ``readers=0`` every statement goes to the primary.
+    """
+    primary = ORMEngine.get_engine(uri, metadata)
+    engines = [ORMEngine.create_reader_engine(uri, pool_size=reader_pool_size, max_overflow=0)
+               for _ in range(readers)]
+    return sessionmaker(bind=primary, class_=RoutingSession, readers=Readers(engines), **kwargs)
+
+
+def get_routing_sessionmaker(schema, uri=None, readers=DEFAULT_READERS):
+    """Cached routing session factory for a schema module such as ORMJobBoardDb."""
+    uri = uri or schema.DATABASE_URI
+    with _lock:
+        factory = _factories.get((uri, readers))
+        if factory is None:
+            factory = _factories[uri, readers] = routing_sessionmaker(uri, schema.Base.metadata, readers)
+    return factory
+
+
+def dispose_all():
+    with _lock:
+        for factory in _factories.values():
+            factory.kw['readers'].dispose()
+        _factories.clear()
@@ -0,0 +1,75 @@
+import re
+
+from sqlalchemy import Float, Integer, select, text
+
+# Full-text search over an FTS5 external-content table per searchable model:
+# the index stores only tokens and reads the text back from the model's own
+# table, and triggers keep it in step with every insert, update and delete.
+# An index added to a table that already has rows is filled when the schema
+# is synced: the triggers' 'delete' entries need the rows to be indexed.
+
+DEFAULT_LIMIT = 20
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_table_name(table):
+    return f'{table.name}_fts'
+
+
+def fts_ddl(table, columns):
+    table.info['search_columns'] = list(columns)
+    pk = list(table.primary_key)[0].name
+    fts = fts_table_name(table)
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.{pk}, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.{pk}, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table.name}', "
+        f"content_rowid='{pk}', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table.name} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table.name} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {names} ON {table.name} "
+        f"BEGIN {delete} {insert} END",
+        # Rows written before the index existed
+        f"INSERT INTO {fts}({fts}) SELECT 'rebuild' WHERE NOT EXISTS (SELECT 1 FROM {fts}_docsize) "
+        f"AND EXISTS (SELECT 1 FROM {table.name})",
+    ]
+
+
+def match_expression(terms, prefix=False):
+    """Turn free text into an FTS5 query that matches every word, ignoring FTS syntax."""
+    tokens = _TOKEN.findall(terms)
+    return ' '.join(f'"{token}"*' if prefix else f'"{token}"' for token in tokens)
+
+
+def search(session, model, terms, limit=DEFAULT_LIMIT, prefix=False, raw=False):
+    """Return the ``limit`` best matching ``model`` objects, best (lowest bm25) first.
+
+    ``terms`` is free text unless ``raw`` is set, in which case it is passed
+    to MATCH unchanged so FTS5 operators (OR, NEAR, column filters) work.
+    """
+    query = terms if raw else match_expression(terms, prefix)
+    if not query:
+        return []
+    fts = fts_table_name(model.__table__)
+    hits = (
+        text(f'SELECT rowid, bm25({fts}) AS rank FROM {fts} WHERE {fts} MATCH :query ORDER BY rank LIMIT :limit')
+        .bindparams(query=query, limit=limit)
+        .columns(rowid=Integer, rank=Float)
+        .subquery('hits')
+    )
+    pk = list(model.__table__.primary_key)[0]
+    statement = select(model).join(hits, pk == hits.c.rowid).order_by(hits.c.rank)
+    return list(session.scalars(statement))
+
+
+def rebuild(connection, table):
+    """Re-index ``table`` from scratch, e.g. to repair an index that drifted from its table.
+
+    sync_schema already fills the index of a table that had rows before it.
+    """
+    fts = fts_table_name(table)
+    connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
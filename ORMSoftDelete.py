@@ -0,0 +1,139 @@
+import datetime
+
+from sqlalchemy import Column, Index, MetaData, Table, delete, event, exists, insert, select, update
+from sqlalchemy.orm import Session, with_loader_criteria
+
+import ORMEngine
+from ORMTypes import utc_now
+
+# Soft delete for models with a nullable deleted_at column. ORM SELECTs run
+# through any Session hide rows whose deleted_at is set: a with_loader_criteria
+# option is added for every registered model of the statement's registry, so
+# relationship and eager loads are filtered as well. Admin views opt out per
+# statement with include_deleted() or per session with
+# session.info['include_deleted'] = True. Core statements are not filtered.
+# Declare deleted_at with default=null(): inserts then write the NULL
+# explicitly, overriding the creation-time server default older tables carry.
+#
+# Tombstones stay in place until purge() archives and deletes the old ones in
+# batches. Live-row queries should be served by partial indexes
+# (sqlite_where=deleted_at.is_(None)), which also keep them small as
+# tombstones accumulate; register() adds the tombstone index purge() uses.
+
+DEFAULT_BATCH_SIZE = 1000
+CLEANED = 'soft_delete_cleaned'  # tables whose creation-time deleted_at stamps were cleared
+
+_criteria = {}  # registry -> with_loader_criteria options of its soft-delete models
+
+
+def tombstone_index_name(table):
+    return f'ix_{table.name}_deleted_at'
+
+
+def register(model, created='created_at'):
+    """Hide deleted rows of ``model`` from ORM queries and add its tombstone index.
+
+    ``created`` names the creation timestamp column. deleted_at used to
+    default to the creation time, so rows stamped within a second of their
+    creation are treated as live and cleared the first time the schema is
+    synced after registering.
+    """
+    table = model.__table__
+    deleted_at = table.c.deleted_at
+    table.info['soft_delete'] = True
+    Index(tombstone_index_name(table), deleted_at, sqlite_where=deleted_at.is_not(None))
+    _criteria.setdefault(model.registry, []).append(
+        with_loader_criteria(model, lambda cls: cls.deleted_at.is_(None), include_aliases=True))
+    # Once per database, recorded in CLEANED: rows soft-deleted within a second later on stay deleted
+    ORMEngine.register_ddl(
+        table.metadata,
+        f'CREATE TABLE IF NOT EXISTS {CLEANED} (table_name TEXT PRIMARY KEY)',
+        f'UPDATE {table.name} INDEXED BY {tombstone_index_name(table)} SET deleted_at = NULL '
+        f'WHERE deleted_at IS NOT NULL AND deleted_at >= {created} '
+        f"AND deleted_at < strftime('%Y-%m-%d %H:%M:%S', {created}, '+1 second') "
+        f"AND NOT EXISTS (SELECT 1 FROM {CLEANED} WHERE table_name = '{table.name}')",
+        f"INSERT OR IGNORE INTO {CLEANED} (table_name) VALUES ('{table.name}')",
+    )
+    return model
+
+
+def include_deleted(statement, enabled=True):
+    """Mark ``statement`` to return soft-deleted rows too."""
+    return statement.execution_options(include_deleted=enabled)
+
+
+@event.listens_for(Session, 'do_orm_execute', insert=True)
+def _hide_deleted(state):
+    # insert=True: run before other handlers (ORMCache) so they see the criteria
+    if not state.is_select or state.is_column_load or state.is_relationship_load:
+        return
+    if state.execution_options.get('include_deleted', state.session.info.get('include_deleted', False)):
+        return
+    options = []
+    for registry in {mapper.registry for mapper in state.all_mappers}:
+        options += _criteria.get(registry, ())
+    if options:
+        state.statement = state.statement.options(*options)
+
+
+def soft_delete(session, model, *where):
+    """Stamp deleted_at on the live rows of ``model`` matching ``where``; returns the row count."""
+    statement = update(model).where(model.deleted_at.is_(None), *where).values(deleted_at=utc_now())
+    return session.execute(statement, execution_options={'synchronize_session': 'fetch'}).rowcount
+
+
+def restore(session, model, *where):
+    """Clear deleted_at on the deleted rows of ``model`` matching ``where``; returns the row count."""
+    statement = update(model).where(model.deleted_at.is_not(None), *where).values(deleted_at=None)
+    return session.execute(statement, execution_options={'synchronize_session': 'fetch'}).rowcount
+
+
+def archive_table(table):
+    """``<table>_archive``: the same columns without constraints or indexes, in its own MetaData."""
+    metadata = MetaData()
+    return Table(f'{table.name}_archive', metadata,
+                 *(Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False)
+                   for column in table.columns))
+
+
+def _unreferenced(table):
+    # Rows other rows still point at are kept until those are purged too
+    return [~exists().where(foreign_key.parent == foreign_key.column)
+            for other in table.metadata.tables.values()
+            for foreign_key in other.foreign_keys if foreign_key.column.table is table]
+
+
+def purge(engine, model, older_than, batch_size=DEFAULT_BATCH_SIZE, archive=True):
+    """Delete rows of ``model`` soft-deleted before ``older_than``, ``batch_size`` at a time.
+
+    ``older_than`` is a naive UTC datetime or a timedelta before now. Each
+    batch is copied into ``<table>_archive`` (unless ``archive`` is false)
+    and deleted in its own short transaction, so writers are never blocked
+    for long. Tombstones still referenced by other rows are skipped. Returns
+    the number of rows purged.
+    """
+    table = model.__table__
+    if isinstance(older_than, datetime.timedelta):
+        older_than = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - older_than
+    primary_key, = table.primary_key.columns
+    target = None
+    if archive:
+        target = archive_table(table)
+        ORMEngine.sync_schema(engine, target.metadata)
+    batch = (
+        select(primary_key)
+        .where(table.c.deleted_at.is_not(None), table.c.deleted_at < older_than, *_unreferenced(table))
+        .order_by(table.c.deleted_at)
+        .limit(batch_size)
+    )
+    purged = 0
+    while True:
+        with engine.begin() as connection:
+            keys = connection.scalars(batch).all()
+            if not keys:
+                return purged
+            if target is not None:
+                connection.execute(insert(target).prefix_with('OR REPLACE').from_select(
+                    [column.name for column in table.columns], select(table).where(primary_key.in_(keys))))
+            connection.execute(delete(table).where(primary_key.in_(keys)))
+        purged += len(keys)
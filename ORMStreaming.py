@@ -0,0 +1,41 @@
+from sqlalchemy import select
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _statement(model, columns, where, order_by):
+    if columns:
+        statement = select(*(getattr(model, column) if isinstance(column, str) else column
+                             for column in columns))
+    else:
+        statement = select(model)
+    if where is not None:
+        statement = statement.where(*(where if isinstance(where, (list, tuple)) else (where,)))
+    if order_by is not None:
+        statement = statement.order_by(*(order_by if isinstance(order_by, (list, tuple)) else (order_by,)))
+    return statement
+
+
+def stream_chunks(session, model, columns=None, where=None, order_by=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  as_tuples=False):
+    """Yield lists of at most ``chunk_size`` rows of ``model`` from a server-side cursor.
+
+    Without ``columns`` the chunks hold ORM entities; entities are not kept
+    alive by the session, so memory stays bounded by one chunk as long as the
+    caller drops them. With ``columns`` (attribute names or column
+    expressions) the chunks hold named rows, or plain tuples if ``as_tuples``.
+    """
+    statement = _statement(model, columns, where, order_by)
+    statement = statement.execution_options(yield_per=chunk_size, stream_results=True)
+    result = session.execute(statement)
+    if not columns:
+        result = result.scalars()
+    for chunk in result.partitions():
+        yield [tuple(row) for row in chunk] if as_tuples and columns else chunk
+
+
+def stream(session, model, columns=None, where=None, order_by=None, chunk_size=DEFAULT_CHUNK_SIZE,
+           as_tuples=False):
+    """Iterate over ``model`` one row at a time; see stream_chunks for the arguments."""
+    for chunk in stream_chunks(session, model, columns, where, order_by, chunk_size, as_tuples):
+        yield from chunk
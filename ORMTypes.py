@@ -0,0 +1,151 @@
+import decimal
+
+from sqlalchemy import Integer, SmallInteger, func, literal_column, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+
+def utc_now():
+    """Current UTC time computed by SQLite, with millisecond precision.
+
+    Rendered as 'YYYY-MM-DD HH:MM:SS.ffffff', the text format SQLAlchemy uses
+    for Python datetimes, so rows stamped either way sort together. Columns use
+    it both as ``server_default`` (raw SQL inserts, new tables) and as
+    ``default``: the expression is inlined into the INSERT itself, so tables
+    created before the server default existed are stamped as well, and no
+    Python datetime is built per row.
+    """
+    return func.strftime(literal_column("'%Y-%m-%d %H:%M:%f000'"), literal_column("'now'"))
+
+
+# Compact storage types. SQLite keeps DECIMAL as REAL or text and Enum as
+# text; these store integers instead, which take 0 to 4 bytes per value
+# instead of 8 or the whole label, and sum exactly. Both read back the same
+# Python values as before (Decimal, label strings) and also have a
+# decode_array() for bulk reads into NumPy, see fetch_arrays().
+#
+# migrate_sql() converts a value stored under the column's old declared type;
+# ORMEngine.sync_schema rebuilds tables whose columns are still declared with
+# it, so existing databases switch over when they are opened.
+
+
+class Cents(TypeDecorator):
+    """Fixed-point amount stored as an integer number of 1/10**scale units: 19.99 is stored as 1999.
+
+    Binds Decimal, int, float or numeric text rounded half up to ``scale``
+    places and reads back Decimal.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def __init__(self, scale=2):
+        super().__init__()
+        self.scale = scale
+        self.factor = 10 ** scale
+
+    @property
+    def python_type(self):
+        return decimal.Decimal
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, int):
+            return value * self.factor
+        if isinstance(value, float):
+            units = value * self.factor
+            if abs(units - round(units)) < 1e-6:  # no digits past scale, as for most prices
+                return int(round(units))
+            value = repr(value)
+        return int(decimal.Decimal(value).scaleb(self.scale).to_integral_value(decimal.ROUND_HALF_UP))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else decimal.Decimal(value).scaleb(-self.scale)
+
+    def result_processor(self, dialect, coltype):
+        # Same as process_result_value without TypeDecorator's wrapper around it, once per value read
+        exponent, to_decimal = -self.scale, decimal.Decimal
+        return lambda value: None if value is None else to_decimal(value).scaleb(exponent)
+
+    def migrate_sql(self, column):
+        return f'CAST(round({column} * {self.factor}) AS INTEGER)'
+
+    def decode_array(self, values):
+        """Stored values as float64 amounts, NaN for NULL."""
+        import numpy as np
+
+        return np.array(values, dtype=np.float64) / self.factor
+
+
+class SmallEnum(TypeDecorator):
+    """One of ``labels``, stored as its position in them.
+
+    Labels are only ever appended: the stored codes of existing rows depend
+    on the order.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+    NULL_CODE = -1
+
+    def __init__(self, *labels):
+        super().__init__()
+        self.labels = labels
+        self._codes = {label: code for code, label in enumerate(labels)}
+
+    @property
+    def python_type(self):
+        return str
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self._codes[value]
+        except KeyError:
+            raise LookupError(f"'{value}' is not among the defined enum values: "
+                              f"{', '.join(map(repr, self.labels))}") from None
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.labels[value]
+
+    def result_processor(self, dialect, coltype):
+        labels = self.labels
+        return lambda value: None if value is None else labels[value]
+
+    def migrate_sql(self, column):
+        cases = ' '.join(f"WHEN '{label.replace(chr(39), chr(39) * 2)}' THEN {code}"
+                         for code, label in enumerate(self.labels))
+        return f'CASE {column} {cases} END'
+
+    def decode_array(self, values):
+        """Stored values as int8 codes into ``labels``, NULL_CODE for NULL."""
+        import numpy as np
+
+        return np.nan_to_num(np.array(values, dtype=np.float64), nan=self.NULL_CODE).astype(np.int8)
+
+
+def fetch_arrays(connection, statement):
+    """Run ``statement`` and return its columns as ``{name: NumPy array}``.
+
+    Cents and SmallEnum columns are fetched as their stored integers and
+    decoded a whole column at a time, without a Decimal or label per value;
+    other columns go through np.array as fetched.
+    """
+    import numpy as np
+
+    columns = list(statement.selected_columns)
+    raw = statement.with_only_columns(
+        *(type_coerce(column, column.type.impl_instance).label(column.key)
+          if hasattr(column.type, 'decode_array') else column for column in columns),
+        maintain_column_froms=True)
+    result = connection.execute(raw)
+    if any(column.type.result_processor(connection.dialect, None) for column in raw.selected_columns):
+        rows = result.all()
+    else:
+        # Nothing to convert per value: skip building a Row per row
+        rows = result.cursor.fetchall()
+        result.close()
+    values = list(zip(*rows)) or [()] * len(columns)
+    return {column.key: column.type.decode_array(column_values) if hasattr(column.type, 'decode_array')
+            else np.array(column_values) for column, column_values in zip(columns, values)}
@@ -0,0 +1,29 @@
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'min': samples[0],
+        'median': statistics.median(samples),
+        'max': samples[-1],
+    }
+
+
+def report(title, rows):
+    print(title)
+    for label, value in rows:
+        print(f"  {label:<40} {value}")
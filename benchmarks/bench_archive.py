@@ -0,0 +1,125 @@
+"""Archiving old admin_logs rows into per-month files: live queries and VACUUM before and after.
+
+Fills a travel booking database with N admin_logs rows spread evenly over the
+last --months months, then times the queries that stay on the live table (an
+admin's entries of the last week, a count of the last month, a full scan),
+VACUUM and the file size. ORMArchive.archive moves everything older than --days
+into month files and the same numbers are taken again. Every row must be
+either live or archived, a window across the cut-off must count the same
+through ORMArchive.including_archives, and ORMArchive.scan must return all N.
+
+    python benchmarks/bench_archive.py [--rows 1000000] [--months 24] [--days 90] [--admins 50]
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from _common import report, summarize, timed
+
+import ORMArchive
+import ORMBulkLoad
+import ORMEngine
+import ORMTravelBookingDb as travel
+
+ACTIONS = ('CREATE', 'UPDATE', 'DELETE')
+
+
+def users(count):
+    return ({'user_id': i, 'username': f'admin{i}', 'user_role': 'ADMIN'} for i in range(1, count + 1))
+
+
+def logs(count, admins, now, months, seed=0):
+    rng = random.Random(seed)
+    span = datetime.timedelta(days=30.5 * months).total_seconds()
+    for i in range(1, count + 1):
+        yield (i, rng.randint(1, admins), rng.choice(ACTIONS), f'change {i}',
+               now - datetime.timedelta(seconds=span * (count - i) / count))
+
+
+def measure(engine, path, now, admins, samples=200):
+    rng = random.Random(1)
+    week, month = now - datetime.timedelta(days=7), now - datetime.timedelta(days=30)
+    recent, counts = [], []
+    with engine.connect() as connection:
+        for _ in range(samples):
+            start = time.perf_counter()
+            connection.execute(select(travel.AdminLog.__table__).where(
+                travel.AdminLog.admin_id == rng.randint(1, admins), travel.AdminLog.timestamp >= week)).all()
+            recent.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            connection.scalar(select(func.count()).select_from(travel.AdminLog)
+                              .where(travel.AdminLog.timestamp >= month))
+            counts.append(time.perf_counter() - start)
+        full, _ = timed(lambda: connection.execute(select(travel.AdminLog.__table__)).all())
+    with engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+        vacuum, _ = timed(connection.exec_driver_sql, 'VACUUM')
+        # In WAL mode the file only shrinks once the vacuumed pages are checkpointed
+        connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+    return {
+        'recent': summarize(recent)['median'] * 1000,
+        'count': summarize(counts)['median'] * 1000,
+        'full': full,
+        'vacuum': vacuum,
+        'size': os.path.getsize(path) / 2 ** 20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--days', type=int, default=90, help='Archive rows older than this')
+    parser.add_argument('--admins', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=ORMArchive.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    cutoff = now - datetime.timedelta(days=args.days)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'travel.db')
+        engine = travel.get_engine('sqlite:///' + path)
+        ORMBulkLoad.bulk_load(engine, {travel.User: users(args.admins)})
+        ORMBulkLoad.bulk_load(engine, {travel.AdminLog: logs(args.rows, args.admins, now, args.months)},
+                              columns={travel.AdminLog: ['log_id', 'admin_id', 'action_type', 'description',
+                                                         'timestamp']})
+        before = measure(engine, path, now, args.admins)
+
+        elapsed, moved = timed(ORMArchive.archive, engine, travel.AdminLog, datetime.timedelta(days=args.days),
+                               batch_size=args.batch_size)
+        archived = sum(moved.values())
+        after = measure(engine, path, now, args.admins)
+        archive_size = sum(os.path.getsize(ORMArchive.archive_path(path, month))
+                           for month in ORMArchive.months(engine)) / 2 ** 20
+
+        since = cutoff - datetime.timedelta(days=45)
+        with engine.connect() as connection:
+            live = connection.scalar(select(func.count()).select_from(travel.AdminLog))
+            assert live + archived == args.rows, (live, archived)
+            assert connection.scalar(select(func.min(travel.AdminLog.timestamp))) >= cutoff
+            with ORMArchive.including_archives(connection, travel.AdminLog, since=since) as logs_table:
+                window = connection.scalar(select(func.count()).select_from(logs_table))
+            direct = sum(1 for row in ORMArchive.scan(connection, travel.AdminLog, since=since))
+            assert window == direct > live, (window, direct, live)
+            assert sum(1 for _ in ORMArchive.scan(connection, travel.AdminLog)) == args.rows
+        assert ORMArchive.archive(engine, travel.AdminLog, datetime.timedelta(days=args.days)) == {}
+        ORMEngine.dispose_all()
+
+    report(f'{args.rows:,} admin_logs over {args.months} months, {archived:,} older than {args.days} days '
+           f'archived into {len(moved)} month files in {elapsed:.2f} s ({archive_size:.1f} MB):', [
+        ('', 'before      after'),
+        ("admin's last week, median", f'{before["recent"]:8.3f}  {after["recent"]:8.3f} ms'),
+        ('count of last month, median', f'{before["count"]:8.3f}  {after["count"]:8.3f} ms'),
+        ('full scan', f'{before["full"]:8.3f}  {after["full"]:8.3f} s'),
+        ('VACUUM', f'{before["vacuum"]:8.3f}  {after["vacuum"]:8.3f} s'),
+        ('database file', f'{before["size"]:8.1f}  {after["size"]:8.1f} MB'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Request throughput of the async sessions versus sync sessions on a thread pool.
+
+Every "request" looks a quiz up by ``quiz_code`` and loads its questions. The
+same number of requests is pushed through C concurrent coroutines, once with
+ORMAsync sessions and once with sync sessions offloaded via asyncio.to_thread
+(what the API tier does today).
+
+    python benchmarks/bench_async.py [--concurrency 1 50 500] [--requests 5000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import select
+
+from _common import report
+
+import ORMAsync
+import ORMBulkLoad
+import ORMEngine
+import ORMQuizDb as quiz
+from ORMLoading import loader
+
+QUIZZES = 1000
+
+
+def populate(uri):
+    engine = ORMEngine.get_engine(uri, quiz.Base.metadata)
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.User: [{'user_id': 1, 'name': 'Teacher', 'email': 't@example.com', 'password': 'x',
+                     'role': 'teacher'}],
+        quiz.Quiz: ({'quiz_id': n, 'title': f'Quiz {n}', 'quiz_code': f'Q{n}', 'teacher_id': 1}
+                    for n in range(1, QUIZZES + 1)),
+        quiz.Question: ({'question_id': n, 'quiz_id': n % QUIZZES + 1, 'question_text': f'Question {n}',
+                         'question_type': 'MCQ'} for n in range(1, QUIZZES * 10 + 1)),
+    })
+
+
+def lookup():
+    return (select(quiz.Quiz).where(quiz.Quiz.quiz_code == f'Q{random.randint(1, QUIZZES)}')
+            .options(loader('selectin', quiz.Quiz.questions)))
+
+
+async def drive(concurrency, requests, handle):
+    queue = iter(range(requests))
+
+    async def client():
+        for _ in queue:
+            await handle()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def run(uri, levels, requests):
+    factory = await ORMAsync.get_async_sessionmaker(quiz, uri)
+    sync_factory = ORMEngine.get_sessionmaker(uri, quiz.Base.metadata)
+
+    async def async_request():
+        async with factory() as session:
+            item = (await session.scalars(lookup())).one()
+            return len(item.questions)
+
+    def sync_request():
+        with sync_factory() as session:
+            item = session.scalars(lookup()).one()
+            return len(item.questions)
+
+    async def threaded_request():
+        return await asyncio.to_thread(sync_request)
+
+    rows = []
+    for concurrency in levels:
+        native = await drive(concurrency, requests, async_request)
+        threaded = await drive(concurrency, requests, threaded_request)
+        rows.append((f'{concurrency} concurrent', f'async {native:8,.0f} req/s   sync+to_thread {threaded:8,.0f} req/s'))
+    await ORMAsync.dispose_all()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 50, 500])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'bench.sqlite')
+        populate(uri)
+        rows = asyncio.run(run(uri, args.concurrency, args.requests))
+        report(f'{args.requests:,} quiz lookups by code:', rows)
+        ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Compare ORM add_all seeding with ORMBulkLoad.bulk_load on the travel schema.
+
+For each size N the run inserts N bookings and N payments plus N/10 users and
+N/1000 tours into a fresh SQLite file, once through the unit of work and once
+through Core executemany batches.
+
+    python benchmarks/bench_bulk_load.py [N ...] [--batch-size 10000]
+"""
+import argparse
+import datetime
+import os
+import tempfile
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMTravelBookingDb as travel
+
+
+def generate(n):
+    users = max(1, n // 10)
+    tours = max(1, n // 1000)
+    return {
+        travel.User: ({'user_id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+                       'password_hash': 'x', 'user_role': 'USERS'} for i in range(1, users + 1)),
+        travel.Tour: ({'tour_id': i, 'tour_name': f'Tour {i}', 'price': 50.00, 'seats_available': 100,
+                       'start_date': datetime.date(2024, 1, 1)} for i in range(1, tours + 1)),
+        travel.Booking: ({'booking_id': i, 'user_id': i % users + 1, 'tour_id': i % tours + 1,
+                          'seats_booked': 1, 'total_amount': 50.00, 'payment_status': 'SUCCESS'}
+                         for i in range(1, n + 1)),
+        travel.Payment: ({'payment_id': i, 'booking_id': i, 'amount': 50.00, 'payment_method': 'GCASH',
+                          'payment_status': 'SUCCESS', 'transaction_id': f'T{i}'} for i in range(1, n + 1)),
+    }
+
+
+def load_orm(uri, n):
+    session = ORMEngine.get_sessionmaker(uri, travel.Base.metadata)()
+    for model, rows in generate(n).items():
+        session.add_all(model(**row) for row in rows)
+        session.flush()
+    session.commit()
+    session.close()
+
+
+def load_bulk(uri, n, batch_size):
+    ORMBulkLoad.bulk_load(ORMEngine.get_engine(uri, travel.Base.metadata), generate(n), batch_size)
+
+
+def run(n, method, *args):
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'bench.db')
+        ORMEngine.get_engine(uri, travel.Base.metadata)
+        elapsed, _ = timed(method, uri, n, *args)
+        ORMEngine.dispose_all()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sizes', nargs='*', type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--batch-size', type=int, default=ORMBulkLoad.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    for n in args.sizes:
+        total = 2 * n + max(1, n // 10) + max(1, n // 1000)
+        orm = run(n, load_orm)
+        bulk = run(n, load_bulk, args.batch_size)
+        report(f'{n:,} bookings ({total:,} rows):', [
+            ('ORM add_all', f'{orm:.2f} s  ({total / orm:,.0f} rows/s)'),
+            (f'bulk_load (batch {args.batch_size})', f'{bulk:.2f} s  ({total / bulk:,.0f} rows/s)'),
+            ('speedup', f'{orm / bulk:.1f}x'),
+        ])
+
+
+if __name__ == '__main__':
+    main()
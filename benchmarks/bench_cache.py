@@ -0,0 +1,171 @@
+"""Read-through query cache: cached versus uncached lookup latency.
+
+Builds product, quiz, tour and event tables in temporary databases and runs
+the same skewed read workload (80% of the reads go to 20% of the keys) with a
+fresh session per request in three setups, each on its own copy of the
+databases and interleaved request by request: straight against SQLite,
+through an ORMCache.QueryCache serving only the statements marked with ORMCache.cached()
+(the quiz lookup and the event listing), and through one attached with
+cache_all=True. With --write-ratio, that share of the product requests updates
+a product instead, invalidating every cached product read.
+
+A hit skips SQLite and the row processing; a miss costs more than no cache
+(the cache key, freezing and replaying the rows). With cache_all the product
+lookups, whose table keeps being written, mostly miss and come out slower
+than uncached, and cached tour entities gain nothing because every hit is
+merged into the session. Marking only read-mostly statements avoids both.
+
+    python benchmarks/bench_cache.py [--rows 10000] [--requests 20000] [--write-ratio 0.01] [--maxsize 10000]
+"""
+import argparse
+import collections
+import datetime
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from _common import report
+
+import ORMBulkLoad
+import ORMCache
+import ORMEcommerceDb as ecommerce
+import ORMEngine
+import ORMEventManagementDb as events
+import ORMPagination
+import ORMQuizDb as quiz
+import ORMTravelBookingDb as travel
+
+
+def populate(uris, rows):
+    ORMBulkLoad.bulk_load(ORMEngine.get_engine(uris['ecommerce'], ecommerce.Base.metadata), {
+        ecommerce.Product: ({'product_id': n, 'name': f'Product {n}', 'sku': f'SKU{n:06d}', 'price': n % 500,
+                             'stock': 100, 'category': 'Electronics'} for n in range(1, rows + 1)),
+    })
+    ORMBulkLoad.bulk_load(ORMEngine.get_engine(uris['quiz'], quiz.Base.metadata), {
+        quiz.Quiz: ({'quiz_id': n, 'title': f'Quiz {n}', 'quiz_code': f'Q{n:06d}', 'duration': 30}
+                    for n in range(1, rows + 1)),
+    })
+    start = datetime.date(2024, 1, 1)
+    ORMBulkLoad.bulk_load(ORMEngine.get_engine(uris['travel'], travel.Base.metadata), {
+        travel.Tour: ({'tour_id': n, 'tour_name': f'Tour {n}', 'price': 100,
+                       'start_date': start + datetime.timedelta(days=n % 365)} for n in range(1, rows + 1)),
+    })
+    ORMBulkLoad.bulk_load(ORMEngine.get_engine(uris['events'], events.Base.metadata), {
+        events.Events: ({'event_id': n, 'event_title': f'Event {n}',
+                         'event_start': start + datetime.timedelta(days=n % 365)} for n in range(1, rows + 1)),
+    })
+
+
+def workload(requests, rows, write_ratio, seed=0):
+    rng = random.Random(seed)
+    hot = max(1, rows // 5)
+    for _ in range(requests):
+        key = rng.randint(1, hot) if rng.random() < 0.8 else rng.randint(1, rows)
+        kind = rng.choice(('product', 'quiz', 'tours', 'events'))
+        if kind == 'product' and rng.random() < write_ratio:
+            kind = 'restock'
+        yield kind, key
+
+
+SCHEMA = {'product': 'ecommerce', 'restock': 'ecommerce', 'quiz': 'quiz', 'tours': 'travel', 'events': 'events'}
+KINDS = {
+    'product': 'product detail by sku (row)',
+    'quiz': 'quiz by quiz_code (row)',
+    'tours': 'tour listing page (entities)',
+    'events': 'event listing page (rows)',
+    'restock': 'product update (invalidates)',
+}
+
+
+def request(factories, kind, key, page_size):
+    session = factories[SCHEMA[kind]]()
+    if kind == 'product':
+        session.execute(select(ecommerce.Product.product_id, ecommerce.Product.name, ecommerce.Product.price,
+                               ecommerce.Product.stock).where(ecommerce.Product.sku == f'SKU{key:06d}')).one()
+    elif kind == 'restock':
+        product = session.get(ecommerce.Product, key)
+        product.stock += 1
+        session.commit()
+    elif kind == 'quiz':
+        session.execute(ORMCache.cached(select(quiz.Quiz.quiz_id, quiz.Quiz.title, quiz.Quiz.duration)
+                                        .where(quiz.Quiz.quiz_code == f'Q{key:06d}'))).one()
+    elif kind == 'tours':
+        ORMPagination.tours(session, page_size=page_size)
+    else:
+        session.execute(ORMCache.cached(
+            select(events.Events.event_id, events.Events.event_title, events.Events.event_start)
+            .order_by(events.Events.event_start, events.Events.event_id).limit(page_size))).all()
+    session.close()
+
+
+def run(setups, requests, page_size):
+    """Return the total time spent per setup and kind of request.
+
+    Each request runs once per setup before the next one starts, taking turns
+    at going first, so drift in machine speed is shared by all of them.
+    """
+    spent = {label: dict.fromkeys(SCHEMA, 0.0) for label in setups}
+    labels = list(setups)
+    for number, (kind, key) in enumerate(requests):
+        turn = number % len(labels)
+        for label in labels[turn:] + labels[:turn]:
+            start = time.perf_counter()
+            request(setups[label], kind, key, page_size)
+            spent[label][kind] += time.perf_counter() - start
+    return spent
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--write-ratio', type=float, default=0.01)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--maxsize', type=int, default=10_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        names = ('ecommerce', 'quiz', 'travel', 'events')
+        populate({name: 'sqlite:///' + os.path.join(directory, f'{name}.db') for name in names}, args.rows)
+        ORMEngine.dispose_all()  # checkpoints the WAL, so the files can be copied
+        requests = list(workload(args.requests, args.rows, args.write_ratio))
+        counts = collections.Counter(kind for kind, _ in requests)
+        # One copy of the databases and one cache per setup, so writes only invalidate their own cache
+        setups, caches = {}, {}
+        for label, cache_all in (('uncached', None), ('cached()', False), ('cache_all', True)):
+            uris = {}
+            for name in names:
+                path = shutil.copy(os.path.join(directory, f'{name}.db'), os.path.join(directory, f'{name}-{label}.db'))
+                uris[name] = 'sqlite:///' + path
+            factories = setups[label] = {name: sessionmaker(bind=ORMEngine.get_engine(uri))
+                                         for name, uri in uris.items()}
+            if cache_all is not None:
+                cache = caches[label] = ORMCache.QueryCache(args.maxsize)
+                for factory in factories.values():
+                    cache.attach(factory, cache_all=cache_all)
+        runs = [run(setups, requests, args.page_size) for _ in range(args.repeats)]
+        rows = []
+        for kind, description in KINDS.items():
+            if counts[kind]:
+                latencies = (statistics.median(spent[label][kind] for spent in runs) / counts[kind] * 1e6
+                             for label in setups)
+                rows.append((description, '   '.join(f'{label} {latency:7.1f} us'
+                                                     for label, latency in zip(setups, latencies))))
+        for label, cache in caches.items():
+            stats = cache.stats()
+            assert stats['hits'] > stats['misses'], 'skewed workload should mostly hit the cache'
+            rows.append((f'{label} counters', ', '.join(f'{name}={value}' for name, value in stats.items())))
+        report(f'{args.requests:,} requests over {args.rows:,} rows per table '
+               f'(per request, write ratio {args.write_ratio}, median of {args.repeats}):', rows)
+        ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Count the SQL statements needed to load quizzes with questions and options.
+
+Builds an in-memory quiz schema with N quizzes, each holding Q questions with
+O options, then walks the whole object graph under each loading strategy. The
+joined and subquery strategies must stay at a constant one and three
+statements regardless of N; selectin issues one IN query per 500 parents.
+
+    python benchmarks/bench_eager_loading.py [--quizzes 1000] [--questions 10] [--options 4]
+"""
+import argparse
+
+from sqlalchemy import event, select
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMQuizDb as quiz
+from ORMLoading import loader
+
+
+def populate(engine, quizzes, questions, options):
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.User: [{'user_id': 1, 'name': 'Teacher', 'email': 't@example.com', 'password': 'x',
+                     'role': 'teacher'}],
+        quiz.Quiz: ({'quiz_id': q, 'title': f'Quiz {q}', 'quiz_code': f'Q{q}', 'teacher_id': 1}
+                    for q in range(1, quizzes + 1)),
+        quiz.Question: ({'question_id': n, 'quiz_id': (n - 1) // questions + 1, 'question_text': f'Q{n}',
+                         'question_type': 'MCQ'} for n in range(1, quizzes * questions + 1)),
+        quiz.Option: ({'option_id': n, 'question_id': (n - 1) // options + 1, 'option_text': str(n),
+                       'is_correct': n % options == 0} for n in range(1, quizzes * questions * options + 1)),
+    })
+
+
+def walk(session, options):
+    total = 0
+    for item in session.scalars(select(quiz.Quiz).options(*options)).unique():
+        for question in item.questions:
+            total += len(question.options)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quizzes', type=int, default=1000)
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--options', type=int, default=4)
+    args = parser.parse_args()
+
+    uri = 'sqlite://'
+    engine = ORMEngine.get_engine(uri, quiz.Base.metadata)
+    populate(engine, args.quizzes, args.questions, args.options)
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+    strategies = {
+        'lazy (N+1)': [],
+        'selectin': [loader('selectin', quiz.Quiz.questions, quiz.Question.options)],
+        'subquery': [loader('subquery', quiz.Quiz.questions, quiz.Question.options)],
+        'joined': [loader('joined', quiz.Quiz.questions, quiz.Question.options)],
+        'joined + raise elsewhere': [loader('joined', quiz.Quiz.questions, quiz.Question.options),
+                                     loader('raise', '*')],
+    }
+    expected = {'subquery': 3, 'joined': 1, 'joined + raise elsewhere': 1}
+    rows = []
+    for label, options in strategies.items():
+        session = ORMEngine.get_sessionmaker(uri)()
+        statements.clear()
+        elapsed, total = timed(walk, session, options)
+        session.close()
+        assert total == args.quizzes * args.questions * args.options
+        if label in expected:
+            assert len(statements) == expected[label], f'{label} issued {len(statements)} statements'
+        rows.append((label, f'{len(statements):>6} statements  {elapsed * 1000:8.1f} ms'))
+    report(f'{args.quizzes:,} quizzes x {args.questions} questions x {args.options} options:', rows)
+
+
+if __name__ == '__main__':
+    main()
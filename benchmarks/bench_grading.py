@@ -0,0 +1,118 @@
+"""Set-based quiz grading versus a per-student loop.
+
+Builds one quiz with Q questions (four options each, every fifth one a short
+answer keyed as a single correct option) and S students who answered every
+question, with varied case and padding, then grades it with ORMGrading.grade
+and with the loop it replaces: load each student's answers, compare them in
+Python and write the result through the ORM. The loop is run on
+--loop-students students and extrapolated.
+
+    python benchmarks/bench_grading.py [--students 10000] [--questions 50] [--loop-students 500]
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from sqlalchemy import func, select
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMGrading
+import ORMQuizDb as quiz
+
+
+def populate(engine, students, questions, seed=0):
+    rng = random.Random(seed)
+    keys = {}
+    options = []
+    for question_id in range(1, questions + 1):
+        if question_id % 5 == 0:
+            keys[question_id] = f'answer {question_id}'
+            options.append({'question_id': question_id, 'option_text': keys[question_id], 'is_correct': True})
+            continue
+        correct = rng.randrange(4)
+        for choice in range(4):
+            options.append({'question_id': question_id, 'option_text': f'choice {choice}', 'is_correct': choice == correct})
+        keys[question_id] = f'choice {correct}'
+
+    def answer(question_id):
+        text = keys[question_id] if rng.random() < 0.7 else f'choice {rng.randrange(4)}'
+        return rng.choice((text, text.upper(), f'  {text} '))
+
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.User: ({'user_id': n, 'name': f'Student {n}', 'email': f's{n}@example.com', 'password': 'x',
+                     'role': 'student'} for n in range(1, students + 1)),
+        quiz.Quiz: [{'quiz_id': 1, 'title': 'Final exam', 'quiz_code': 'FINAL'}],
+        quiz.Question: [{'question_id': n, 'quiz_id': 1, 'question_text': f'Question {n}',
+                         'question_type': 'short answer' if n % 5 == 0 else 'MCQ'} for n in range(1, questions + 1)],
+        quiz.Option: options,
+        quiz.Answer: ({'question_id': question_id, 'student_id': student_id, 'answer_text': answer(question_id)}
+                      for student_id in range(1, students + 1) for question_id in range(1, questions + 1)),
+    })
+
+
+def grade_in_loop(session, quiz_id, students):
+    """The per-student approach: one query for the key, then a query and a write per student."""
+    key = {}
+    for question_id, text in session.execute(
+            select(quiz.Option.question_id, quiz.Option.option_text)
+            .join(quiz.Question).where(quiz.Question.quiz_id == quiz_id, quiz.Option.is_correct == True)):
+        key.setdefault(question_id, set()).add(text.strip().lower())
+    for student_id in students:
+        answers = session.execute(
+            select(quiz.Answer.question_id, quiz.Answer.answer_text)
+            .join(quiz.Question).where(quiz.Question.quiz_id == quiz_id, quiz.Answer.student_id == student_id))
+        correct = {question_id for question_id, text in answers
+                   if (text or '').strip().lower() in key.get(question_id, ())}
+        result = session.scalars(select(quiz.Result).filter_by(quiz_id=quiz_id, student_id=student_id)).first()
+        if result is None:
+            result = quiz.Result(quiz_id=quiz_id, student_id=student_id)
+            session.add(result)
+        result.score = round(100.0 * len(correct) / len(key), 2)
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--students', type=int, default=10_000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--loop-students', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'quiz.db')
+        engine = ORMEngine.get_engine(uri, quiz.Base.metadata)
+        populate(engine, args.students, args.questions)
+
+        with engine.begin() as connection:
+            first, written = timed(ORMGrading.grade, connection, [1])
+        with engine.begin() as connection:
+            again, unchanged = timed(ORMGrading.grade, connection, [1])
+            assert written == args.students and unchanged == 0, (written, unchanged)
+            assert not ORMGrading.check_grades(connection, [1]), 'stored results disagree with the answers'
+            connection.execute(quiz.Result.__table__.delete())
+
+        session = ORMEngine.get_sessionmaker(uri)()
+        loop = timed(grade_in_loop, session, 1, range(1, args.loop_students + 1))[0]
+        session.close()
+        with engine.connect() as connection:
+            mismatched = ORMGrading.check_grades(connection, [1])
+            graded = connection.scalar(select(func.count()).select_from(quiz.Result))
+        assert graded == args.loop_students and len(mismatched) == args.students - args.loop_students
+        loop_total = loop * args.students / args.loop_students
+
+        report(f'Grading {args.students:,} students x {args.questions} questions '
+               f'({args.students * args.questions:,} answers):', [
+                   ('set-based, first run', f'{first:8.2f} s'),
+                   ('set-based, nothing changed', f'{again:8.2f} s'),
+                   (f'per-student loop ({args.loop_students} students)', f'{loop:8.2f} s'),
+                   ('per-student loop, extrapolated', f'{loop_total:8.2f} s'),
+               ])
+        ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
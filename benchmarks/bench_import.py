@@ -0,0 +1,38 @@
+"""Measure the cold import latency of each schema module.
+
+Every sample runs in a fresh interpreter so the module cache is empty.
+SQLAlchemy is imported before the clock starts, so its own import cost is
+left out of the samples.
+
+    python benchmarks/bench_import.py [repeats]
+"""
+import subprocess
+import sys
+
+from _common import ROOT, report, summarize
+from ORMCli import SCHEMAS
+
+SNIPPET = (
+    "import time, sqlalchemy, sqlalchemy.orm, sqlalchemy.ext.declarative\n"
+    "start = time.perf_counter()\n"
+    "{stmt}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def sample(stmt, repeats):
+    code = SNIPPET.format(stmt=stmt)
+    return [float(subprocess.check_output([sys.executable, '-c', code], cwd=ROOT))
+            for _ in range(repeats)]
+
+
+def main(repeats=10):
+    rows = []
+    for name, module in SCHEMAS.items():
+        stats = summarize(sample(f'import {module}', repeats))
+        rows.append((module, f"median {stats['median'] * 1000:.2f} ms  (min {stats['min'] * 1000:.2f} ms)"))
+    report(f'Import latency over {repeats} fresh interpreters (SQLAlchemy preloaded):', rows)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,131 @@
+"""Inbox badge and conversation list: trigger-maintained summaries against the live aggregates.
+
+Fills a job board with N messages between --users users (about 30% unread),
+once with the ORMInbox triggers and once on a copy without them, to show what
+the triggers add to every insert. Then, for random users, times the unread
+badge (COUNT over ix_message_live_unread vs the inbox_counter row) and the
+conversation list (GROUP BY over the user's messages vs the conversation
+rows, first 20). Marking conversations read and soft-deleting messages must leave
+ORMInbox.check_inbox clean.
+
+    python benchmarks/bench_inbox.py [--messages 500000] [--users 2000] [--samples 2000]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMInbox
+import ORMSoftDelete
+import ORMJobBoardDb as jobboard
+
+EPOCH = datetime.datetime(2024, 1, 1)
+
+LIVE_CONVERSATIONS = """
+SELECT peer_id, max(send_at) AS last_send_at, sum(unread) FROM (
+    SELECT recipient_id AS peer_id, send_at, 0 AS unread FROM message
+    WHERE sender_id = ? AND deleted_at IS NULL
+    UNION ALL
+    SELECT sender_id, send_at, is_read = 0 FROM message
+    WHERE recipient_id = ? AND deleted_at IS NULL
+) GROUP BY peer_id ORDER BY last_send_at DESC LIMIT 20
+"""
+
+
+def users(count):
+    return ({'user_id': i, 'name': f'user{i}'} for i in range(1, count + 1))
+
+
+def messages(count, users, seed=0):
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        yield (i, rng.randint(1, users), rng.randint(1, users), 'hello', rng.random() < 0.7, 'TEXT',
+               EPOCH + datetime.timedelta(seconds=i), None)
+
+
+def median_ms(func, user_ids):
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        func(user_id)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=500000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--samples', type=int, default=2000)
+    args = parser.parse_args()
+
+    columns = {jobboard.Message: ['message_id', 'sender_id', 'recipient_id', 'message', 'is_read', 'message_type',
+                                  'send_at', 'deleted_at']}
+    with tempfile.TemporaryDirectory() as directory:
+        plain = jobboard.get_engine('sqlite:///' + os.path.join(directory, 'plain.db'))
+        with plain.begin() as connection:
+            for (name,) in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                                      "AND name LIKE 'trg_message_inbox_%'"):
+                connection.exec_driver_sql(f'DROP TRIGGER {name}')
+        ORMBulkLoad.bulk_load(plain, {jobboard.User: users(args.users)})
+        without, _ = timed(ORMBulkLoad.bulk_load, plain, {jobboard.Message: messages(args.messages, args.users)},
+                           columns=columns)
+
+        uri = 'sqlite:///' + os.path.join(directory, 'inbox.db')
+        engine = jobboard.get_engine(uri)
+        ORMBulkLoad.bulk_load(engine, {jobboard.User: users(args.users)})
+        with_triggers, _ = timed(ORMBulkLoad.bulk_load, engine,
+                                 {jobboard.Message: messages(args.messages, args.users)}, columns=columns)
+
+        rng = random.Random(1)
+        sample = [rng.randint(1, args.users) for _ in range(args.samples)]
+        with engine.connect() as connection:
+            live_count = median_ms(lambda user_id: connection.scalar(
+                select(func.count()).select_from(jobboard.Message)
+                .where(jobboard.Message.recipient_id == user_id, jobboard.Message.is_read == False,
+                       jobboard.Message.deleted_at.is_(None))), sample)
+            live_list = median_ms(lambda user_id: connection.exec_driver_sql(
+                LIVE_CONVERSATIONS, (user_id, user_id)).all(), sample)
+            counter = median_ms(lambda user_id: ORMInbox.unread_count(connection, jobboard.Message, user_id), sample)
+            summary = median_ms(lambda user_id: ORMInbox.conversations(connection, jobboard.Message, user_id, 20),
+                                sample)
+        with jobboard.get_session(uri) as session:
+
+            unread = session.execute(select(jobboard.Conversation.user_id, jobboard.Conversation.peer_id,
+                                            jobboard.Conversation.unread)
+                                     .where(jobboard.Conversation.unread > 0).limit(args.samples)).all()
+            start = time.perf_counter()
+            marked = sum(ORMInbox.mark_conversation_read(session, jobboard.Message, user_id, peer_id)
+                         for user_id, peer_id, _ in unread)
+            session.commit()
+            mark = (time.perf_counter() - start) / max(len(unread), 1) * 1000
+            assert marked == sum(count for _, _, count in unread), marked
+            ORMSoftDelete.soft_delete(session, jobboard.Message, jobboard.Message.message_id % 10 == 0)
+            session.commit()
+        with engine.connect() as connection:
+            drifted = ORMInbox.check_inbox(connection, jobboard.Message)
+            assert not drifted, drifted[:10]
+        ORMEngine.dispose_all()
+
+    report(f'{args.messages:,} messages between {args.users:,} users, median of {args.samples:,} users:', [
+        ('insert, no summaries', f'{args.messages / without:10,.0f} messages/s'),
+        ('insert, with inbox triggers', f'{args.messages / with_triggers:10,.0f} messages/s'),
+        ('unread badge, COUNT(*)', f'{live_count:10.3f} ms'),
+        ('unread badge, inbox_counter', f'{counter:10.3f} ms'),
+        ('first 20 conversations, GROUP BY', f'{live_list:10.3f} ms'),
+        ('first 20 conversations, summary rows', f'{summary:10.3f} ms'),
+        ('mark conversation read (one UPDATE)', f'{mark:10.3f} ms   {marked:,} messages in {len(unread):,} calls'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
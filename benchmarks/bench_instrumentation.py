@@ -0,0 +1,74 @@
+"""Per-statement cost of ORMInstrumentation: never attached, attached, detached.
+
+Runs N primary-key lookups through Core and through the ORM against an
+in-memory quiz database and reports the mean time per lookup in each state.
+The detached run must record nothing: detach() removes every event listener.
+
+    python benchmarks/bench_instrumentation.py [--lookups 20000]
+"""
+import argparse
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+
+from _common import report, summarize, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMInstrumentation
+import ORMQuizDb as quiz
+
+
+def core_lookups(engine, lookups, users):
+    statement = select(quiz.User.name).where(quiz.User.user_id == 0)
+    with engine.connect() as connection:
+        for n in range(lookups):
+            connection.execute(statement.params(user_id_1=n % users + 1)).scalar()
+
+
+def orm_lookups(factory, lookups, users):
+    with factory() as session:
+        for n in range(lookups):
+            session.scalars(select(quiz.User).where(quiz.User.user_id == n % users + 1)).one()
+            session.expunge_all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lookups', type=int, default=20_000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    uri = 'sqlite://'
+    engine = ORMEngine.get_engine(uri, quiz.Base.metadata)
+    ORMBulkLoad.bulk_load(engine, {quiz.User: ({'user_id': n, 'name': f'User {n}', 'email': f'u{n}@example.com',
+                                                'password': 'x', 'role': 'student'} for n in range(1, args.users + 1))})
+    factory = ORMEngine.get_sessionmaker(uri)
+    instrumentation = ORMInstrumentation.Instrumentation()
+
+    def per_lookup(function, target):
+        samples = summarize([timed(function, target, args.lookups, args.users)[0] for _ in range(args.repeats)])
+        return samples['median'] / args.lookups * 1e6
+
+    rows = []
+    for state in ('never attached', 'attached', 'detached'):
+        if state == 'attached':
+            instrumentation.attach()
+        elif state == 'detached':
+            instrumentation.detach()
+        core = per_lookup(core_lookups, engine)
+        orm = per_lookup(orm_lookups, factory)
+        rows.append((state, f'Core {core:6.1f} us   ORM {orm:6.1f} us'))
+    assert not event.contains(Engine, 'before_cursor_execute', instrumentation._before)
+    assert not event.contains(Engine, 'after_cursor_execute', instrumentation._after)
+    data = instrumentation.as_dict()
+    expected = args.lookups * args.repeats * 2
+    assert data['queries'] == expected, (data['queries'], expected)
+    assert sum(stats['rows'] for stats in data['statements'].values()) == expected
+    report(f'Mean time per primary-key lookup (median of {args.repeats} x {args.lookups:,}):', rows)
+    ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
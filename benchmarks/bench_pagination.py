@@ -0,0 +1,77 @@
+"""OFFSET versus keyset pagination latency at increasing page depth.
+
+Loads enough job postings for the deepest page into a temporary database and
+times fetching page 1 and page P of the newest-first listing both ways. The
+keyset run starts from the cursor of the row preceding the page, as a client
+that followed the next_cursor links would.
+
+    python benchmarks/bench_pagination.py [--pages 1 100 10000] [--page-size 50]
+"""
+import argparse
+import datetime
+import os
+import tempfile
+
+from sqlalchemy import select
+
+from _common import report, summarize, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMJobBoardDb as jobboard
+import ORMPagination
+
+JobPosting = jobboard.JobPosting
+
+
+def populate(engine, rows):
+    start = datetime.datetime(2020, 1, 1)
+    ORMBulkLoad.bulk_load(engine, {
+        JobPosting: ({'job_id': n, 'employer_id': 1, 'job_title': f'Job {n}', 'category': 'IT',
+                      'created_at': start + datetime.timedelta(seconds=n // 3)} for n in range(1, rows + 1)),
+    })
+
+
+def offset_page(session, page, page_size):
+    statement = (select(JobPosting).order_by(JobPosting.created_at.desc(), JobPosting.job_id.desc())
+                 .offset((page - 1) * page_size).limit(page_size))
+    return list(session.scalars(statement))
+
+
+def cursor_before(session, page, page_size):
+    if page == 1:
+        return None
+    row = offset_page(session, page - 1, page_size)[-1]
+    return ORMPagination.encode_cursor([row.created_at, row.job_id])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 100, 10_000])
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'bench.db')
+        populate(ORMEngine.get_engine(uri, jobboard.Base.metadata), max(args.pages) * args.page_size)
+        session = ORMEngine.get_sessionmaker(uri)()
+        rows = []
+        for page in args.pages:
+            cursor = cursor_before(session, page, args.page_size)
+            offset = summarize([timed(offset_page, session, page, args.page_size)[0]
+                                for _ in range(args.repeats)])
+            keyset = summarize([timed(ORMPagination.job_postings, session, cursor, args.page_size)[0]
+                                for _ in range(args.repeats)])
+            expected = [item.job_id for item in offset_page(session, page, args.page_size)]
+            actual = [item.job_id for item in ORMPagination.job_postings(session, cursor, args.page_size).items]
+            assert expected == actual, f'page {page} differs between OFFSET and keyset'
+            rows.append((f'page {page:,}', f"OFFSET {offset['median'] * 1000:8.2f} ms   "
+                                           f"keyset {keyset['median'] * 1000:6.2f} ms"))
+        session.close()
+        report(f'Newest-first job postings, {args.page_size} per page (median of {args.repeats}):', rows)
+        ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Parallel export and import of job_interaction against the number of processes.
+
+Fills job_interaction with N rows, then for each process count exports the
+table with ORMExport.export_table and loads the shards into an empty
+database with ORMExport.import_files. Every copy is checked against the
+source. The single-session baseline streams the table through one ORM
+session into one file. Process start-up (spawn) is included in the times, and
+the speedup is bounded by the cores available (printed first).
+
+    python benchmarks/bench_parallel_export.py [--rows 1000000] [--format csv] [--processes 1 2 4]
+"""
+import argparse
+import csv
+import datetime
+import os
+import random
+import tempfile
+
+from sqlalchemy import func, select
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMExport
+import ORMJobBoardDb as jobboard
+from ORMStreaming import stream_chunks
+
+EPOCH = datetime.datetime(2024, 1, 1)
+
+
+def populate(engine, rows, seed=0):
+    rng = random.Random(seed)
+    ORMBulkLoad.bulk_load(engine, {jobboard.JobInteraction: (
+        (i, rng.randint(1, 10000), rng.randint(1, 50000), rng.randint(1, 3),
+         EPOCH + datetime.timedelta(seconds=rng.randrange(365 * 86400)), rng.random() < 0.1)
+        for i in range(1, rows + 1))})
+
+
+def checksum(engine):
+    table = jobboard.JobInteraction.__table__
+    with engine.connect() as connection:
+        return connection.execute(select(func.count(), func.total(table.c.user_id), func.total(table.c.job_id),
+                                         func.max(table.c.interaction_date), func.total(table.c.is_applied))).one()
+
+
+def single_session_export(uri, path):
+    names = [column.key for column in jobboard.JobInteraction.__table__.columns]
+    with jobboard.get_session(uri) as session, open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(names)
+        for chunk in stream_chunks(session, jobboard.JobInteraction, columns=names, chunk_size=10000):
+            writer.writerows(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--format', choices=('csv', 'jsonl', 'parquet'), default='csv')
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        source = 'sqlite:///' + os.path.join(directory, 'source.db')
+        engine = jobboard.get_engine(source)
+        populate(engine, args.rows)
+        expected = checksum(engine)
+
+        seconds, _ = timed(single_session_export, source, os.path.join(directory, 'single.csv'))
+        rows.append(('export, one ORM session', f'{seconds:7.2f} s   {args.rows / seconds:12,.0f} rows/s'))
+        for processes in args.processes:
+            shards_directory = os.path.join(directory, f'shards-{processes}')
+            seconds, shards = timed(ORMExport.export_table, source, jobboard.JobInteraction, shards_directory,
+                                    args.format, processes=processes)
+            assert sum(count for _, count in shards) == args.rows
+            rows.append((f'export, {processes} processes', f'{seconds:7.2f} s   {args.rows / seconds:12,.0f} rows/s'))
+
+            copy = jobboard.get_engine('sqlite:///' + os.path.join(directory, f'copy-{processes}.db'))
+            seconds, count = timed(ORMExport.import_files, copy, jobboard.JobInteraction,
+                                   [path for path, _ in shards], processes=processes)
+            assert count == args.rows and checksum(copy) == expected, (count, checksum(copy), expected)
+            rows.append((f'import, {processes} processes', f'{seconds:7.2f} s   {args.rows / seconds:12,.0f} rows/s'))
+        ORMEngine.dispose_all()
+
+    report(f'{args.rows:,} job_interaction rows as {args.format}, {os.cpu_count()} CPUs:', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Building, refreshing and serving precomputed job recommendations.
+
+Generates a job board with ORMDataGen and tops job_interaction up to
+--interactions rows. The full ORMRecommendations.refresh (skills split into
+user_skill, NumPy scoring, top-K written to recommendation) is timed, then
+--touched users get new interactions and the incremental refresh must
+recompute exactly those users and leave everyone else's rows alone. Serving a
+user (recommended_jobs, a primary key range scan) is compared with scoring
+that user on request, which is what every page view would otherwise cost.
+
+    python benchmarks/bench_recommendations.py [--interactions 1000000] [--scale 1] [--touched 20]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMDataGen
+import ORMEngine
+import ORMRecommendations
+import ORMJobBoardDb as jobboard
+
+EPOCH = datetime.datetime(2024, 1, 1)
+
+
+def add_interactions(engine, first_id, count, users, postings, seed=0):
+    rng = random.Random(seed)
+    ORMBulkLoad.bulk_load(engine, {jobboard.JobInteraction: (
+        (i, rng.choice(users), rng.randint(1, postings), rng.randint(1, 3),
+         EPOCH + datetime.timedelta(seconds=rng.randrange(365 * 86400)), rng.random() < 0.2)
+        for i in range(first_id, first_id + count))})
+
+
+def snapshot(engine):
+    with engine.connect() as connection:
+        return set(connection.execute(select(jobboard.Recommendation.__table__)).all())
+
+
+def latencies(func, user_ids):
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        func(user_id)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interactions', type=int, default=1000000)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--touched', type=int, default=20, help='Users given new interactions before the refresh')
+    parser.add_argument('--top', type=int, default=ORMRecommendations.DEFAULT_K)
+    args = parser.parse_args()
+
+    n = ORMDataGen.sizes('jobboard', args.scale)
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'jobboard.db')
+        engine = jobboard.get_engine(uri)
+        ORMDataGen.generate('jobboard', engine, args.scale)
+        users = list(range(1, n['users'] + 1))
+        add_interactions(engine, n['interactions'] + 1, max(0, args.interactions - n['interactions']),
+                         users, n['postings'])
+        with engine.connect() as connection:
+            interactions = connection.scalar(select(func.count()).select_from(jobboard.JobInteraction))
+
+        with engine.begin() as connection:
+            build, refreshed = timed(ORMRecommendations.refresh, connection, args.top)
+        assert refreshed == n['users'], refreshed
+
+        rng = random.Random(1)
+        touched = rng.sample(users, args.touched)
+        before = snapshot(engine)
+        add_interactions(engine, interactions + 1, 10 * args.touched, touched, n['postings'], seed=2)
+        with engine.begin() as connection:
+            incremental, refreshed = timed(ORMRecommendations.refresh, connection, args.top)
+            assert refreshed == len(touched), (refreshed, len(touched))
+            assert not ORMRecommendations.check_recommendations(connection, touched, args.top)
+        after = snapshot(engine)
+        untouched = {row for row in before if row.user_id not in touched}
+        assert untouched == {row for row in after if row.user_id not in touched}
+        with engine.begin() as connection:
+            assert ORMRecommendations.refresh(connection, args.top) == 0
+
+        sample = [rng.choice(users) for _ in range(1000)]
+        with jobboard.get_session(uri) as session:
+            def lookup(user_id):
+                jobs = ORMRecommendations.recommended_jobs(session, user_id)
+                session.expunge_all()
+                return jobs
+
+            served = latencies(lookup, sample)
+        with engine.connect() as connection:
+            def on_request(user_id):
+                return list(ORMRecommendations.scores(connection, [user_id], args.top)[1])
+
+            computed = latencies(on_request, sample[:50])
+        ORMEngine.dispose_all()
+
+    report(f'{interactions:,} interactions, {n["users"]:,} users x {n["postings"]:,} postings, top {args.top}:', [
+        ('full build', f'{build:8.2f} s'),
+        (f'incremental refresh, {args.touched} users', f'{incremental:8.2f} s'),
+        ('lookup, precomputed (p50 / p99)', f'{served[0] * 1000:8.3f} / {served[1] * 1000:.3f} ms'),
+        ('scored on request (p50 / p99)', f'{computed[0] * 1000:8.3f} / {computed[1] * 1000:.3f} ms'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
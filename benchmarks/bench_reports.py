@@ -0,0 +1,99 @@
+"""Sales and booking reports: vectorized over column snapshots vs GROUP BY on the live database.
+
+Generates the ecommerce and travel databases with ORMDataGen, exports the
+report tables with ORMReports.export (a full export first, then an
+incremental one after --new orders and bookings are added and --touched
+bookings change status) and times every report both ways, median of
+--repeat runs. The snapshot reports must match the live SQL after each
+export (ORMReports.check_reports).
+
+    python benchmarks/bench_reports.py [--scale 20] [--new 10000] [--touched 1000] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+
+from sqlalchemy import func, insert, select, update
+
+from _common import report, timed
+
+import ORMDataGen
+import ORMEngine
+import ORMReports
+import ORMEcommerceDb as ecommerce
+import ORMTravelBookingDb as travel
+
+SCHEMAS = {'ecommerce': ecommerce, 'travel': travel}
+# Table add_rows() writes to, per schema
+TABLES = {'ecommerce': ecommerce.Order.__table__.name, 'travel': travel.Booking.__table__.name}
+
+
+def add_rows(engine, schema, count, touched):
+    # New orders or bookings past the high-water mark, and status changes
+    with engine.begin() as connection:
+        if schema == 'ecommerce':
+            first = connection.scalar(select(func.max(ecommerce.Order.order_id))) + 1
+            connection.execute(insert(ecommerce.Order), [
+                {'order_id': i, 'user_id': 1, 'total_amount': 10.0 + i % 90, 'status': 'PENDING'}
+                for i in range(first, first + count)])
+        else:
+            first = connection.scalar(select(func.max(travel.Booking.booking_id))) + 1
+            connection.execute(insert(travel.Booking), [
+                {'booking_id': i, 'user_id': 1, 'tour_id': 1 + i % 50, 'seats_booked': 1, 'total_amount': 100,
+                 'payment_status': 'SUCCESS'} for i in range(first, first + count)])
+            connection.execute(update(travel.Booking).where(travel.Booking.booking_id <= touched)
+                               .values(payment_status='FAILED'))
+
+
+def median(func, *args, repeat):
+    return statistics.median(timed(func, *args)[0] for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=20.0)
+    parser.add_argument('--new', type=int, default=10000, help='Orders and bookings added before the next export')
+    parser.add_argument('--touched', type=int, default=1000, help='Bookings whose status changes')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows, exports, latencies = {}, [], []
+    with tempfile.TemporaryDirectory() as directory:
+        for schema, module in SCHEMAS.items():
+            uri = 'sqlite:///' + os.path.join(directory, f'{schema}.db')
+            engine = module.get_engine(uri)
+            ORMDataGen.generate(schema, engine, args.scale)
+            snapshot = os.path.join(directory, f'{schema}.columnar')
+            reader = ORMEngine.create_reader_engine(uri)
+            with reader.connect() as connection:
+                full, exported = timed(ORMReports.export, connection, schema, snapshot)
+                rows.update(exported)
+                assert not ORMReports.check_reports(connection, schema, snapshot)
+            add_rows(engine, schema, args.new, args.touched)
+            with reader.connect() as connection:
+                incremental, exported = timed(ORMReports.export, connection, schema, snapshot)
+                expected = args.new + (args.touched if schema == 'travel' else 0)
+                changed = exported[TABLES[schema]]
+                # Plus the rows stamped in the same tick as the high-water mark, never the whole table
+                assert expected <= changed < rows[TABLES[schema]], (changed, expected)
+                drifted = ORMReports.check_reports(connection, schema, snapshot)
+                assert not drifted, drifted[:5]
+                exports.append((schema, full, incremental, exported))
+                for name, (vectorized, live) in ORMReports.REPORTS[schema].items():
+                    latencies.append((name, median(vectorized, snapshot, repeat=args.repeat),
+                                      median(live, connection, repeat=args.repeat)))
+            reader.dispose()
+        ORMEngine.dispose_all()
+
+    report(f'Snapshots of {", ".join(f"{count:,} {table}" for table, count in rows.items())}:',
+           [(f'{schema} export, full / incremental', f'{full:8.3f} / {incremental:.3f} s   '
+             f'{", ".join(f"{count:,} {table}" for table, count in exported.items())} read')
+            for schema, full, incremental, exported in exports])
+    report(f'Reports, median of {args.repeat} (snapshot / live SQL):',
+           [(name, f'{vectorized * 1000:8.1f} / {live * 1000:8.1f} ms   x{live / vectorized:.1f}')
+            for name, vectorized, live in latencies])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Multi-process oversell stress test for ORMReservations.
+
+Creates a travel database with a handful of tours, then lets W worker
+processes book random seat counts (sometimes several tours in one
+transaction) until every tour is sold out. Afterwards the seats booked must
+add up exactly to the initial capacity and no tour may go negative.
+
+    python benchmarks/bench_reservations.py [--workers 8] [--tours 5] [--seats 2000]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from _common import report
+
+import ORMBulkLoad
+import ORMEngine
+import ORMReservations
+import ORMTravelBookingDb as travel
+
+
+def worker(uri, tours, seed):
+    random.seed(seed)
+    engine = ORMEngine.get_engine(uri)
+    booked = failures = 0
+    sold_out = set()
+    while len(sold_out) < tours:
+        picks = random.sample(range(1, tours + 1), k=random.choice((1, 1, 2)))
+        items = [ORMReservations.tour_seats(tour_id, random.randint(1, 4)) for tour_id in picks]
+        try:
+            ORMReservations.reserve(engine, items)
+            booked += 1
+        except ORMReservations.InsufficientCapacity as exc:
+            failures += 1
+            if len(items) == 1 and exc.item.quantity == 1:
+                sold_out.add(exc.item.key)
+            elif len(items) == 1:
+                # Try the last few seats one by one before giving up on the tour
+                try:
+                    ORMReservations.reserve(engine, [ORMReservations.tour_seats(exc.item.key, 1)])
+                    booked += 1
+                except ORMReservations.InsufficientCapacity:
+                    sold_out.add(exc.item.key)
+    engine.dispose()
+    return booked, failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--tours', type=int, default=5)
+    parser.add_argument('--seats', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'bench.db')
+        engine = ORMEngine.get_engine(uri, travel.Base.metadata)
+        ORMBulkLoad.bulk_load(engine, {travel.Tour: [{'tour_id': n, 'tour_name': f'Tour {n}',
+                                                       'seats_available': args.seats}
+                                                      for n in range(1, args.tours + 1)]})
+        engine.dispose()
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.starmap(worker, [(uri, args.tours, seed) for seed in range(args.workers)])
+        elapsed = time.perf_counter() - start
+
+        with engine.connect() as connection:
+            remaining = connection.execute(select(func.sum(travel.Tour.seats_available))).scalar()
+            negative = connection.execute(select(func.count()).where(travel.Tour.seats_available < 0)).scalar()
+        assert remaining == 0 and negative == 0, f'{remaining} seats left, {negative} tours oversold'
+        booked = sum(result[0] for result in results)
+        rejected = sum(result[1] for result in results)
+        report(f'{args.workers} processes booking {args.tours} tours x {args.seats} seats:', [
+            ('oversold tours', negative),
+            ('successful reservations', f'{booked:,}'),
+            ('rejected (sold out)', f'{rejected:,}'),
+            ('throughput', f'{booked / elapsed:,.0f} reservations/s'),
+        ])
+        ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Read throughput of RoutingSession against the number of read-only engines.
+
+Generates a job board with ORMDataGen, then runs --threads threads for
+--seconds each, every one opening routing sessions that read inbox pages
+(ORMPagination.inbox) while one writer thread keeps inserting messages
+through the primary. Each reader engine holds one connection, so N readers
+means N concurrent read connections; readers=0 sends everything to the
+primary engine, as the plain sessionmaker did. The checks at the end confirm
+that readers see committed writes and cannot write.
+
+    python benchmarks/bench_routing.py [--scale 0.5] [--threads 8] [--seconds 3] [--readers 0 1 2 4 8]
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from _common import report
+
+import ORMDataGen
+import ORMEngine
+import ORMPagination
+import ORMRouting
+import ORMJobBoardDb as jobboard
+
+
+def run(factory, users, threads, seconds):
+    stop = threading.Event()
+    reads = [0] * threads
+    writes = [0]
+
+    def reader(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            with factory() as session:
+                ORMPagination.inbox(session, rng.randint(1, users), page_size=20)
+            reads[slot] += 1
+
+    def writer():
+        while not stop.is_set():
+            with factory() as session:
+                session.execute(insert(jobboard.Message).values(
+                    sender_id=1, recipient_id=1, message='ping', is_read=False,
+                    message_type='TEXT', send_at=datetime.datetime(2030, 1, 1), deleted_at=None))
+                session.commit()
+            writes[0] += 1
+            time.sleep(0.001)
+
+    workers = [threading.Thread(target=reader, args=(slot,)) for slot in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(reads) / seconds, writes[0] / seconds
+
+
+def check(factory):
+    with factory() as session:
+        before = session.scalar(select(func.count()).select_from(jobboard.Message))
+        assert session.get_bind(clause=select(1)) is not session.primary
+    with factory() as session:
+        session.execute(insert(jobboard.Message).values(sender_id=1, recipient_id=1, message='check'))
+        # reads after a write in the same transaction go to the primary
+        assert session.scalar(select(func.count()).select_from(jobboard.Message)) == before + 1
+        session.commit()
+    with factory() as session:
+        assert session.scalar(select(func.count()).select_from(jobboard.Message)) == before + 1
+        try:
+            with session.using('reader'):
+                session.execute(update(jobboard.Message).values(is_read=True))
+        except OperationalError:
+            pass
+        else:
+            raise AssertionError('a reader accepted a write')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=0.5)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--readers', type=int, nargs='+', default=[0, 1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'jobboard.db')
+        ORMDataGen.generate('jobboard', jobboard.get_engine(uri), args.scale)
+        users = ORMDataGen.sizes('jobboard', args.scale)['users']
+        for readers in args.readers:
+            factory = ORMRouting.routing_sessionmaker(uri, jobboard.Base.metadata, readers=readers)
+            reads, writes = run(factory, users, args.threads, args.seconds)
+            if readers:
+                check(factory)
+            factory.kw['readers'].dispose()
+            label = 'primary only' if readers == 0 else f'{readers} reader engines'
+            rows.append((label, f'{reads:9,.0f} reads/s   {writes:6,.0f} writes/s'))
+        ORMEngine.dispose_all()
+
+    report(f'{args.threads} reading threads and one writer, {os.cpu_count()} CPUs:', rows)
+
+
+if __name__ == '__main__':
+    main()
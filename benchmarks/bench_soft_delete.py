@@ -0,0 +1,104 @@
+"""Live-row queries as tombstones pile up, and the batched purge that clears them.
+
+Fills a job board inbox with N messages over --recipients users and
+soft-deletes --deleted of them. The first inbox page of a user (through an
+ORM session, so ORMSoftDelete adds deleted_at IS NULL) is timed twice: with
+the partial ix_message_live_recipient_sent index, and with the same index
+built over every row, as before. ORMSoftDelete.purge then archives and
+deletes the tombstones in batches; the live rows must be untouched.
+
+    python benchmarks/bench_soft_delete.py [--messages 500000] [--recipients 1000] [--deleted 0.8]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMPagination
+import ORMSoftDelete
+import ORMJobBoardDb as jobboard
+
+EPOCH = datetime.datetime(2024, 1, 1)
+
+
+def populate(engine, messages, recipients, deleted, seed=0):
+    rng = random.Random(seed)
+    old = EPOCH - datetime.timedelta(days=90)
+    ORMBulkLoad.bulk_load(engine, {
+        jobboard.User: ({'user_id': i, 'name': f'user{i}'} for i in range(1, recipients + 1)),
+        jobboard.Message: ({'message_id': i, 'sender_id': rng.randint(1, recipients),
+                            'recipient_id': rng.randint(1, recipients), 'message': 'hello', 'is_read': True,
+                            'message_type': 'TEXT', 'send_at': EPOCH + datetime.timedelta(seconds=i),
+                            'deleted_at': old if rng.random() < deleted else None}
+                           for i in range(1, messages + 1)),
+    })
+
+
+def inbox_latency(sessionmaker, recipients, samples=500, seed=1):
+    rng = random.Random(seed)
+    timings = []
+    with sessionmaker() as session:
+        for _ in range(samples):
+            start = time.perf_counter()
+            ORMPagination.inbox(session, rng.randint(1, recipients), page_size=20)
+            timings.append(time.perf_counter() - start)
+            session.expunge_all()
+    return statistics.median(timings)
+
+
+def index_pages(connection, name):
+    return connection.exec_driver_sql('SELECT count(*) FROM dbstat WHERE name = ?', (name,)).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=500000)
+    parser.add_argument('--recipients', type=int, default=1000)
+    parser.add_argument('--deleted', type=float, default=0.8)
+    parser.add_argument('--batch-size', type=int, default=ORMSoftDelete.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'inbox.db')
+        engine = jobboard.get_engine(uri)
+        sessionmaker = jobboard.get_sessionmaker(uri)
+        populate(engine, args.messages, args.recipients, args.deleted)
+        with engine.connect() as connection:
+            live = connection.scalar(select(func.count()).select_from(jobboard.Message)
+                                     .where(jobboard.Message.deleted_at.is_(None)))
+            partial_pages = index_pages(connection, 'ix_message_live_recipient_sent')
+        partial = inbox_latency(sessionmaker, args.recipients)
+
+        with engine.begin() as connection:
+            connection.exec_driver_sql('DROP INDEX ix_message_live_recipient_sent')
+            connection.exec_driver_sql('CREATE INDEX ix_full_recipient_sent ON message (recipient_id, send_at, message_id)')
+            connection.exec_driver_sql('ANALYZE')
+            full_pages = index_pages(connection, 'ix_full_recipient_sent')
+        full = inbox_latency(sessionmaker, args.recipients)
+
+        seconds, purged = timed(ORMSoftDelete.purge, engine, jobboard.Message, datetime.timedelta(days=30),
+                                batch_size=args.batch_size)
+        with engine.connect() as connection:
+            assert purged == args.messages - live, (purged, args.messages - live)
+            assert connection.scalar(select(func.count()).select_from(jobboard.Message)) == live
+            assert connection.exec_driver_sql('SELECT count(*) FROM message_archive').scalar() == purged
+        ORMEngine.dispose_all()
+
+    report(f'{args.messages:,} messages, {args.messages - live:,} soft-deleted, inbox page of 20:', [
+        ('partial index (live rows only)', f'{partial * 1000:7.3f} ms   {partial_pages:,} index pages'),
+        ('index over every row', f'{full * 1000:7.3f} ms   {full_pages:,} index pages'),
+        (f'purge, batches of {args.batch_size:,}', f'{seconds:7.2f} s   {purged / seconds:,.0f} rows/s archived'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
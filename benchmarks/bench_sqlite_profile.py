@@ -0,0 +1,105 @@
+"""Concurrent read/write throughput with and without the ORMEngine pragma profile.
+
+Each of the five bundled database files is copied twice into a temporary
+directory: one copy is opened with SQLite's defaults (pragmas={}), the other
+with ORMEngine.SQLITE_PRAGMAS. Writer threads insert single rows in their own
+transactions while reader threads look rows up by primary key.
+
+    python benchmarks/bench_sqlite_profile.py [--seconds 5] [--readers 4] [--writers 2]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func, insert, select
+
+from _common import ROOT, report
+
+import ORMEcommerceDb as ecommerce
+import ORMEngine
+import ORMEventManagementDb as events
+import ORMJobBoardDb as jobboard
+import ORMQuizDb as quiz
+import ORMTravelBookingDb as travel
+
+WORKLOADS = [
+    ('ORMEcommerceDb.db', ecommerce, ecommerce.Review,
+     lambda i: {'user_id': 1, 'product_id': 1, 'rating': i % 5 + 1, 'comment': 'bench'}),
+    ('ORMJobBoardDb.Db', jobboard, jobboard.JobInteraction,
+     lambda i: {'user_id': 1, 'job_id': 1, 'interaction_type': 1, 'is_applied': False}),
+    ('ORMQuizDb.sqlite', quiz, quiz.Answer,
+     lambda i: {'question_id': 1, 'student_id': 1, 'answer_text': str(i)}),
+    ('ORMTravelBookingDb.db', travel, travel.AdminLog,
+     lambda i: {'admin_id': 3, 'action_type': 'UPDATE', 'description': 'bench'}),
+    ('ORMEventManagementDb.db', events, events.Agenda,
+     lambda i: {'event_id': 1, 'agenda_time_start': '10:00', 'agenda_time_end': '11:00'}),
+]
+
+
+def run_workload(engine, model, make_row, seconds, readers, writers):
+    table = model.__table__
+    pk = list(table.primary_key)[0]
+    with engine.connect() as connection:
+        top = connection.execute(select(func.max(pk))).scalar() or 1
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader():
+        done = 0
+        with engine.connect() as connection:
+            while time.perf_counter() < deadline:
+                connection.execute(select(table).where(pk == random.randint(1, top))).all()
+                done += 1
+        with lock:
+            counts['reads'] += done
+
+    def writer():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(table).values(make_row(done)))
+                done += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts['writes'] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {name: value / seconds for name, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for filename, module, model, make_row in WORKLOADS:
+            rows = []
+            for profile, pragmas in (('defaults', {}), ('tuned', None)):
+                path = os.path.join(directory, f'{profile}-{filename}')
+                shutil.copy(os.path.join(ROOT, filename), path)
+                engine = ORMEngine.get_engine('sqlite:///' + path, module.Base.metadata, pragmas=pragmas)
+                result = run_workload(engine, model, make_row, args.seconds, args.readers, args.writers)
+                rows.append((profile, f"{result['reads']:,.0f} reads/s  {result['writes']:,.0f} writes/s"
+                                      f"  ({result['errors']:,.1f} failed writes/s)"))
+            report(f'{filename} ({args.readers} readers, {args.writers} writers):', rows)
+        ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Resident memory while scanning the quiz ``answer`` table.
+
+Loads N answer rows into a temporary database, then scans them with
+ORMStreaming (as entities and as tuples) while sampling RSS every chunk.
+Flat RSS means memory is bounded by the chunk size, not the table size.
+Pass --all to also run the old ``session.query(Answer).all()`` for contrast.
+
+    python benchmarks/bench_streaming.py [--rows 5000000] [--chunk-size 1000] [--all]
+"""
+import argparse
+import os
+import resource
+import tempfile
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMQuizDb as quiz
+from ORMStreaming import stream_chunks
+
+
+
+def rss_mb():
+    # Anonymous RSS only: pages of the database file mapped through
+    # PRAGMA mmap_size are shared file memory and would mask the heap.
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('RssAnon:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS only (KiB on Linux, bytes on macOS), but better than nothing
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def populate(engine, rows):
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.User: [(1, 'Student', 's@example.com', 'x', 'student')],
+        quiz.Quiz: [(1, 'Quiz', None, 'Q1', 1)],
+        quiz.Question: [(1, 1, 'Question', 'short answer')],
+        quiz.Answer: ((n, 1, 1, f'answer {n}') for n in range(1, rows + 1)),
+    }, columns={
+        quiz.User: ['user_id', 'name', 'email', 'password', 'role'],
+        quiz.Quiz: ['quiz_id', 'title', 'description', 'quiz_code', 'teacher_id'],
+        quiz.Question: ['question_id', 'quiz_id', 'question_text', 'question_type'],
+        quiz.Answer: ['answer_id', 'question_id', 'student_id', 'answer_text'],
+    })
+
+
+def scan(session, **kwargs):
+    samples = []
+    count = 0
+    for chunk in stream_chunks(session, quiz.Answer, **kwargs):
+        count += len(chunk)
+        if len(samples) < 2 or count % (kwargs['chunk_size'] * 100) < kwargs['chunk_size']:
+            samples.append(rss_mb())
+    samples.append(rss_mb())
+    return count, samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--all', action='store_true', help='also time the unbounded .all() scan')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'bench.sqlite')
+        engine = ORMEngine.get_engine(uri, quiz.Base.metadata)
+        populate(engine, args.rows)
+        factory = ORMEngine.get_sessionmaker(uri)
+        rows = []
+        modes = {
+            'entities': {},
+            'tuples': {'columns': ('answer_id', 'student_id', 'answer_text'), 'as_tuples': True},
+        }
+        for label, kwargs in modes.items():
+            with factory() as session:
+                elapsed, (count, samples) = timed(scan, session, chunk_size=args.chunk_size, **kwargs)
+            rows.append((f'stream {label}', f'{count / elapsed:,.0f} rows/s  RSS start {samples[0]:.0f} MB, '
+                                            f'max {max(samples):.0f} MB, end {samples[-1]:.0f} MB'))
+        if args.all:
+            with factory() as session:
+                before = rss_mb()
+                elapsed, result = timed(lambda: session.query(quiz.Answer).all())
+                rows.append(('query().all()', f'{len(result) / elapsed:,.0f} rows/s  RSS start {before:.0f} MB, '
+                                              f'end {rss_mb():.0f} MB'))
+        report(f'Scanning {args.rows:,} answers (chunk size {args.chunk_size}):', rows)
+        ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Check database-side timestamps and compare insert throughput.
+
+First verifies on the quiz schema that rows inserted in separate batches get
+increasing ``submitted_At`` values in primary-key order (the old import-time
+``default=datetime.now(...)`` gave every row the same value) and that an update
+moves ``updatedAt``. Then inserts N answers with a Python ``datetime`` built per
+row versus letting SQLite stamp them.
+
+    python benchmarks/bench_timestamps.py [--rows 200000]
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMQuizDb as quiz
+
+
+def fresh_engine(name):
+    uri = f'sqlite:///file:{name}?mode=memory&cache=shared&uri=true'
+    engine = ORMEngine.get_engine(uri, quiz.Base.metadata)
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.User: [{'user_id': 1, 'name': 'Student', 'email': 's@example.com', 'password': 'x',
+                     'role': 'student'}],
+        quiz.Quiz: [{'quiz_id': 1, 'title': 'Quiz', 'quiz_code': 'Q1', 'teacher_id': 1}],
+        quiz.Question: [{'question_id': 1, 'quiz_id': 1, 'question_text': 'Q', 'question_type': 'MCQ'}],
+    })
+    return engine
+
+
+def check_ordering():
+    engine = fresh_engine('ordering')
+    for batch in range(3):
+        ORMBulkLoad.bulk_load(engine, {quiz.Answer: [{'question_id': 1, 'student_id': 1, 'answer_text': str(batch)}
+                                                     for _ in range(100)]})
+        time.sleep(0.01)
+    with engine.begin() as connection:
+        stamps = connection.execute(select(quiz.Answer.submitted_At).order_by(quiz.Answer.answer_id)).scalars().all()
+        assert stamps == sorted(stamps), 'submitted_At is not monotonic in insert order'
+        assert stamps[0] < stamps[100] < stamps[200], 'separate batches share one timestamp'
+
+        before = connection.execute(select(quiz.User.updatedAt)).scalar_one()
+        time.sleep(0.01)
+        connection.execute(update(quiz.User).values(name='Renamed'))
+        after = connection.execute(select(quiz.User.updatedAt)).scalar_one()
+        assert after > before, 'updatedAt did not move on update'
+    return len(stamps)
+
+
+def insert_answers(engine, rows, python_side):
+    if python_side:
+        data = ({'question_id': 1, 'student_id': 1, 'answer_text': 'x',
+                 'submitted_At': datetime.now(timezone.utc)} for _ in range(rows))
+    else:
+        data = ({'question_id': 1, 'student_id': 1, 'answer_text': 'x'} for _ in range(rows))
+    ORMBulkLoad.bulk_load(engine, {quiz.Answer: data})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    checked = check_ordering()
+    rows = [('ordering / onupdate checks', f'passed on {checked} rows')]
+    for label, python_side in (('Python datetime per row', True), ('SQLite-side default', False)):
+        elapsed, _ = timed(insert_answers, fresh_engine(label.split()[0].lower()), args.rows, python_side)
+        rows.append((label, f'{args.rows / elapsed:,.0f} rows/s'))
+    report(f'Timestamp defaults, {args.rows:,} answer inserts:', rows)
+    ORMEngine.dispose_all()
+
+
+if __name__ == '__main__':
+    main()
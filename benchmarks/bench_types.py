@@ -0,0 +1,109 @@
+"""Integer cents and small-integer enums vs DECIMAL and text Enum columns: size, migration and read throughput.
+
+Writes N payments into a table declared the old way (DECIMAL(10, 2) amount,
+text Enum method and status), measures the table's pages and a Core read of every
+amount and status, then opens the file with ORMTravelBookingDb.get_engine,
+which rebuilds the table with ORMTypes.Cents and SmallEnum columns, and
+measures again, once through Core (Decimal and label per value) and once
+with ORMTypes.fetch_arrays (NumPy, decoded per column). Totals and status
+counts must come out the same every way.
+
+    python benchmarks/bench_types.py [--rows 1000000]
+"""
+import argparse
+import collections
+import datetime
+import math
+import os
+import tempfile
+from decimal import Decimal
+
+import numpy  # noqa: F401  imported up front, not inside the timed fetch_arrays
+from sqlalchemy import DECIMAL, Column, DateTime, Enum, Integer, MetaData, String, Table, create_engine, select
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMTypes
+import ORMTravelBookingDb as travel
+
+legacy = Table(
+    'payments', MetaData(),
+    Column('payment_id', Integer, primary_key=True),
+    Column('booking_id', Integer, nullable=False),
+    Column('payment_date', DateTime),
+    Column('amount', DECIMAL(10, 2)),
+    Column('payment_method', Enum('GCASH')),
+    Column('payment_status', Enum('SUCCESS', 'FAILED')),
+    Column('transaction_id', String(100)),
+)
+
+
+def payments(rows):
+    for i in range(1, rows + 1):
+        yield {'payment_id': i, 'booking_id': i, 'payment_date': datetime.datetime(2024, 1, 1),
+               'amount': Decimal(i * 7919 % 100_000) / 100, 'payment_method': 'GCASH',
+               'payment_status': 'FAILED' if i % 10 == 0 else 'SUCCESS', 'transaction_id': f'T{i}'}
+
+
+def read_rows(engine, table):
+    total, statuses = Decimal(0), collections.Counter()
+    with engine.connect() as connection:
+        for amount, status in connection.execute(select(table.c.amount, table.c.payment_status)):
+            total += amount
+            statuses[status] += 1
+    return total, statuses
+
+
+def read_arrays(engine):
+    with engine.connect() as connection:
+        arrays = ORMTypes.fetch_arrays(connection, select(travel.Payment.amount, travel.Payment.payment_status))
+    labels = travel.Payment.payment_status.type.labels
+    counts = collections.Counter(arrays['payment_status'].tolist())
+    return arrays['amount'].sum(), {labels[code]: count for code, count in counts.items()}
+
+
+def table_size(engine):
+    # Pages of the payments table itself; the indexes differ between the two declarations
+    with engine.connect() as connection:
+        connection.exec_driver_sql('VACUUM')
+        return connection.exec_driver_sql("SELECT sum(pgsize) FROM dbstat WHERE name = 'payments'").scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'payments.db')
+        engine = create_engine(uri)
+        legacy.create(engine)
+        ORMBulkLoad.bulk_load(engine, {legacy: payments(args.rows)})
+        legacy_size = table_size(engine)
+        legacy_read, (legacy_total, legacy_statuses) = timed(read_rows, engine, legacy)
+        engine.dispose()
+
+        migration, engine = timed(travel.get_engine, uri)
+        size = table_size(engine)
+        core_read, (total, statuses) = timed(read_rows, engine, travel.Payment.__table__)
+        numpy_read, (array_total, array_statuses) = timed(read_arrays, engine)
+        ORMEngine.dispose_all()
+
+    assert total == legacy_total, (total, legacy_total)
+    assert statuses == legacy_statuses == array_statuses, (statuses, legacy_statuses, array_statuses)
+    assert math.isclose(array_total, float(total), rel_tol=1e-12), (array_total, total)
+
+    report(f'{args.rows:,} payments, amount and status:', [
+        ('table, DECIMAL + text Enum', f'{legacy_size / 1e6:8.1f} MB   {legacy_size / args.rows:5.1f} bytes/row'),
+        ('table, Cents + SmallEnum', f'{size / 1e6:8.1f} MB   {size / args.rows:5.1f} bytes/row'),
+        ('migration on open', f'{migration:8.2f} s'),
+        ('read, DECIMAL + text Enum (Core)', f'{args.rows / legacy_read:10,.0f} rows/s'),
+        ('read, Cents + SmallEnum (Core)', f'{args.rows / core_read:10,.0f} rows/s'),
+        ('read, Cents + SmallEnum (fetch_arrays)', f'{args.rows / numpy_read:10,.0f} rows/s'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Re-importing a product catalogue with ORMBulkLoad.upsert.
+
+Loads N products keyed on sku into an empty database, then imports the same
+catalogue again unchanged, then again with --changed of the rows edited and
+as many new ones added. For comparison, the full refresh that a plain
+INSERT allows (delete everything and bulk_load again) is timed too. The
+counts upsert returns are checked: only new or edited rows may be written.
+
+    python benchmarks/bench_upsert.py [--rows 100000] [--changed 0.01]
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from sqlalchemy import delete, func, select
+
+from _common import report, timed
+
+import ORMBulkLoad
+import ORMEngine
+import ORMEcommerceDb as ecommerce
+
+
+def catalogue(rows, seed=0):
+    rng = random.Random(seed)
+    return [{'sku': f'SKU{i:07d}', 'name': f'Product {i}', 'brand': f'Brand{i % 50}', 'description': 'Catalogue item',
+             'price': round(rng.uniform(1, 500), 2), 'stock': rng.randint(0, 100), 'category': 'Electronics'}
+            for i in range(rows)]
+
+
+def edit(products, fraction, seed=1):
+    rng = random.Random(seed)
+    products = [dict(product) for product in products]
+    count = int(len(products) * fraction)
+    for product in rng.sample(products, count):
+        product['price'] = round(product['price'] + 1, 2)
+    start = len(products)
+    products += [{**products[0], 'sku': f'SKU{i:07d}', 'name': f'Product {i}'} for i in range(start, start + count)]
+    return products, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--changed', type=float, default=0.01)
+    args = parser.parse_args()
+
+    products = catalogue(args.rows)
+    edited, count = edit(products, args.changed)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = ORMEngine.get_engine('sqlite:///' + os.path.join(directory, 'upsert.db'), ecommerce.Base.metadata)
+        initial, counts = timed(ORMBulkLoad.upsert, engine, {ecommerce.Product: products})
+        assert counts == {'products': args.rows}, counts
+        unchanged, counts = timed(ORMBulkLoad.upsert, engine, {ecommerce.Product: products})
+        assert counts == {'products': 0}, counts
+        changed, counts = timed(ORMBulkLoad.upsert, engine, {ecommerce.Product: edited})
+        assert counts == {'products': 2 * count}, counts
+        with engine.connect() as connection:
+            assert connection.scalar(select(func.count()).select_from(ecommerce.Product)) == args.rows + count
+
+        def full_refresh():
+            with engine.begin() as connection:
+                connection.execute(delete(ecommerce.Product))
+                ORMBulkLoad.bulk_load(connection, {ecommerce.Product: edited})
+
+        refresh, _ = timed(full_refresh)
+        ORMEngine.dispose_all()
+
+    report(f'Importing {args.rows:,} products keyed on sku:', [
+        ('upsert into an empty table', f'{initial * 1000:9.1f} ms'),
+        ('upsert, nothing changed', f'{unchanged * 1000:9.1f} ms   0 rows written'),
+        (f'upsert, {count:,} edited + {count:,} new', f'{changed * 1000:9.1f} ms   {2 * count:,} rows written'),
+        ('delete all + bulk_load', f'{refresh * 1000:9.1f} ms   {args.rows + count:,} rows written'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""Named end-to-end workloads over generated data, saved as JSON for comparison.
+
+Each schema is generated once with ORMDataGen at --scale/--seed. Every
+workload then runs in a fresh process on its own copy of that database:
+--warmup untimed operations, then --ops timed ones. For each workload the
+report has throughput, p50/p99 latency and the peak RSS of its process.
+--output writes the results as JSON, and --compare prints the change against
+an earlier JSON file.
+
+    python benchmarks/bench_workloads.py [--scale 1] [--ops 2000] [--workloads checkout inbox ...]
+                                         [--output run.json] [--compare baseline.json]
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import sqlalchemy
+from sqlalchemy import select
+
+from _common import report
+
+import ORMDataGen
+import ORMEngine
+import ORMGrading
+import ORMInbox
+import ORMPagination
+import ORMReservations
+import ORMSearch
+import ORMEcommerceDb as ecommerce
+import ORMEventManagementDb as events
+import ORMJobBoardDb as jobboard
+import ORMQuizDb as quiz
+import ORMTravelBookingDb as travel
+
+
+def checkout(context, rng):
+    """Reserve stock for 1-3 products and record the order and its items in one transaction."""
+    n = context.sizes
+    lines = {rng.randint(1, n['products']): rng.randint(1, 2) for _ in range(rng.randint(1, 3))}
+
+    def record_order(connection):
+        prices = dict(connection.execute(select(ecommerce.Product.product_id, ecommerce.Product.price)
+                                         .where(ecommerce.Product.product_id.in_(lines))).all())
+        order_id = connection.execute(ecommerce.Order.__table__.insert().values(
+            user_id=rng.randint(1, n['users']), status='PAID',
+            total_amount=sum(prices[product_id] * quantity for product_id, quantity in lines.items()),
+        )).inserted_primary_key[0]
+        connection.execute(ecommerce.OrderItem.__table__.insert(), [
+            {'order_id': order_id, 'product_id': product_id, 'quantity': quantity, 'price': prices[product_id]}
+            for product_id, quantity in lines.items()])
+
+    try:
+        ORMReservations.reserve(context.engine, [ORMReservations.product_stock(product_id, quantity)
+                                                 for product_id, quantity in lines.items()], then=record_order)
+    except ORMReservations.InsufficientCapacity:
+        pass
+
+
+def inbox(context, rng):
+    """First inbox page of a user plus their unread count."""
+    recipient_id = rng.randint(1, context.sizes['users'])
+    with context.sessionmaker() as session:
+        ORMPagination.inbox(session, recipient_id, page_size=20)
+        ORMInbox.unread_count(session, jobboard.Message, recipient_id)
+
+
+def job_search(context, rng):
+    """Full-text search for one or two skill or title words."""
+    terms = ' '.join(rng.sample(ORMDataGen.SKILLS + ORMDataGen.CITIES[:3], k=rng.randint(1, 2)))
+    with context.sessionmaker() as session:
+        ORMSearch.search(session, jobboard.JobPosting, terms, limit=20)
+
+
+def quiz_grading(context, rng):
+    """Grade every submission of one quiz."""
+    with context.engine.begin() as connection:
+        ORMGrading.grade(connection, [rng.randint(1, context.sizes['quizzes'])])
+
+
+def tour_booking(context, rng):
+    """Reserve seats on a tour and insert the booking."""
+    n = context.sizes
+    try:
+        ORMReservations.book_tour(context.engine, rng.randint(1, n['users']), rng.randint(1, n['tours']),
+                                  rng.randint(1, 4), payment_status='SUCCESS')
+    except ORMReservations.InsufficientCapacity:
+        pass
+
+
+def event_check_in(context, rng):
+    """Record a guest's arrival and give them a seat if they have none yet."""
+    n = context.sizes
+    invitation_id = rng.randint(1, n['events'] * n['invited_per_event'])
+    with context.engine.begin() as connection:
+        connection.execute(events.Attendees.__table__.insert().values(invitation_id=invitation_id))
+    try:
+        ORMReservations.assign_seat(context.engine, invitation_id, f'B{invitation_id}')
+    except ORMReservations.SeatTaken:
+        pass
+
+
+WORKLOADS = {
+    'checkout': ('ecommerce', checkout),
+    'inbox': ('jobboard', inbox),
+    'job_search': ('jobboard', job_search),
+    'quiz_grading': ('quiz', quiz_grading),
+    'tour_booking': ('travel', tour_booking),
+    'event_check_in': ('events', event_check_in),
+}
+MODULES = {'ecommerce': ecommerce, 'jobboard': jobboard, 'quiz': quiz, 'travel': travel, 'events': events}
+
+
+class Context:
+    def __init__(self, uri, schema, scale):
+        self.engine = ORMEngine.get_engine(uri, MODULES[schema].Base.metadata)
+        self.sessionmaker = ORMEngine.get_sessionmaker(uri)
+        self.sizes = ORMDataGen.sizes(schema, scale)
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def run_workload(name, template, directory, scale, ops, warmup, seed):
+    """Runs in its own process so that the peak RSS belongs to this workload alone."""
+    schema, operation = WORKLOADS[name]
+    path = os.path.join(directory, f'{name}.db')
+    shutil.copyfile(template, path)
+    context = Context('sqlite:///' + path, schema, scale)
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        operation(context, rng)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(ops):
+        began = time.perf_counter()
+        operation(context, rng)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    ORMEngine.dispose_all()
+    latencies.sort()
+    return {
+        'schema': schema,
+        'ops': ops,
+        'seconds': elapsed,
+        'throughput': ops / elapsed,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def build_templates(directory, schemas, scale, seed):
+    templates = {}
+    for schema in schemas:
+        path = os.path.join(directory, f'{schema}.template.db')
+        engine = ORMEngine.create_sqlite_engine('sqlite:///' + path)
+        ORMEngine.sync_schema(engine, MODULES[schema].Base.metadata)
+        ORMDataGen.generate(schema, engine, scale, seed)
+        with engine.connect() as connection:
+            connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+        engine.dispose()
+        templates[schema] = path
+    return templates
+
+
+def compare(results, baseline):
+    rows = []
+    for name, current in results['workloads'].items():
+        previous = baseline['workloads'].get(name)
+        if previous is None:
+            continue
+        changes = [f"{metric} {(current[metric] / previous[metric] - 1) * 100:+6.1f}%"
+                   for metric in ('throughput', 'p50_ms', 'p99_ms', 'peak_rss_mb') if previous[metric]]
+        rows.append((name, '   '.join(changes)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ops', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare against')
+    args = parser.parse_args()
+
+    results = {
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'settings': {'scale': args.scale, 'seed': args.seed, 'ops': args.ops, 'warmup': args.warmup},
+        'environment': {'python': platform.python_version(), 'sqlalchemy': sqlalchemy.__version__,
+                        'sqlite': sqlite3.sqlite_version, 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+        'workloads': {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        templates = build_templates(directory, {WORKLOADS[name][0] for name in args.workloads}, args.scale, args.seed)
+        # spawn, not fork: every workload starts from a clean interpreter
+        spawn = multiprocessing.get_context('spawn')
+        for name in args.workloads:
+            with spawn.Pool(1) as pool:
+                results['workloads'][name] = pool.apply(run_workload, (
+                    name, templates[WORKLOADS[name][0]], directory, args.scale, args.ops, args.warmup, args.seed))
+
+    report(f'Workloads at scale {args.scale}, seed {args.seed}, {args.ops:,} ops each:', [
+        (name, f"{stats['throughput']:9.1f} ops/s   p50 {stats['p50_ms']:7.2f} ms   "
+               f"p99 {stats['p99_ms']:7.2f} ms   peak RSS {stats['peak_rss_mb']:6.1f} MB")
+        for name, stats in results['workloads'].items()])
+    if args.compare:
+        with open(args.compare) as baseline:
+            report(f'Change against {args.compare}:', compare(results, json.load(baseline)))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
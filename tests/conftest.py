@@ -0,0 +1,27 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import ORMEngine  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def dispose_engines():
+    # Engines are cached per URI; every test gets its own database
+    yield
+    ORMEngine.dispose_all()
+
+
+
+@pytest.fixture
+def bundled(tmp_path):
+    """Copy a bundled example database, which predates every schema change, and return its URI."""
+    def copy(name):
+        return 'sqlite:///' + shutil.copy(os.path.join(ROOT, name), tmp_path)
+    return copy
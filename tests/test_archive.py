@@ -0,0 +1,90 @@
+import datetime
+import os
+
+import pytest
+from sqlalchemy import func, select, update
+
+import ORMArchive
+import ORMDataGen
+import ORMGrading
+import ORMJobBoardDb as jobboard
+import ORMQuizDb as quiz
+import ORMTravelBookingDb as travel
+
+CUTOFF = datetime.datetime(2024, 2, 1)
+SCHEMAS = {'jobboard': (jobboard, jobboard.JobInteraction), 'travel': (travel, travel.AdminLog),
+           'quiz': (quiz, quiz.Answer)}
+
+
+@pytest.fixture
+def generated(tmp_path):
+    def generate(schema):
+        module, model = SCHEMAS[schema]
+        engine = module.get_engine('sqlite:///' + str(tmp_path / f'{schema}.db'))
+        ORMDataGen.generate(schema, engine, scale=0.02)
+        if model is quiz.Answer:
+            # Answers are stamped as they load; send every other one of each submission back to January
+            with engine.begin() as connection:
+                connection.execute(update(quiz.Answer).where(quiz.Answer.answer_id % 2 == 1)
+                                   .values(submitted_At=datetime.datetime(2024, 1, 15)))
+        return engine, model
+    return generate
+
+
+def rows(connection, table):
+    return sorted(tuple(row) for row in connection.execute(select(table)))
+
+
+@pytest.mark.parametrize('schema', sorted(SCHEMAS))
+def test_archived_month_reads_back(generated, schema):
+    engine, model = generated(schema)
+    table = model.__table__
+    column = table.c[table.info['archive_by']]
+    with engine.connect() as connection:
+        before = rows(connection, table)
+        january = connection.scalar(select(func.count()).where(column < CUTOFF))
+    assert january
+
+    assert ORMArchive.archive(engine, model, CUTOFF, batch_size=100) == {'2024-01': january}
+    assert ORMArchive.months(engine) == ['2024-01']
+    assert os.path.exists(ORMArchive.archive_path(engine.url.database, '2024-01'))
+    assert ORMArchive.archive(engine, model, CUTOFF) == {}
+
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(table)) == len(before) - january
+        with ORMArchive.including_archives(connection, model) as everything:
+            assert rows(connection, everything) == before
+        with ORMArchive.including_archives(connection, model, until=CUTOFF) as archived:
+            assert connection.scalar(select(func.count()).select_from(archived)) == january
+        assert sorted(tuple(row) for row in ORMArchive.scan(connection, model)) == before
+        assert sum(1 for _ in ORMArchive.scan(connection, model, since=CUTOFF)) == len(before) - january
+
+
+def test_grading_reads_archived_answers(generated):
+    engine, _ = generated('quiz')
+    with engine.begin() as connection:
+        ORMGrading.grade(connection)
+        graded = rows(connection, quiz.Result.__table__)
+    ORMArchive.archive(engine, quiz.Answer, CUTOFF)
+
+    with engine.begin() as connection:
+        assert ORMGrading.check_grades(connection) == []
+        assert ORMGrading.grade(connection) == 0
+    with engine.connect() as connection:
+        assert rows(connection, quiz.Result.__table__) == graded
+        # A corrected answer key regrades whole submissions, archived answers included
+        connection.execute(update(quiz.Option).where(quiz.Option.question_id == 1)
+                           .values(is_correct=~quiz.Option.is_correct))
+        connection.commit()
+        assert ORMGrading.check_grades(connection, [1])
+        assert ORMGrading.grade(connection, [1])
+        connection.commit()
+        assert ORMGrading.check_grades(connection) == []
+
+
+def test_in_memory_databases_grade_without_archives():
+    engine = quiz.get_engine('sqlite://')
+    ORMDataGen.generate('quiz', engine, scale=0.01)
+    with engine.begin() as connection:
+        assert ORMGrading.grade(connection)
+        assert ORMGrading.check_grades(connection) == []
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, insert, select, text
+
+import ORMAsync
+import ORMCli
+import ORMQuizDb as quiz
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await ORMAsync.dispose_all()
+    return asyncio.run(main())
+
+
+def users(count):
+    return [dict(user_id=n, name=f'User {n}', email=f'{n}@example.com', password='x', role='student')
+            for n in range(1, count + 1)]
+
+
+def test_async_uri_switches_to_aiosqlite():
+    assert ORMAsync.async_uri('sqlite:///quiz.db') == 'sqlite+aiosqlite:///quiz.db'
+    assert ORMAsync.async_uri('sqlite+aiosqlite:///quiz.db') == 'sqlite+aiosqlite:///quiz.db'
+
+
+def test_engine_applies_the_pragma_profile_and_syncs_the_schema(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'quiz.db')
+
+    async def round_trip():
+        engine = await ORMAsync.get_async_engine(uri, quiz.Base.metadata)
+        assert engine is await ORMAsync.get_async_engine(uri)
+        async with engine.begin() as connection:
+            await connection.execute(insert(quiz.User), users(2))
+        async with engine.connect() as connection:
+            pragmas = [await connection.scalar(text(f'PRAGMA {name}'))
+                       for name in ('journal_mode', 'synchronous', 'busy_timeout')]
+            names = (await connection.execute(select(quiz.User.name).order_by(quiz.User.user_id))).scalars().all()
+        return pragmas, names
+
+    assert run(round_trip()) == (['wal', 1, 5000], ['User 1', 'User 2'])
+
+
+def test_memory_engine_shares_one_connection():
+    async def round_trip():
+        engine = await ORMAsync.get_async_engine('sqlite://', quiz.Base.metadata)
+        async with engine.begin() as connection:
+            await connection.execute(insert(quiz.User), users(1))
+        async with engine.connect() as connection:
+            return await connection.scalar(text('PRAGMA journal_mode')), await connection.scalar(select(quiz.User.name))
+
+    assert run(round_trip()) == ('memory', 'User 1')
+
+
+@pytest.mark.parametrize('name', sorted(ORMCli.SCHEMAS))
+def test_sessionmaker_seeds_and_reads_back(tmp_path, name):
+    module = ORMCli.load_schema(name)
+    uri = 'sqlite:///' + str(tmp_path / f'{name}.db')
+
+    async def round_trip():
+        factory = await ORMAsync.get_async_sessionmaker(module, uri)
+        assert factory is await ORMAsync.get_async_sessionmaker(module, uri)
+        async with factory() as session:
+            await ORMAsync.seed(module, session)
+        async with factory() as session:
+            journal_mode = await session.scalar(text('PRAGMA journal_mode'))
+            counts = [await session.scalar(select(func.count()).select_from(table))
+                      for table in module.Base.metadata.sorted_tables]
+        return journal_mode, counts
+
+    journal_mode, counts = run(round_trip())
+    assert journal_mode == 'wal'
+    assert sum(counts) > 0
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import event, func, select, text
+
+import ORMBulkLoad
+import ORMCli
+import ORMDataGen
+import ORMEcommerceDb as ecommerce
+import ORMQuizDb as quiz
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return quiz.get_engine('sqlite:///' + str(tmp_path / 'quiz.db'))
+
+
+def users(count, role='student'):
+    return [dict(user_id=n, name=f'User {n}', email=f'{n}@example.com', password='x', role=role)
+            for n in range(1, count + 1)]
+
+
+def test_bulk_load_counts_rows_per_table(engine):
+    counts = ORMBulkLoad.bulk_load(engine, {
+        quiz.Quiz: [dict(quiz_id=1, title='Quiz', quiz_code='Q1', teacher_id=1)],
+        quiz.User: iter(users(1234)),
+    }, batch_size=100)
+    assert counts == {'user': 1234, 'quiz': 1}
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(quiz.User)) == 1234
+
+
+def test_upsert_is_idempotent(engine):
+    assert ORMBulkLoad.upsert(engine, {quiz.User: users(10)}) == {'user': 10}
+    assert ORMBulkLoad.upsert(engine, {quiz.User: users(10)}) == {'user': 0}
+    assert ORMBulkLoad.upsert(engine, {quiz.User: users(10, role='teacher')[:3]}) == {'user': 3}
+    with engine.connect() as connection:
+        roles = connection.execute(select(quiz.User.role, func.count()).group_by(quiz.User.role)).all()
+        assert sorted(roles) == [('student', 7), ('teacher', 3)]
+
+
+@pytest.mark.parametrize('name', sorted(ORMCli.SCHEMAS))
+def test_reseeding_writes_nothing(tmp_path, name):
+    module = ORMCli.load_schema(name)
+    uri = 'sqlite:///' + str(tmp_path / f'{name}.db')
+    written = []
+
+    def listener(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT'):
+            written.append(cursor.rowcount)
+
+    with module.get_session(uri) as session:
+        module.seed(session)
+    event.listen(module.get_engine(uri), 'after_cursor_execute', listener)
+    with module.get_session(uri) as session:
+        module.seed(session)
+    assert written and sum(written) == 0
+
+
+def test_generated_orders_total_their_items(tmp_path):
+    engine = ecommerce.get_engine('sqlite:///' + str(tmp_path / 'ecommerce.db'))
+    counts = ORMDataGen.generate('ecommerce', engine, scale=0.02)
+    assert counts['orders'] == 200 and counts['order_items'] >= 200
+    with engine.connect() as connection:
+        # Both columns hold whole cents, so the totals compare exactly
+        mismatched = connection.scalar(text(
+            'SELECT count(*) FROM orders WHERE total_amount != '
+            '(SELECT sum(quantity * price) FROM order_items WHERE order_items.order_id = orders.order_id)'))
+        assert mismatched == 0
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import select
+
+import ORMBulkLoad
+import ORMCache
+import ORMEcommerceDb as ecommerce
+
+Product = ecommerce.Product
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'ecommerce.db')
+    ORMBulkLoad.bulk_load(ecommerce.get_engine(uri), {
+        Product: [dict(product_id=n, name=f'Product {n}', price=n, sku=f'SKU{n}') for n in range(1, 11)]})
+    return ecommerce.get_sessionmaker(uri)
+
+
+def test_repeated_select_is_served_from_the_cache(session_factory):
+    cache = ORMCache.QueryCache()
+    cache.attach(session_factory, cache_all=True)
+    with session_factory() as session:
+        first = session.scalars(select(Product.name).where(Product.product_id == 1)).all()
+        assert session.scalars(select(Product.name).where(Product.product_id == 1)).all() == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_are_keyed_on_parameter_values(session_factory):
+    cache = ORMCache.QueryCache()
+    cache.attach(session_factory, cache_all=True)
+    with session_factory() as session:
+        for ids in ([1, 2], [3], [1, 2]):
+            statement = select(Product.product_id).where(Product.product_id.in_(ids)).order_by(Product.product_id)
+            assert session.scalars(statement).all() == ids
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_flushed_write_invalidates(session_factory):
+    cache = ORMCache.QueryCache()
+    cache.attach(session_factory, cache_all=True)
+    with session_factory() as session:
+        statement = select(Product.name).where(Product.product_id == 1)
+        assert session.scalars(statement).all() == ['Product 1']
+        session.get(Product, 1).name = 'Renamed'
+        session.commit()
+        assert session.scalars(statement).all() == ['Renamed']
+    assert cache.invalidations == 1
+
+
+def test_side_table_is_bounded_by_maxsize(session_factory):
+    cache = ORMCache.QueryCache(maxsize=4)
+    cache.attach(session_factory, cache_all=True)
+    with session_factory() as session:
+        for n in range(1, 30):
+            # A different statement each time, not just different parameters
+            session.scalars(select(Product.name).where(*(Product.product_id != k for k in range(n)))).all()
+    assert cache.stats()['size'] <= 4
+    assert len(cache._statements) <= 4
@@ -0,0 +1,47 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+import ORMBulkLoad
+import ORMExport
+import ORMTravelBookingDb as travel
+
+
+def tours(count):
+    return [dict(tour_id=n, tour_name=f'Tour {n}', description=None if n % 7 == 0 else f'Tour, "{n}"\nby the sea',
+                 price=Decimal(n * 1234) / 100, start_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=n),
+                 seats_available=n % 30, avg_rating=None, created_at=datetime.datetime(2024, 1, 1, 12, n % 60),
+                 updated_at=datetime.datetime(2024, 2, 1), deleted_at=None)
+            for n in range(1, count + 1)]
+
+
+def rows(uri):
+    with travel.get_engine(uri).connect() as connection:
+        return connection.execute(select(travel.Tour).order_by(travel.Tour.tour_id)).all()
+
+
+@pytest.fixture
+def source(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'source.db')
+    ORMBulkLoad.bulk_load(travel.get_engine(uri), {travel.Tour: tours(250)})
+    return uri
+
+
+@pytest.mark.parametrize('format', ['csv', 'jsonl'])
+def test_export_import_round_trip(tmp_path, source, format):
+    shards = ORMExport.export_table(source, travel.Tour, str(tmp_path / format), format, processes=2, shards=5)
+    assert sum(count for _, count in shards) == 250
+    target = 'sqlite:///' + str(tmp_path / f'target-{format}.db')
+    engine = travel.get_engine(target)
+    paths = [path for path, _ in shards]
+    assert ORMExport.import_files(engine, travel.Tour, paths, processes=2) == 250
+    assert rows(target) == rows(source)
+    assert ORMExport.import_files(engine, travel.Tour, paths, processes=2, upsert=True) == 0
+    assert rows(target) == rows(source)
+
+
+def test_unknown_format_is_rejected(tmp_path, source):
+    with pytest.raises(ValueError):
+        ORMExport.export_table(source, travel.Tour, str(tmp_path), 'xml')
@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+import ORMBulkLoad
+import ORMGrading
+import ORMQuizDb as quiz
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = quiz.get_engine('sqlite:///' + str(tmp_path / 'quiz.db'))
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.User: [dict(user_id=n, name=f'User {n}', email=f'{n}@example.com', password='x', role='student')
+                    for n in (1, 2)],
+        quiz.Quiz: [dict(quiz_id=1, title='Quiz', quiz_code='Q1')],
+        quiz.Question: [dict(question_id=q, quiz_id=1, question_text='?', question_type='MCQ') for q in (1, 2, 3)],
+        quiz.Option: [dict(option_id=q * 10 + n, question_id=q, option_text=f'{q}{n}', is_correct=n == 0)
+                      for q in (1, 2, 3) for n in range(2)],
+        quiz.Answer: [
+            dict(question_id=1, student_id=1, answer_text='10'),
+            dict(question_id=2, student_id=1, answer_text=' 20 '),
+            dict(question_id=3, student_id=1, answer_text='31'),
+            dict(question_id=1, student_id=2, answer_text='11'),
+            # Orphaned by a deleted user
+            dict(question_id=1, student_id=None, answer_text='10'),
+        ],
+    })
+    return engine
+
+
+def test_grade_scores_each_student(engine):
+    with engine.begin() as connection:
+        assert ORMGrading.grade(connection) == 2
+        scores = dict(connection.execute(select(quiz.Result.student_id, quiz.Result.score)).all())
+    assert scores == {1: Decimal('66.67'), 2: Decimal('0.00')}
+
+
+def test_regrading_is_a_no_op(engine):
+    with engine.begin() as connection:
+        ORMGrading.grade(connection)
+        assert ORMGrading.grade(connection) == 0
+        assert ORMGrading.check_grades(connection) == []
+
+
+def test_answers_without_a_student_are_not_graded(engine):
+    with engine.begin() as connection:
+        for _ in range(3):
+            ORMGrading.grade(connection)
+        assert connection.scalar(select(func.count()).where(quiz.Result.student_id.is_(None))) == 0
+        assert connection.scalar(select(func.count()).select_from(quiz.Result)) == 2
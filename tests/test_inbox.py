@@ -0,0 +1,118 @@
+import datetime
+import random
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+import ORMBulkLoad
+import ORMInbox
+import ORMSoftDelete
+import ORMJobBoardDb as jobboard
+
+EPOCH = datetime.datetime(2024, 1, 1)
+USERS = 8
+
+Message = jobboard.Message
+
+
+def messages(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        sender = rng.randint(1, USERS) if i % 25 else None
+        yield dict(message_id=i, sender_id=sender, recipient_id=rng.randint(1, USERS), message='hello',
+                   is_read=rng.random() < 0.6, message_type='TEXT', send_at=EPOCH + datetime.timedelta(minutes=i),
+                   deleted_at=None)
+
+
+@pytest.fixture
+def uri(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'jobboard.db')
+    ORMBulkLoad.bulk_load(jobboard.get_engine(uri), {
+        jobboard.User: [dict(user_id=i, name=f'user{i}') for i in range(1, USERS + 1)],
+        Message: messages(400),
+    })
+    return uri
+
+
+def check(uri):
+    with jobboard.get_engine(uri).connect() as connection:
+        return ORMInbox.check_inbox(connection, Message)
+
+
+def test_existing_messages_are_backfilled(bundled):
+    engine = jobboard.get_engine(bundled('ORMJobBoardDb.Db'))
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(jobboard.Conversation))
+        assert not ORMInbox.check_inbox(connection, Message)
+
+
+def test_inserts_keep_the_summaries(uri):
+    assert not check(uri)
+    with jobboard.get_session(uri) as session:
+        for user_id in range(1, USERS + 1):
+            unread = session.scalar(select(func.count()).select_from(Message).where(
+                Message.recipient_id == user_id, Message.is_read == False, Message.deleted_at.is_(None)))
+            assert ORMInbox.unread_count(session, Message, user_id) == unread
+        listed = ORMInbox.conversations(session, Message, 1)
+        assert [row.last_send_at for row in listed] == sorted((row.last_send_at for row in listed), reverse=True)
+
+
+def test_marking_a_conversation_read(uri):
+    with jobboard.get_session(uri) as session:
+        (peer_id, _, _, unread), = [row for row in ORMInbox.conversations(session, Message, 1) if row.unread][:1]
+        before = ORMInbox.unread_count(session, Message, 1)
+        assert ORMInbox.mark_conversation_read(session, Message, 1, peer_id) == unread
+        session.commit()
+        assert ORMInbox.unread_count(session, Message, 1) == before - unread
+        assert ORMInbox.mark_conversation_read(session, Message, 1, peer_id) == 0
+    assert not check(uri)
+
+
+def test_soft_deletes_and_restores(uri):
+    with jobboard.get_session(uri) as session:
+        ORMSoftDelete.soft_delete(session, Message, Message.message_id % 3 == 0)
+        session.commit()
+        assert not check(uri)
+        # A conversation whose messages are all deleted keeps its row but is not listed
+        ORMSoftDelete.soft_delete(session, Message, Message.sender_id.in_((1, 2)), Message.recipient_id.in_((1, 2)))
+        session.commit()
+        assert not check(uri)
+        assert 2 not in [row.peer_id for row in ORMInbox.conversations(session, Message, 1)]
+        ORMSoftDelete.restore(session, Message, Message.message_id % 2 == 0)
+        session.commit()
+    assert not check(uri)
+
+
+def test_hard_deletes(uri):
+    with jobboard.get_session(uri) as session:
+        ORMSoftDelete.soft_delete(session, Message, Message.message_id % 5 == 0)
+        session.commit()
+        # Live and already soft-deleted messages alike
+        session.execute(delete(Message).where(Message.message_id % 4 == 0))
+        session.commit()
+    assert not check(uri)
+
+
+def test_readdressed_messages_move_between_conversations(uri):
+    with jobboard.get_session(uri) as session:
+        session.execute(update(Message).where(Message.message_id % 7 == 0)
+                        .values(recipient_id=(Message.recipient_id % USERS) + 1))
+        session.execute(update(Message).where(Message.message_id % 11 == 0).values(sender_id=None))
+        session.execute(update(Message).where(Message.message_id % 25 == 0).values(sender_id=3))
+        session.execute(update(Message).where(Message.message_id % 13 == 0)
+                        .values(send_at=EPOCH - datetime.timedelta(days=1)))
+        session.commit()
+    assert not check(uri)
+
+
+def test_rebuild_repairs_drift(uri):
+    engine = jobboard.get_engine(uri)
+    with engine.begin() as connection:
+        connection.execute(update(jobboard.InboxCounter).values(unread=jobboard.InboxCounter.unread + 1))
+        connection.execute(delete(jobboard.Conversation).where(jobboard.Conversation.user_id == 1))
+    drifted = check(uri)
+    assert {table for table, *_ in drifted} == {'inbox_counter', 'conversation'}
+    assert {key for table, key, *_ in drifted if table == 'inbox_counter'} == set(range(1, USERS + 1))
+    with engine.begin() as connection:
+        ORMInbox.rebuild_inbox(connection, Message)
+    assert not check(uri)
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+
+import ORMInstrumentation
+import ORMQuizDb as quiz
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    quiz.Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(quiz.User.__table__.insert(), [
+            dict(user_id=n, name=f'User {n}', email=f'{n}@example.com', password='x', role='student')
+            for n in range(1, 6)])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def instrumentation(engine):
+    instrumentation = ORMInstrumentation.Instrumentation(explain_slow=False).attach(engine, sessions=None)
+    yield instrumentation
+    instrumentation.detach()
+
+
+def test_statements_are_grouped_with_their_rows(engine, instrumentation):
+    with engine.connect() as connection:
+        for n in (1, 2, 3):
+            connection.exec_driver_sql(f'SELECT name FROM user WHERE user_id <= {n}').all()
+    stats = instrumentation.as_dict()['statements']['SELECT name FROM user WHERE user_id <= ?']
+    assert (stats['count'], stats['rows'], stats['slow']) == (3, 6, 0)
+    assert stats['buckets'][float('inf')] == 3
+
+
+def test_failed_statements_leave_nothing_behind(engine, instrumentation):
+    with engine.connect() as connection:
+        info = dict(connection.info)
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql('SELECT missing FROM user')
+        assert connection.info == info
+        with instrumentation.request('after errors') as scope:
+            assert connection.execute(select(quiz.User.name).where(quiz.User.user_id == 1)).scalar() == 'User 1'
+    assert scope['queries'] == 1 and scope['rows'] == 1
+    assert instrumentation.as_dict()['queries'] == 1
+
+
+def test_slow_statements_are_logged(engine, caplog):
+    instrumentation = ORMInstrumentation.Instrumentation(slow_threshold=0).attach(engine, sessions=None)
+    try:
+        with caplog.at_level('WARNING', logger=ORMInstrumentation.logger.name), engine.connect() as connection:
+            connection.execute(select(quiz.User.name).where(quiz.User.name == 'User 2')).all()
+    finally:
+        instrumentation.detach()
+    message, = (record.getMessage() for record in caplog.records)
+    assert message.startswith('slow query') and 'SCAN user' in message
+
+
+def test_detached_instrumentation_records_nothing(engine, instrumentation):
+    instrumentation.detach()
+    with engine.connect() as connection:
+        connection.execute(select(quiz.User.name)).all()
+    assert instrumentation.as_dict()['queries'] == 0
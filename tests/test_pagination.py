@@ -0,0 +1,100 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+import ORMBulkLoad
+import ORMEcommerceDb as ecommerce
+import ORMJobBoardDb as jobboard
+import ORMPagination
+import ORMSoftDelete
+
+
+@pytest.fixture
+def session(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'shop.db')
+    ORMBulkLoad.bulk_load(ecommerce.get_engine(uri), {
+        # Few distinct prices, so pages split runs of equal sort values
+        ecommerce.Product: [dict(product_id=n, name=f'Product {n}', price=Decimal(n % 4), sku=f'SKU{n}',
+                                 category='books' if n % 5 else 'games') for n in range(1, 101)],
+    })
+    with ecommerce.get_session(uri) as session:
+        yield session
+
+
+def expected(category):
+    ids = [n for n in range(1, 101) if (n % 5 != 0) == (category == 'books')]
+    return sorted(ids, key=lambda n: (n % 4, n))
+
+
+def pages(session, category, page_size):
+    result, cursor = [], None
+    while True:
+        page = ORMPagination.products(session, category, cursor, page_size)
+        result.append([item.product_id for item in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            return result
+
+
+@pytest.mark.parametrize('page_size', [1, 7, 20, 80, 100])
+def test_pages_cover_every_row_once_in_order(session, page_size):
+    walked = pages(session, 'books', page_size)
+    assert [n for page in walked for n in page] == expected('books')
+    assert all(len(page) == page_size for page in walked[:-1]) and 0 < len(walked[-1]) <= page_size
+
+
+def test_previous_cursor_returns_the_page_before(session):
+    first = ORMPagination.products(session, 'books', page_size=7)
+    assert first.previous_cursor is None
+    second = ORMPagination.products(session, 'books', first.next_cursor, 7)
+    third = ORMPagination.products(session, 'books', second.next_cursor, 7)
+    back = ORMPagination.products(session, 'books', third.previous_cursor, 7)
+    assert [item.product_id for item in back.items] == [item.product_id for item in second.items]
+    back = ORMPagination.products(session, 'books', back.previous_cursor, 7)
+    assert [item.product_id for item in back.items] == [item.product_id for item in first.items]
+    assert back.previous_cursor is None
+
+
+def test_walking_back_from_the_last_page_retraces_every_page(session):
+    walked, page = [], ORMPagination.products(session, 'books', page_size=9)
+    while page.next_cursor is not None:
+        walked.append([item.product_id for item in page.items])
+        page = ORMPagination.products(session, 'books', page.next_cursor, 9)
+    walked.append([item.product_id for item in page.items])
+    retraced = [[item.product_id for item in page.items]]
+    while page.previous_cursor is not None:
+        page = ORMPagination.products(session, 'books', page.previous_cursor, 9)
+        retraced.append([item.product_id for item in page.items])
+    assert retraced[::-1] == walked
+
+
+def test_where_limits_the_pages(session):
+    assert [n for page in pages(session, 'games', 6) for n in page] == expected('games')
+    assert ORMPagination.products(session, 'toys').items == []
+
+
+def test_malformed_cursor_is_rejected(session):
+    with pytest.raises(ORMPagination.InvalidCursor):
+        ORMPagination.products(session, 'books', 'not a cursor')
+    with pytest.raises(ORMPagination.InvalidCursor):
+        ORMPagination.products(session, 'books', ORMPagination.encode_cursor([1]))
+
+
+def test_descending_pages_skip_soft_deleted_rows(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'jobs.db')
+    start = datetime.datetime(2024, 1, 1)
+    ORMBulkLoad.bulk_load(jobboard.get_engine(uri), {
+        jobboard.JobPosting: [dict(job_id=n, job_title=f'Job {n}', created_at=start + datetime.timedelta(days=n // 3))
+                              for n in range(1, 31)],
+    })
+    with jobboard.get_session(uri) as session:
+        ORMSoftDelete.soft_delete(session, jobboard.JobPosting, jobboard.JobPosting.job_id % 10 == 0)
+        session.commit()
+        walked, cursor = [], None
+        while True:
+            page = ORMPagination.job_postings(session, cursor, page_size=4)
+            walked += [item.job_id for item in page.items]
+            if (cursor := page.next_cursor) is None:
+                break
+    assert walked == sorted((n for n in range(1, 31) if n % 10), key=lambda n: (n // 3, n), reverse=True)
@@ -0,0 +1,19 @@
+import pytest
+
+import ORMQueryPlans
+import ORMTravelBookingDb as travel
+
+
+@pytest.mark.parametrize('module', list(ORMQueryPlans.HOT_QUERIES), ids=lambda module: module.__name__)
+def test_hot_queries_use_their_indexes(module):
+    assert ORMQueryPlans.check_query_plans([module.__name__]) == []
+
+
+def test_undeclared_index_is_reported(monkeypatch):
+    table = travel.Booking.__table__
+    dropped, = (index for index in table.indexes if index.name == 'ix_bookings_user_date')
+    monkeypatch.setattr(table, 'indexes', table.indexes - {dropped})
+    failures = ORMQueryPlans.check_query_plans([travel.__name__])
+    assert [(schema, label) for schema, label, _, _ in failures] == [(travel.__name__, 'bookings of a user')]
+    _, _, plan, expected = failures[0]
+    assert expected == ('ix_bookings_user_date',) and any('SCAN' in step for step in plan)
@@ -0,0 +1,36 @@
+from sqlalchemy import delete, insert, select
+
+import ORMEcommerceDb as ecommerce
+import ORMEngine
+import ORMRatings
+import ORMTravelBookingDb as travel
+
+SCHEMAS = [(ecommerce, 'ORMEcommerceDb.db', ecommerce.Product), (travel, 'ORMTravelBookingDb.db', travel.Tour)]
+
+
+def test_upgrade_backfills_the_aggregates(bundled):
+    for module, name, target in SCHEMAS:
+        with module.get_engine(bundled(name)).begin() as connection:
+            assert connection.scalar(select(target.rating_count).order_by(target.rating_count.desc())) > 0
+            assert ORMRatings.check_ratings(connection, module.Review.__table__, target.__table__) == []
+
+
+def test_reviews_written_after_the_upgrade_keep_the_aggregates_exact(bundled):
+    engine = ecommerce.get_engine(bundled('ORMEcommerceDb.db'))
+    reviews, products = ecommerce.Review.__table__, ecommerce.Product.__table__
+    with engine.begin() as connection:
+        connection.execute(delete(reviews).where(reviews.c.product_id == 2))
+        connection.execute(insert(reviews).values(review_id=100, user_id=1, product_id=1, rating=1))
+        assert ORMRatings.check_ratings(connection, reviews, products) == []
+        assert connection.execute(select(products.c.rating_sum, products.c.rating_count)
+                                  .where(products.c.product_id == 2)).one() == (0, 0)
+
+
+def test_reopening_leaves_the_aggregates_as_they_are(bundled):
+    uri = bundled('ORMEcommerceDb.db')
+    products = ecommerce.Product.__table__
+    with ecommerce.get_engine(uri).begin() as connection:
+        before = connection.execute(select(products.c.rating_sum).order_by(products.c.product_id)).scalars().all()
+    ORMEngine.dispose_all()
+    with ecommerce.get_engine(uri).begin() as connection:
+        assert connection.execute(select(products.c.rating_sum).order_by(products.c.product_id)).scalars().all() == before
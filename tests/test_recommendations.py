@@ -0,0 +1,97 @@
+import time
+
+import pytest
+from sqlalchemy import func, select, update
+
+import ORMDataGen
+import ORMJobBoardDb as jobboard
+import ORMRecommendations
+
+K = 5
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = jobboard.get_engine('sqlite:///' + str(tmp_path / 'jobboard.db'))
+    ORMDataGen.generate('jobboard', engine, scale=0.02)
+    return engine
+
+
+def recommendations(engine):
+    with engine.connect() as connection:
+        return set(connection.execute(select(jobboard.Recommendation.__table__)).all())
+
+
+def refresh(engine, **kwargs):
+    with engine.begin() as connection:
+        return ORMRecommendations.refresh(connection, K, **kwargs)
+
+
+def add_interactions(engine, user_ids, job_id=1):
+    with engine.begin() as connection:
+        connection.execute(jobboard.JobInteraction.__table__.insert(), [
+            dict(user_id=user_id, job_id=job_id, interaction_type=1, is_applied=True) for user_id in user_ids])
+
+
+def test_parse_skills_keeps_first_spelling():
+    assert ORMRecommendations.parse_skills(' python, SQL,,Python ,  c++ ') == ['python', 'SQL', 'c++']
+    assert ORMRecommendations.parse_skills(None) == []
+
+
+def test_full_refresh_matches_scores(engine):
+    users = ORMDataGen.sizes('jobboard', 0.02)['users']
+    assert refresh(engine) == users
+    with engine.connect() as connection:
+        assert not ORMRecommendations.check_recommendations(connection, k=K)
+        per_user = connection.execute(select(func.count()).select_from(jobboard.Recommendation)
+                                      .group_by(jobboard.Recommendation.user_id)).scalars().all()
+        assert len(per_user) == users and set(per_user) == {K}
+        applied = connection.execute(
+            select(jobboard.Recommendation.user_id)
+            .join(jobboard.JobInteraction, (jobboard.JobInteraction.user_id == jobboard.Recommendation.user_id)
+                  & (jobboard.JobInteraction.job_id == jobboard.Recommendation.job_id))
+            .where(jobboard.JobInteraction.is_applied == True)).all()
+        assert applied == []
+    assert refresh(engine) == 0
+
+
+def test_incremental_refresh_recomputes_only_touched_users(engine):
+    refresh(engine)
+    before = recommendations(engine)
+    touched = [3, 7, 11]
+    for job_id in range(1, 6):
+        add_interactions(engine, touched, job_id)
+    with engine.connect() as connection:
+        assert {user_id for user_id, *_ in ORMRecommendations.check_recommendations(connection, k=K)} == set(touched)
+
+    assert refresh(engine) == len(touched)
+    after = recommendations(engine)
+    with engine.connect() as connection:
+        assert not ORMRecommendations.check_recommendations(connection, k=K)
+    assert {row for row in before if row.user_id not in touched} == {row for row in after if row.user_id not in touched}
+    assert all(row.job_id not in range(1, 6) for row in after if row.user_id in touched)
+    assert refresh(engine) == 0
+
+
+def test_edited_skills_are_resynced(engine):
+    refresh(engine)
+    time.sleep(0.002)
+    with engine.begin() as connection:
+        connection.execute(update(jobboard.User).where(jobboard.User.user_id == 2).values(skills='Haskell, Python'))
+    assert refresh(engine) == 1
+    with engine.connect() as connection:
+        names = connection.scalars(select(jobboard.Skill.name).join(jobboard.UserSkill)
+                                   .where(jobboard.UserSkill.user_id == 2).order_by(jobboard.Skill.name)).all()
+        assert names == ['Haskell', 'Python']
+        assert not ORMRecommendations.check_recommendations(connection, k=K)
+
+
+def test_recommended_jobs_are_served_best_first(engine):
+    refresh(engine)
+    with engine.connect() as connection:
+        ranked = connection.scalars(select(jobboard.Recommendation.job_id)
+                                    .where(jobboard.Recommendation.user_id == 1)
+                                    .order_by(jobboard.Recommendation.rank)).all()
+    with jobboard.get_session(engine.url.render_as_string(hide_password=False)) as session:
+        jobs = ORMRecommendations.recommended_jobs(session, 1, limit=3)
+        assert [job.job_id for job in jobs] == ranked[:3]
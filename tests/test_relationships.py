@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import InvalidRequestError
+
+import ORMBulkLoad
+import ORMLoading
+import ORMQuizDb as quiz
+
+
+def load_quizzes(engine, count):
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.User: [dict(user_id=1, name='Teacher', email='t@example.com', password='x', role='teacher'),
+                    dict(user_id=2, name='Student', email='s@example.com', password='x', role='student')],
+        quiz.Quiz: [dict(quiz_id=q, title=f'Quiz {q}', quiz_code=f'Q{q}', teacher_id=1) for q in range(1, count + 1)],
+        quiz.Question: [dict(question_id=q * 10 + n, quiz_id=q, question_text='?', question_type='MCQ')
+                        for q in range(1, count + 1) for n in range(3)],
+        quiz.Option: [dict(option_id=(q * 10 + n) * 10 + o, question_id=q * 10 + n, option_text=str(o),
+                           is_correct=o == 0) for q in range(1, count + 1) for n in range(3) for o in range(4)],
+    })
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return quiz.get_engine('sqlite:///' + str(tmp_path / 'quiz.db'))
+
+
+def statements(engine, count, strategy):
+    executed = []
+
+    def listener(connection, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        with quiz.get_sessionmaker(str(engine.url))() as session:
+            statement = ORMLoading.with_loading(select(quiz.Quiz), strategy,
+                                                (quiz.Quiz.questions, quiz.Question.options))
+            quizzes = session.scalars(statement).unique().all()
+            options = sum(len(question.options) for item in quizzes for question in item.questions)
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    assert len(quizzes) == count and options == count * 12
+    return len(executed)
+
+
+@pytest.mark.parametrize('strategy', ['joined', 'subquery'])
+def test_eager_loading_takes_a_constant_number_of_statements(engine, strategy):
+    load_quizzes(engine, 1000)
+    assert statements(engine, 1000, strategy) <= 3
+
+
+def test_selectin_loading_takes_one_statement_per_batch(engine):
+    load_quizzes(engine, 1000)
+    # 1,000 quizzes, then 1,000 parents of questions and 3,000 of options, 500 per IN
+    assert statements(engine, 1000, 'selectin') == 1 + 2 + 6
+
+
+def test_lazy_loading_issues_a_statement_per_parent(engine):
+    load_quizzes(engine, 20)
+    assert statements(engine, 20, 'lazy') > 20
+
+
+def test_raiseload_refuses_lazy_loads(engine):
+    load_quizzes(engine, 1)
+    with quiz.get_sessionmaker(str(engine.url))() as session:
+        item = session.scalars(ORMLoading.with_loading(select(quiz.Quiz), 'raise', quiz.Quiz.questions)).one()
+        with pytest.raises(InvalidRequestError):
+            item.questions
+
+
+def test_deleting_a_parent_leaves_its_children_alone(engine):
+    load_quizzes(engine, 1)
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.Answer: [dict(answer_id=1, question_id=10, student_id=2, answer_text='0')],
+        quiz.Result: [dict(result_id=1, quiz_id=1, student_id=2, score=100)],
+    })
+    with quiz.get_sessionmaker(str(engine.url))() as session:
+        student = session.get(quiz.User, 2)
+        assert len(student.answers) == 1  # loaded children are not nulled out either
+        session.delete(student)
+        session.delete(session.get(quiz.User, 1))
+        session.commit()
+        assert session.scalar(select(func.count()).where(quiz.Answer.student_id == 2)) == 1
+        assert session.scalar(select(func.count()).where(quiz.Result.student_id == 2)) == 1
+        assert session.scalar(select(func.count()).where(quiz.Quiz.teacher_id == 1)) == 1
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from sqlalchemy import func, insert, select, update
+
+import ORMColumnar
+import ORMDataGen
+import ORMReports
+import ORMEcommerceDb as ecommerce
+import ORMTravelBookingDb as travel
+
+SCHEMAS = {'ecommerce': ecommerce, 'travel': travel}
+
+
+@pytest.fixture
+def generated(tmp_path):
+    def generate(schema):
+        engine = SCHEMAS[schema].get_engine('sqlite:///' + str(tmp_path / f'{schema}.db'))
+        ORMDataGen.generate(schema, engine, scale=0.05)
+        return engine, str(tmp_path / f'{schema}.columnar')
+    return generate
+
+
+@pytest.mark.parametrize('schema', sorted(ORMReports.REPORTS))
+def test_snapshot_reports_match_live_sql(generated, schema):
+    engine, directory = generated(schema)
+    with engine.connect() as connection:
+        exported = ORMReports.export(connection, schema, directory)
+        assert exported == {model.__table__.name: connection.scalar(select(func.count()).select_from(model))
+                            for model in ORMReports.TABLES[schema]}
+        assert not ORMReports.check_reports(connection, schema, directory)
+    for report, _ in ORMReports.REPORTS[schema].values():
+        assert report(directory)
+
+
+def test_incremental_export_picks_up_new_and_updated_bookings(generated):
+    engine, directory = generated('travel')
+    with engine.connect() as connection:
+        bookings = ORMReports.export(connection, 'travel', directory)['bookings']
+    with engine.begin() as connection:
+        connection.execute(insert(travel.Booking), [
+            {'booking_id': bookings + i, 'user_id': 1, 'tour_id': 1, 'seats_booked': 1, 'total_amount': 100,
+             'payment_status': 'SUCCESS'} for i in range(1, 11)])
+        connection.execute(update(travel.Booking).where(travel.Booking.booking_id <= 20)
+                           .values(payment_status='FAILED'))
+    with engine.connect() as connection:
+        assert ORMReports.check_reports(connection, 'travel', directory)
+        exported = ORMReports.export(connection, 'travel', directory)
+        assert 30 <= exported['bookings'] < bookings
+        assert not ORMReports.check_reports(connection, 'travel', directory)
+
+
+def test_order_status_changes_need_a_full_export(generated):
+    engine, directory = generated('ecommerce')
+    with engine.connect() as connection:
+        orders = ORMReports.export(connection, 'ecommerce', directory)['orders']
+    with engine.begin() as connection:
+        connection.execute(insert(ecommerce.Order), [
+            {'order_id': orders + i, 'user_id': 1, 'total_amount': 12.5, 'status': 'PENDING'} for i in range(1, 6)])
+    with engine.connect() as connection:
+        assert ORMReports.export(connection, 'ecommerce', directory) == {'orders': 5, 'order_items': 0}
+        assert not ORMReports.check_reports(connection, 'ecommerce', directory)
+    with engine.begin() as connection:
+        connection.execute(update(ecommerce.Order).where(ecommerce.Order.order_id <= 10).values(status='CANCELLED'))
+    with engine.connect() as connection:
+        ORMReports.export(connection, 'ecommerce', directory)
+        drifted = ORMReports.check_reports(connection, 'ecommerce', directory)
+        assert {name for name, _, _ in drifted} == {'revenue by status and day'}
+        ORMReports.export(connection, 'ecommerce', directory, full=True)
+        assert not ORMReports.check_reports(connection, 'ecommerce', directory)
+
+
+def test_export_errors(generated, tmp_path):
+    engine, directory = generated('ecommerce')
+    with engine.connect() as connection:
+        with pytest.raises(ValueError, match='not registered'):
+            ORMColumnar.export(connection, ecommerce.Product, directory)
+        with pytest.raises(ValueError, match='unknown format'):
+            ORMColumnar.export(connection, ecommerce.Order, directory, format='csv')
+    with pytest.raises(FileNotFoundError):
+        ORMColumnar.Snapshot(str(tmp_path / 'missing'), ecommerce.Order)
+
+
+def test_parquet_snapshots(generated):
+    pytest.importorskip('pyarrow')
+    engine, directory = generated('travel')
+    with engine.connect() as connection:
+        ORMReports.export(connection, 'travel', directory, format='parquet')
+        assert not ORMReports.check_reports(connection, 'travel', directory)
+
+
+def test_group_by_skips_null_values():
+    keys = np.array([2, 1, 2, 1, 2])
+    values = np.array([1.0, np.nan, 3.0, 4.0, np.nan])
+    (unique,), counts, sums = ORMColumnar.group_by([keys], values)
+    assert unique.tolist() == [1, 2] and counts.tolist() == [2, 3] and sums.tolist() == [4.0, 4.0]
+    (unique,), counts, sums = ORMColumnar.group_by([keys], where=keys == 2)
+    assert unique.tolist() == [2] and counts.tolist() == [3] and sums is None
@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+import ORMBulkLoad
+import ORMEngine
+import ORMEventManagementDb as events
+import ORMReservations
+import ORMTravelBookingDb as travel
+
+
+@pytest.fixture
+def uri(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'travel.db')
+    ORMBulkLoad.bulk_load(travel.get_engine(uri), {
+        travel.User: [dict(user_id=1, username='traveller')],
+        travel.Tour: [dict(tour_id=1, tour_name='Coast', seats_available=5),
+                      dict(tour_id=2, tour_name='Hills', seats_available=2)],
+    })
+    return uri
+
+
+def seats(uri):
+    with travel.get_engine(uri).connect() as connection:
+        return connection.execute(select(travel.Tour.seats_available).order_by(travel.Tour.tour_id)).scalars().all()
+
+
+def test_booking_takes_seats_and_records_it(uri):
+    engine = travel.get_engine(uri)
+    booking_id = ORMReservations.book_tour(engine, 1, 1, 3)
+    assert seats(uri) == [2, 2]
+    with engine.connect() as connection:
+        booked = connection.scalar(select(travel.Booking.seats_booked).where(travel.Booking.booking_id == booking_id))
+    assert booked == 3
+
+
+def test_overbooking_is_rejected_and_takes_nothing(uri):
+    engine = travel.get_engine(uri)
+    with pytest.raises(ORMReservations.InsufficientCapacity) as raised:
+        ORMReservations.reserve(engine, [ORMReservations.tour_seats(1, 4), ORMReservations.tour_seats(2, 3)])
+    assert raised.value.item.key == 2
+    assert seats(uri) == [5, 2]
+    # The same tour twice in one request counts against the capacity once
+    with pytest.raises(ORMReservations.InsufficientCapacity):
+        ORMReservations.reserve(engine, [ORMReservations.tour_seats(1, 3), ORMReservations.tour_seats(1, 3)])
+    assert seats(uri) == [5, 2]
+    with pytest.raises(ValueError):
+        ORMReservations.reserve(engine, [ORMReservations.tour_seats(1, 0)])
+
+
+def test_release_gives_seats_back(uri):
+    engine = travel.get_engine(uri)
+    ORMReservations.reserve(engine, [ORMReservations.tour_seats(1, 5), ORMReservations.tour_seats(2, 2)])
+    assert seats(uri) == [0, 0]
+    ORMReservations.release(engine, [ORMReservations.tour_seats(1, 2), ORMReservations.tour_seats(1, 1)])
+    assert seats(uri) == [3, 0]
+
+
+def test_release_waits_out_a_concurrent_writer(uri):
+    travel.get_engine(uri)
+    # No busy_timeout, so a locked database fails at once and only the retry helps
+    engine = ORMEngine.create_sqlite_engine(uri, pragmas=dict(ORMEngine.SQLITE_PRAGMAS, busy_timeout=0))
+    writer = sqlite3.connect(engine.url.database, check_same_thread=False, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    with pytest.raises(OperationalError, match='locked'):
+        ORMReservations.release(engine, [ORMReservations.tour_seats(1, 1)], retries=0)
+    threading.Timer(0.02, writer.execute, ['COMMIT']).start()
+    ORMReservations.release(engine, [ORMReservations.tour_seats(1, 1)])
+    writer.close()
+    engine.dispose()
+    assert seats(uri) == [6, 2]
+
+
+def test_a_seat_is_handed_out_once_per_event(tmp_path):
+    engine = events.get_engine('sqlite:///' + str(tmp_path / 'events.db'))
+    ORMBulkLoad.bulk_load(engine, {
+        events.Events: [dict(event_id=1, event_title='Gala'), dict(event_id=2, event_title='Fair')],
+        events.Invited: [dict(invitation_id=n, invitation_name=f'Guest {n}', event_id=1 if n < 3 else 2)
+                         for n in (1, 2, 3)],
+    })
+    ORMReservations.assign_seat(engine, 1, 'A1')
+    with pytest.raises(ORMReservations.SeatTaken, match='already taken'):
+        ORMReservations.assign_seat(engine, 2, 'A1')
+    with pytest.raises(ORMReservations.SeatTaken, match='already has a seat'):
+        ORMReservations.assign_seat(engine, 1, 'A2')
+    # Seat numbers are unique per event, not across events
+    ORMReservations.assign_seat(engine, 3, 'A1')
+    with engine.connect() as connection:
+        assigned = connection.execute(select(events.Invited.invitation_id, events.Invited.seat_number)).all()
+    assert sorted(assigned) == [(1, 'A1'), (2, None), (3, 'A1')]
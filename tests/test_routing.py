@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.exc import OperationalError
+
+import ORMRouting
+import ORMTravelBookingDb as travel
+
+
+@pytest.fixture
+def factory(tmp_path):
+    factory = ORMRouting.routing_sessionmaker('sqlite:///' + str(tmp_path / 'travel.db'), travel.Base.metadata)
+    yield factory
+    factory.kw['readers'].dispose()
+
+
+@pytest.fixture
+def routes(factory):
+    """Name of the engine each statement ran on, in order."""
+    primary, readers = factory.kw['bind'], factory.kw['readers'].engines
+    names = {primary: 'primary', **{engine: f'reader{n}' for n, engine in enumerate(readers)}}
+    executed = []
+    for engine, name in names.items():
+        event.listen(engine, 'before_cursor_execute', lambda *args, name=name: executed.append(name))
+    return executed
+
+
+def usernames(session):
+    return session.scalars(select(travel.User.username).order_by(travel.User.user_id)).all()
+
+
+def test_reads_go_to_one_reader_per_transaction(factory, routes):
+    with factory() as session:
+        usernames(session)
+        usernames(session)
+        session.commit()
+        usernames(session)
+    assert routes == ['reader0', 'reader0', 'reader1']
+
+
+def test_a_transaction_reads_its_own_writes_from_the_primary(factory, routes):
+    with factory() as session:
+        session.add(travel.User(user_id=1, username='new'))
+        session.flush()
+        assert usernames(session) == ['new']
+        session.commit()
+        assert usernames(session) == ['new']
+    assert set(routes[:-1]) == {'primary'} and routes[-1].startswith('reader')
+
+
+def test_using_overrides_the_route(factory, routes):
+    with factory() as session:
+        with session.using('primary'):
+            usernames(session)
+        with pytest.raises(ValueError):
+            with session.using('replica'):
+                pass
+    assert routes == ['primary']
+
+
+def test_readers_are_read_only(factory):
+    reader = factory.kw['readers'].engines[0]
+    with reader.connect() as connection:
+        assert connection.scalar(select(travel.User.user_id)) is None
+        with pytest.raises(OperationalError, match='readonly'):
+            connection.execute(travel.User.__table__.insert().values(user_id=1, username='new'))
+
+
+def test_without_readers_everything_goes_to_the_primary(tmp_path):
+    factory = ORMRouting.routing_sessionmaker('sqlite:///' + str(tmp_path / 'travel.db'), travel.Base.metadata,
+                                              readers=0)
+    with factory() as session:
+        assert session.get_bind(clause=select(travel.User)) is factory.kw['bind']
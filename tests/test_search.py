@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import delete, select, update
+
+import ORMEcommerceDb as ecommerce
+import ORMEventManagementDb as events
+import ORMSearch
+
+
+def integrity_check(connection, table):
+    fts = ORMSearch.fts_table_name(table)
+    connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('integrity-check')")
+
+
+def test_upgraded_database_is_indexed(bundled):
+    with ecommerce.get_sessionmaker(bundled('ORMEcommerceDb.db'))() as session:
+        assert [product.name for product in ORMSearch.search(session, ecommerce.Product, 'laptop')] == ['Laptop']
+
+
+def test_upgraded_database_takes_updates_and_deletes(bundled):
+    engine = ecommerce.get_engine(bundled('ORMEcommerceDb.db'))
+    products = ecommerce.Product.__table__
+    with engine.begin() as connection:
+        connection.execute(update(products).where(products.c.product_id == 1).values(name='Notebook', description='Office Notebook'))
+        connection.execute(delete(products).where(products.c.product_id == 2))
+        integrity_check(connection, products)
+    with ecommerce.get_sessionmaker(str(engine.url))() as session:
+        assert ORMSearch.search(session, ecommerce.Product, 'laptop') == []
+        assert [product.product_id for product in ORMSearch.search(session, ecommerce.Product, 'notebook')] == [1]
+        assert ORMSearch.search(session, ecommerce.Product, 'smartphone') == []
+
+
+def test_event_delete_on_upgraded_database(bundled):
+    engine = events.get_engine(bundled('ORMEventManagementDb.db'))
+    table = events.Events.__table__
+    with engine.begin() as connection:
+        key = connection.scalar(select(table.c.event_id).limit(1))
+        connection.execute(delete(table).where(table.c.event_id == key))
+        integrity_check(connection, table)
+
+
+@pytest.mark.parametrize('terms, expected', [('', []), ('"', []), ('laptop*', ['Laptop']), ('gaming OR', [])])
+def test_free_text_ignores_fts_syntax(bundled, terms, expected):
+    with ecommerce.get_sessionmaker(bundled('ORMEcommerceDb.db'))() as session:
+        assert [product.name for product in ORMSearch.search(session, ecommerce.Product, terms)] == expected
@@ -0,0 +1,47 @@
+from sqlalchemy import func, select
+
+import ORMEngine
+import ORMSoftDelete
+import ORMTravelBookingDb as travel
+
+
+def live_users(uri):
+    with travel.get_session(uri) as session:
+        return session.scalars(select(travel.User.user_id).order_by(travel.User.user_id)).all()
+
+
+def reopen(uri):
+    ORMEngine.dispose_all()
+    return live_users(uri)
+
+
+def test_upgrade_clears_creation_time_stamps(bundled):
+    uri = bundled('ORMTravelBookingDb.db')
+    assert live_users(uri) == [1, 2, 3, 4, 5]
+    with travel.get_engine(uri).connect() as connection:
+        assert connection.scalar(select(func.count()).where(travel.User.deleted_at.is_not(None))) == 0
+
+
+def test_rows_deleted_right_after_insert_stay_deleted(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'travel.db')
+    with travel.get_session(uri) as session:
+        session.add_all([travel.User(user_id=1, username='kept'), travel.User(user_id=2, username='deleted')])
+        session.flush()
+        assert ORMSoftDelete.soft_delete(session, travel.User, travel.User.user_id == 2) == 1
+        session.commit()
+    assert live_users(uri) == [1]
+    assert reopen(uri) == [1]
+    assert reopen(uri) == [1]
+
+
+def test_upgraded_rows_deleted_later_stay_deleted(bundled):
+    uri = bundled('ORMTravelBookingDb.db')
+    with travel.get_session(uri) as session:
+        session.add(travel.User(user_id=6, username='new'))
+        session.flush()
+        ORMSoftDelete.soft_delete(session, travel.User, travel.User.user_id.in_([1, 6]))
+        session.commit()
+    assert reopen(uri) == [2, 3, 4, 5]
+    with travel.get_session(uri) as session:
+        statement = ORMSoftDelete.include_deleted(select(travel.User.user_id).order_by(travel.User.user_id))
+        assert session.scalars(statement).all() == [1, 2, 3, 4, 5, 6]
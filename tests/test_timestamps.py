@@ -0,0 +1,61 @@
+import datetime
+import time
+
+import pytest
+from sqlalchemy import select, update
+
+import ORMBulkLoad
+import ORMQuizDb as quiz
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = quiz.get_engine('sqlite:///' + str(tmp_path / 'quiz.db'))
+    ORMBulkLoad.bulk_load(engine, {
+        quiz.User: [dict(user_id=1, name='Student', email='s@example.com', password='x', role='student')],
+        quiz.Quiz: [dict(quiz_id=1, title='Quiz', quiz_code='Q1', teacher_id=1)],
+        quiz.Question: [dict(question_id=1, quiz_id=1, question_text='Q', question_type='MCQ')],
+    })
+    return engine
+
+
+def stamps(engine):
+    with engine.connect() as connection:
+        return connection.scalars(select(quiz.Answer.submitted_At).order_by(quiz.Answer.answer_id)).all()
+
+
+def test_batches_get_increasing_timestamps(engine):
+    for batch in range(3):
+        ORMBulkLoad.bulk_load(engine, {quiz.Answer: [dict(question_id=1, student_id=1, answer_text=str(batch))
+                                                     for _ in range(100)]})
+        time.sleep(0.01)
+    submitted = stamps(engine)
+    assert submitted == sorted(submitted)
+    assert submitted[0] < submitted[100] < submitted[200]
+
+
+def test_orm_insert_is_stamped_now(engine):
+    before = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    with quiz.get_sessionmaker(str(engine.url))() as session:
+        session.add(quiz.Answer(question_id=1, student_id=1, answer_text='x'))
+        session.commit()
+    submitted, = stamps(engine)
+    assert before - datetime.timedelta(seconds=1) <= submitted <= before + datetime.timedelta(minutes=1)
+
+
+def test_raw_insert_uses_the_server_default_in_the_same_format(engine):
+    with engine.begin() as connection:
+        connection.execute(quiz.Answer.__table__.insert().values(question_id=1, student_id=1, answer_text='orm'))
+        connection.exec_driver_sql("INSERT INTO answer (question_id, student_id, answer_text) VALUES (1, 1, 'raw')")
+        text = connection.exec_driver_sql('SELECT submitted_At FROM answer ORDER BY answer_id').scalars().all()
+    assert all(len(value) == len('2024-01-01 00:00:00.000000') for value in text)
+    assert text == sorted(text)
+
+
+def test_update_moves_updated_at(engine):
+    with engine.begin() as connection:
+        before = connection.scalar(select(quiz.User.updatedAt))
+        time.sleep(0.01)
+        connection.execute(update(quiz.User).values(name='Renamed'))
+        after = connection.scalar(select(quiz.User.updatedAt))
+    assert after > before
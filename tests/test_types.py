@@ -0,0 +1,121 @@
+import collections
+import datetime
+import math
+import sqlite3
+from decimal import ROUND_HALF_UP, Decimal
+
+import pytest
+from sqlalchemy import DECIMAL, Column, DateTime, Enum, Integer, MetaData, String, Table, create_engine, insert, select
+
+import ORMCli
+import ORMTypes
+import ORMTravelBookingDb as travel
+
+BUNDLED = {
+    'ecommerce': 'ORMEcommerceDb.db',
+    'jobboard': 'ORMJobBoardDb.Db',
+    'quiz': 'ORMQuizDb.sqlite',
+    'travel': 'ORMTravelBookingDb.db',
+}
+
+legacy = Table(
+    'payments', MetaData(),
+    Column('payment_id', Integer, primary_key=True),
+    Column('booking_id', Integer, nullable=False),
+    Column('payment_date', DateTime),
+    Column('amount', DECIMAL(10, 2)),
+    Column('payment_method', Enum('GCASH')),
+    Column('payment_status', Enum('SUCCESS', 'FAILED')),
+    Column('transaction_id', String(100)),
+)
+
+
+def converted(table):
+    return [column for column in table.columns if hasattr(column.type, 'migrate_sql')]
+
+
+def expected(column, value):
+    # What the migration should turn a value stored under the old declaration into
+    if value is None or isinstance(column.type, ORMTypes.SmallEnum):
+        return value
+    return Decimal(repr(value) if isinstance(value, float) else str(value)).quantize(
+        Decimal(1).scaleb(-column.type.scale), ROUND_HALF_UP)
+
+
+@pytest.mark.parametrize('name', sorted(BUNDLED))
+def test_bundled_databases_keep_their_values(bundled, name):
+    module = ORMCli.load_schema(name)
+    uri = bundled(BUNDLED[name])
+    tables = [table for table in module.Base.metadata.sorted_tables if converted(table)]
+    before = {}
+    with sqlite3.connect(uri[len('sqlite:///'):]) as connection:
+        for table in tables:
+            keys = ', '.join(column.name for column in table.primary_key)
+            columns = ', '.join(column.name for column in converted(table))
+            before[table.name] = connection.execute(f'SELECT {keys}, {columns} FROM {table.name} '
+                                                    f'ORDER BY {keys}').fetchall()
+    assert any(before.values())
+
+    with module.get_engine(uri).connect() as connection:
+        for table in tables:
+            columns = converted(table)
+            after = connection.execute(select(*table.primary_key, *columns).order_by(*table.primary_key)).all()
+            width = len(table.primary_key)
+            assert [tuple(row) for row in after] == [
+                (*row[:width], *(expected(column, value) for column, value in zip(columns, row[width:])))
+                for row in before[table.name]]
+            declared = {row[1]: row[2] for row in connection.exec_driver_sql(f'PRAGMA table_info({table.name})')}
+            assert all(declared[column.name] in ('INTEGER', 'SMALLINT') for column in columns)
+
+
+def test_legacy_payments_migrate_with_the_same_totals(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'payments.db')
+    engine = create_engine(uri)
+    legacy.create(engine)
+    rows = [{'payment_id': i, 'booking_id': i, 'payment_date': datetime.datetime(2024, 1, 1),
+             'amount': Decimal(i * 7919 % 100_000) / 100, 'payment_method': 'GCASH',
+             'payment_status': 'FAILED' if i % 10 == 0 else 'SUCCESS', 'transaction_id': f'T{i}'}
+            for i in range(1, 1001)]
+    with engine.begin() as connection:
+        connection.execute(insert(legacy), rows)
+    engine.dispose()
+
+    total = sum(row['amount'] for row in rows)
+    statuses = collections.Counter(row['payment_status'] for row in rows)
+    payments = travel.Payment
+    with travel.get_engine(uri).connect() as connection:
+        migrated = connection.execute(select(payments.amount, payments.payment_status)).all()
+        assert sum(amount for amount, _ in migrated) == total
+        assert collections.Counter(status for _, status in migrated) == statuses
+        arrays = ORMTypes.fetch_arrays(connection, select(payments.amount, payments.payment_status))
+    labels = payments.payment_status.type.labels
+    assert math.isclose(arrays['amount'].sum(), float(total), rel_tol=1e-12)
+    assert {labels[code]: count for code, count in collections.Counter(arrays['payment_status'].tolist()).items()} \
+        == statuses
+
+
+def test_unknown_labels_stop_the_migration(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'payments.db')
+    engine = create_engine(uri)
+    legacy.create(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO payments (payment_id, booking_id, amount, payment_status) "
+                                   "VALUES (1, 1, 10, 'SUCCESS'), (2, 2, 20, 'REFUNDED')")
+    engine.dispose()
+    with pytest.raises(ValueError, match=r'payment_status \(1 values\)'):
+        travel.get_engine(uri)
+    with sqlite3.connect(uri[len('sqlite:///'):]) as connection:
+        assert connection.execute('SELECT payment_status FROM payments ORDER BY payment_id').fetchall() == [
+            ('SUCCESS',), ('REFUNDED',)]
+
+
+@pytest.mark.parametrize('value, stored', [
+    (3, 300), (19.99, 1999), (0.1 + 0.2, 30), (2.675, 268), (Decimal('0.005'), 1), ('1.005', 101), (None, None),
+])
+def test_cents_round_half_up(value, stored):
+    assert ORMTypes.Cents().process_bind_param(value, None) == stored
+
+
+def test_small_enum_rejects_unknown_labels():
+    with pytest.raises(LookupError, match="'REFUNDED' is not among"):
+        ORMTypes.SmallEnum('SUCCESS', 'FAILED').process_bind_param('REFUNDED', None)